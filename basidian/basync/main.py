@@ -8,7 +8,8 @@ from typing import Optional
 import click
 
 from basidian.client import BasidianClient
-from basidian.models import FsNode
+from basidian.hashing import content_hash
+from basidian.models import MAX_BATCH_OPS, BatchCreate, BatchOp, BatchUpdate, FsNode
 
 from .config import BasyncConfig, load_config
 
@@ -91,6 +92,28 @@ def collect_local_files(
     return files
 
 
+async def fetch_remote_nodes(
+    client: BasidianClient, remote_path: str
+) -> dict[str, FsNode]:
+    """Remote nodes under `remote_path` and the folders leading to it, by path."""
+    remote_by_path = {n.path: n for n in await client.get_subtree(remote_path)}
+    parts = remote_path.strip("/").split("/") if remote_path.strip("/") else []
+    for j in range(1, len(parts) + 1):
+        folder_path = "/" + "/".join(parts[:j])
+        node = await client.get_node(folder_path)
+        if node is None:
+            break
+        remote_by_path[folder_path] = node
+    return remote_by_path
+
+
+def _create_op(path: str, node_type: str, content: str = "") -> BatchCreate:
+    parent_path, _, name = path.rpartition("/")
+    return BatchCreate(
+        type=node_type, name=name, parent_path=parent_path or "/", content=content
+    )
+
+
 async def do_push(
     client: BasidianClient,
     local_path: Path,
@@ -113,11 +136,13 @@ async def do_push(
         return created, updated, skipped
 
     # Get existing remote nodes
-    remote_nodes = await client.get_tree()
-    remote_by_path: dict[str, FsNode] = {n.path: n for n in remote_nodes}
+    remote_by_path = await fetch_remote_nodes(client, remote_path)
 
-    # Track folders we need to create
+    # Track folders we need to create, and those already queued
     folders_to_create: set[str] = set()
+    queued_folders: set[str] = set()
+    # (position, remote path, content) of every readable text file
+    readable: list[tuple[int, str, str]] = []
 
     for i, (file_remote_path, file_local_path) in enumerate(
         sorted(local_files.items()), 1
@@ -149,39 +174,59 @@ async def do_push(
             skipped += 1
             continue
 
+        readable.append((i, full_remote_path, content))
+
+    # Tree listings carry no content: ask which remote files differ by hash,
+    # without downloading their bodies
+    known = {
+        remote_by_path[path].id: content_hash(content)
+        for _, path, content in readable
+        if path in remote_by_path
+    }
+    changed_ids = {
+        fetched.id
+        async for fetched in client.fetch_contents(
+            ids=list(known), known_hashes=known, content=False
+        )
+    }
+
+    # Creates and updates, sent as batches once every file has been compared
+    ops: list[BatchOp] = []
+    for i, full_remote_path, content in readable:
         # Collect parent folders
         parts = full_remote_path.strip("/").split("/")
         for j in range(1, len(parts)):
             folder_path = "/" + "/".join(parts[:j])
-            if folder_path not in remote_by_path:
+            if folder_path not in remote_by_path and folder_path not in queued_folders:
                 folders_to_create.add(folder_path)
 
         # Check if exists
         existing = remote_by_path.get(full_remote_path)
 
         if existing:
-            if existing.content == content:
+            if existing.id not in changed_ids:
                 click.echo(f"[=] unchanged ({i}/{total}): {full_remote_path}")
                 continue
 
             click.echo(f"[~] update ({i}/{total}): {full_remote_path}")
-            if not dry_run:
-                await client.update_node(existing.id, content)
+            ops.append(BatchUpdate(id=existing.id, content=content))
             updated += 1
         else:
             click.echo(f"[+] create ({i}/{total}): {full_remote_path}")
-            if not dry_run:
-                # Create folders first
-                for folder_path in sorted(folders_to_create):
-                    if folder_path not in remote_by_path:
-                        node = await client.create_node(folder_path, "folder")
-                        remote_by_path[folder_path] = node
-                folders_to_create.clear()
-
-                node = await client.create_node(full_remote_path, "file", content)
-                remote_by_path[full_remote_path] = node
+            # Create folders first; sorted, so parents come before children
+            for folder_path in sorted(folders_to_create):
+                ops.append(_create_op(folder_path, "folder"))
+            queued_folders |= folders_to_create
+            folders_to_create.clear()
+
+            ops.append(_create_op(full_remote_path, "file", content))
             created += 1
 
+    if not dry_run:
+        # Each batch is one request and one transaction on the server
+        for start in range(0, len(ops), MAX_BATCH_OPS):
+            await client.batch(ops[start : start + MAX_BATCH_OPS])
+
     return created, updated, skipped
 
 
@@ -198,17 +243,8 @@ async def do_pull(
     updated = 0
     skipped = 0
 
-    # Get remote nodes
-    remote_nodes = await client.get_tree()
-
-    # Filter to requested path
-    if remote_path != "/":
-        prefix = remote_path.rstrip("/")
-        remote_nodes = [
-            n
-            for n in remote_nodes
-            if n.path == prefix or n.path.startswith(prefix + "/")
-        ]
+    # Get remote nodes under the requested path
+    remote_nodes = await client.get_subtree(remote_path)
 
     # Filter to files only
     files = [n for n in remote_nodes if n.type == "file"]
@@ -218,6 +254,8 @@ async def do_pull(
         click.echo("No files to pull.")
         return created, updated, skipped
 
+    # (position, node, relative path) of every file that passes the filters
+    wanted: list[tuple[int, FsNode, str]] = []
     for i, node in enumerate(sorted(files, key=lambda n: n.path), 1):
         # Calculate local path
         if remote_path != "/":
@@ -244,28 +282,42 @@ async def do_pull(
             skipped += 1
             continue
 
-        file_path = local_path / rel_path
+        wanted.append((i, node, rel_path))
 
-        # Check if exists locally
+    # Hashes of the local copies; only bodies that differ are downloaded
+    known: dict[str, str] = {}
+    for _, node, rel_path in wanted:
+        file_path = local_path / rel_path
         if file_path.exists():
             try:
-                local_content = file_path.read_text(encoding="utf-8")
+                known[node.id] = content_hash(file_path.read_text(encoding="utf-8"))
             except UnicodeDecodeError:
-                local_content = None
+                pass
+    bodies = {
+        fetched.id: fetched.content
+        async for fetched in client.fetch_contents(
+            ids=[node.id for _, node, _ in wanted], known_hashes=known
+        )
+    }
+
+    for i, node, rel_path in wanted:
+        file_path = local_path / rel_path
 
-            if local_content == node.content:
+        # Check if exists locally
+        if file_path.exists():
+            if node.id not in bodies:
                 click.echo(f"[=] unchanged ({i}/{total}): {rel_path}")
                 continue
 
             click.echo(f"[~] update ({i}/{total}): {rel_path}")
             if not dry_run:
-                file_path.write_text(node.content or "", encoding="utf-8")
+                file_path.write_text(bodies[node.id], encoding="utf-8")
             updated += 1
-        else:
+        elif node.id in bodies:
             click.echo(f"[+] create ({i}/{total}): {rel_path}")
             if not dry_run:
                 file_path.parent.mkdir(parents=True, exist_ok=True)
-                file_path.write_text(node.content or "", encoding="utf-8")
+                file_path.write_text(bodies[node.id], encoding="utf-8")
             created += 1
 
     return created, updated, skipped
@@ -53,26 +53,24 @@ def files_list(ctx, path: str):
 
 
 @files.command("tree")
+@click.option("--path", default="/", help="Folder to show the tree under")
+@click.option("--depth", type=int, default=None, help="Levels to show (default: all)")
 @click.pass_context
-def files_tree(ctx):
-    """Show full tree structure."""
+def files_tree(ctx, path: str, depth: int | None):
+    """Show the tree structure under a folder."""
 
     async def _run():
         async with BasidianClient(ctx.obj["url"]) as client:
-            nodes = await client.get_tree()
+            nodes = await client.get_subtree(path, depth)
             if not nodes:
                 click.echo("No files found.")
                 return
 
-            # Build depth map from parent_path relationships
-            path_depth: dict[str, int] = {}
-            for node in nodes:
-                parts = node.path.strip("/").split("/")
-                path_depth[node.path] = len(parts) - 1
-
-            for node in nodes:
-                depth = path_depth.get(node.path, 0)
-                indent = "  " * depth
+            # Indent relative to the starting folder; sort by path segments
+            # so every folder is followed by its own children
+            base = path.rstrip("/").count("/")
+            for node in sorted(nodes, key=lambda n: n.path.split("/")):
+                indent = "  " * (node.path.count("/") - base - 1)
                 icon = "\U0001f4c1" if node.type == "folder" else "\U0001f4c4"
                 click.echo(f"{indent}{icon} {node.name}")
 
@@ -190,14 +188,13 @@ def search(ctx, query: str):
 
     async def _run():
         async with BasidianClient(ctx.obj["url"]) as client:
-            results = await client.search_files(query)
+            results = await client.search_snippets(query)
             if not results:
                 click.echo("No results found.")
                 return
             click.echo(f"Found {len(results)} result(s):\n")
-            for node in results:
-                icon = "\U0001f4c1" if node.type == "folder" else "\U0001f4c4"
-                click.echo(f"{icon} {node.path}")
+            for hit in results:
+                click.echo(f"\U0001f4c4 {hit['path']}")
 
     run_async(_run())
 
@@ -210,12 +207,7 @@ def recent(ctx, limit: int):
 
     async def _run():
         async with BasidianClient(ctx.obj["url"]) as client:
-            # Get all files and take the most recent ones
-            # (the tree endpoint returns all nodes)
-            nodes = await client.get_tree()
-            files = [n for n in nodes if n.type == "file"]
-            files.sort(key=lambda n: n.updated_at or "", reverse=True)
-            files = files[:limit]
+            files = await client.get_recent_files(limit)
 
             if not files:
                 click.echo("No files found.")
@@ -1,10 +1,29 @@
 """HTTP client for the Basidian API."""
 
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 import httpx
 
-from .models import FsNode, MoveRequest
+from .models import (
+    MAX_FETCH_NODES,
+    BatchOp,
+    BatchResult,
+    FetchedContent,
+    FsNode,
+    MoveRequest,
+    SearchResult,
+)
+
+try:
+    # httpx decodes zstd responses when zstandard is installed
+    import zstandard  # noqa: F401
+
+    ACCEPT_ENCODING = "zstd, gzip"
+except ImportError:  # optional: pip install basidian[zstd]
+    ACCEPT_ENCODING = "gzip"
+
+# Response header carrying the cursor of the next page (see server/pagination.py)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
 
 
 def _parse_node(item: dict) -> FsNode:
@@ -22,14 +41,25 @@ def _parse_node(item: dict) -> FsNode:
 
 
 class BasidianClient:
-    """Async HTTP client for the Basidian API."""
+    """Async HTTP client for the Basidian API.
 
-    def __init__(self, base_url: str = "http://localhost:8090"):
+    Responses are requested zstd- or gzip-compressed and decoded
+    transparently; pass `compress=False` to skip that on a fast local link.
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8090", compress: bool = True):
         self.base_url = base_url.rstrip("/")
+        self.compress = compress
         self._client: Optional[httpx.AsyncClient] = None
 
     async def __aenter__(self):
-        self._client = httpx.AsyncClient(base_url=self.base_url, timeout=30.0)
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=30.0,
+            headers={
+                "Accept-Encoding": ACCEPT_ENCODING if self.compress else "identity"
+            },
+        )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -43,6 +73,19 @@ class BasidianClient:
             raise RuntimeError("Client not initialized. Use 'async with' context.")
         return self._client
 
+    async def _paginate(self, url: str, params: dict) -> AsyncIterator[dict]:
+        """Yield items from a paged list endpoint, following next-page cursors."""
+        params = dict(params)
+        while True:
+            response = await self.client.get(url, params=params)
+            response.raise_for_status()
+            for item in response.json():
+                yield item
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                return
+            params["cursor"] = cursor
+
     # ---- Filesystem ----
 
     async def get_tree(self, parent_path: Optional[str] = None) -> list[FsNode]:
@@ -53,6 +96,19 @@ class BasidianClient:
         response.raise_for_status()
         return [_parse_node(item) for item in response.json()]
 
+    async def get_subtree(
+        self, parent_path: str = "/", depth: Optional[int] = None
+    ) -> list[FsNode]:
+        """Nodes below `parent_path` in path order, `depth` levels deep (default: all)."""
+        params: dict = {"parent_path": parent_path, "limit": 500}
+        if depth is None:
+            params["recursive"] = "true"
+        else:
+            params["depth"] = depth
+        return [
+            _parse_node(item) async for item in self._paginate("/api/fs/tree", params)
+        ]
+
     async def get_node(self, path: str) -> Optional[FsNode]:
         response = await self.client.get("/api/fs/node", params={"path": path})
         if response.status_code == 404:
@@ -67,6 +123,40 @@ class BasidianClient:
         response.raise_for_status()
         return _parse_node(response.json())
 
+    async def fetch_contents(
+        self,
+        ids: Optional[list[str]] = None,
+        paths: Optional[list[str]] = None,
+        known_hashes: Optional[dict[str, str]] = None,
+        content: bool = True,
+    ) -> AsyncIterator[FetchedContent]:
+        """Bodies of files by ID or path, streamed as the server sends them.
+
+        Files whose content hash (see basidian.hashing) matches their entry
+        in `known_hashes`, keyed by the ID or path they were requested by,
+        are not sent. With `content` false only their IDs, paths and hashes
+        are, to find out which files differ.
+        """
+        ids, paths, known = ids or [], paths or [], known_hashes or {}
+        for start in range(0, max(len(ids), len(paths)), MAX_FETCH_NODES):
+            chunk_ids = ids[start : start + MAX_FETCH_NODES]
+            chunk_paths = paths[start : start + MAX_FETCH_NODES]
+            payload = {
+                "ids": chunk_ids,
+                "paths": chunk_paths,
+                "known_hashes": {
+                    key: known[key] for key in chunk_ids + chunk_paths if key in known
+                },
+                "content": content,
+            }
+            async with self.client.stream(
+                "POST", "/api/fs/nodes/fetch", json=payload
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if line:
+                        yield FetchedContent.model_validate_json(line)
+
     async def create_node(self, path: str, node_type: str, content: str = "") -> FsNode:
         path = path.strip("/")
         if "/" in path:
@@ -114,7 +204,58 @@ class BasidianClient:
         response.raise_for_status()
         return _parse_node(response.json())
 
-    async def search_files(self, query: str) -> list[FsNode]:
-        response = await self.client.get("/api/fs/search", params={"q": query})
+    async def batch(self, ops: list[BatchOp]) -> list[BatchResult]:
+        """Apply create/update/move/delete operations in order, in one transaction.
+
+        All or nothing: if any operation fails, none is applied and the
+        error detail names the failing operation's index. At most
+        MAX_BATCH_OPS operations per call.
+        """
+        payload = {"ops": [op.model_dump(exclude_none=True) for op in ops]}
+        response = await self.client.post("/api/fs/batch", json=payload)
         response.raise_for_status()
-        return [_parse_node(item) for item in response.json()]
+        return [BatchResult(**item) for item in response.json()["results"]]
+
+    async def search_files(self, query: str) -> list[SearchResult]:
+        """Full search results, including content, across all pages."""
+        return [
+            SearchResult(**item)
+            async for item in self._paginate("/api/fs/search", {"q": query})
+        ]
+
+    async def search_snippets(self, query: str, page_size: int = 100) -> list[dict]:
+        """Search results trimmed to path, name and a highlighted snippet."""
+        params = {"q": query, "limit": page_size, "fields": "path,name,snippet"}
+        return [item async for item in self._paginate("/api/fs/search", params)]
+
+    async def get_recent_files(self, limit: int = 10) -> list[FsNode]:
+        """Most recently updated files, newest first."""
+        nodes: list[FsNode] = []
+        params = {"limit": min(limit, 50)}
+        async for item in self._paginate("/api/fs/recent", params):
+            nodes.append(_parse_node(item))
+            if len(nodes) >= limit:
+                break
+        return nodes
+
+    # ---- Metadata ----
+
+    async def query_tags(
+        self, query: str, sort: str = "name", order: str = "asc"
+    ) -> list[FsNode]:
+        """Files matching a boolean tag expression, e.g. `a AND (b OR c) NOT d`."""
+        params = {"q": query, "sort": sort, "order": order, "limit": 500}
+        return [
+            _parse_node(item)
+            async for item in self._paginate("/api/fs/query/tags", params)
+        ]
+
+    async def query_properties(
+        self, *conditions: str, sort: str = "name", order: str = "asc"
+    ) -> list[FsNode]:
+        """Files whose frontmatter matches every condition, e.g. `status=done`."""
+        params = {"where": list(conditions), "sort": sort, "order": order, "limit": 500}
+        return [
+            _parse_node(item)
+            async for item in self._paginate("/api/fs/query/properties", params)
+        ]
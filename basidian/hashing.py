@@ -0,0 +1,15 @@
+"""Content hashing shared by the server and its clients.
+
+Bodies are identified by a 16-byte BLAKE2b digest of their UTF-8 bytes, so
+equality checks compare short hex strings instead of whole documents.
+"""
+
+import hashlib
+
+
+def content_hash(body: str) -> str:
+    """Hex digest identifying a file body."""
+    return hashlib.blake2b(body.encode("utf-8"), digest_size=16).hexdigest()
+
+
+EMPTY_HASH = content_hash("")
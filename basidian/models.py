@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Annotated, Literal, Optional, Union
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 # Filesystem models
@@ -17,6 +17,11 @@ class FsNode(BaseModel):
     updated_at: Optional[str] = None
 
 
+class SearchResult(FsNode):
+    snippet: Optional[str] = None
+    score: Optional[float] = None
+
+
 class FsNodeRequest(BaseModel):
     type: str
     name: str
@@ -36,6 +41,78 @@ class MoveRequest(BaseModel):
     new_name: str = ""
 
 
+# Batch operations (POST /api/fs/batch)
+MAX_BATCH_OPS = 1000
+
+
+class BatchTarget(BaseModel):
+    """The node an operation applies to, by ID or by path."""
+
+    id: Optional[str] = None
+    path: Optional[str] = None
+
+
+class BatchCreate(FsNodeRequest):
+    op: Literal["create"] = "create"
+
+
+class BatchUpdate(FsNodeUpdateRequest, BatchTarget):
+    op: Literal["update"] = "update"
+
+
+class BatchMove(MoveRequest, BatchTarget):
+    op: Literal["move"] = "move"
+
+
+class BatchDelete(BatchTarget):
+    op: Literal["delete"] = "delete"
+
+
+BatchOp = Annotated[
+    Union[BatchCreate, BatchUpdate, BatchMove, BatchDelete],
+    Field(discriminator="op"),
+]
+
+
+class BatchRequest(BaseModel):
+    ops: list[BatchOp] = Field(max_length=MAX_BATCH_OPS)
+
+
+class BatchResult(BaseModel):
+    op: str
+    id: str
+    # The node after the operation; None for deletes
+    node: Optional[FsNode] = None
+
+
+class BatchResponse(BaseModel):
+    results: list[BatchResult]
+
+
+# Bulk content fetch (POST /api/fs/nodes/fetch)
+MAX_FETCH_NODES = 10000
+
+
+class FetchRequest(BaseModel):
+    ids: list[str] = Field(default=[], max_length=MAX_FETCH_NODES)
+    paths: list[str] = Field(default=[], max_length=MAX_FETCH_NODES)
+    # Content hash the client already has, by node ID or path
+    known_hashes: dict[str, str] = {}
+    # False lists the files that differ without sending their bodies
+    content: bool = True
+
+
+class FetchedContent(BaseModel):
+    """One NDJSON line of a bulk content fetch."""
+
+    id: str
+    path: str
+    # None when the request asked for hashes only
+    content: Optional[str] = None
+    content_hash: str
+    updated_at: str
+
+
 # File version models
 class FileVersion(BaseModel):
     id: str
@@ -50,3 +127,4 @@ class FileVersionSummary(BaseModel):
     created_at: str
     lines_added: int
     lines_removed: int
+    size: int = 0
@@ -0,0 +1,256 @@
+"""Accept-Encoding negotiated compression of API responses.
+
+`CompressionMiddleware` compresses JSON, NDJSON and text responses of at
+least `MINIMUM_SIZE` bytes with zstd (when the optional `zstandard` package
+is installed) or gzip, whichever the client accepts with the higher q-value,
+preferring zstd on a tie.
+
+Bodies up to `_STREAM_SIZE` are compressed in one go and keep a
+Content-Length. Larger bodies, and responses the app already streams, are
+compressed chunk by chunk as they are sent; large chunks are compressed in a
+worker thread (zlib and zstandard release the GIL) so a multi-megabyte sync
+pull does not stall the event loop. Each body a streaming response sends is
+flushed through the compressor, so the client can decode it on arrival (the
+lines of an NDJSON stream, say) instead of waiting for the compressor's
+buffer to fill.
+
+A compressed response is a different representation of the same resource,
+so its ETag is sent weak; If-None-Match uses weak comparison, so the tree's
+conditional GETs keep working either way.
+"""
+
+import time
+import zlib
+from dataclasses import dataclass
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:  # optional: pip install basidian[zstd]
+    zstandard = None
+
+# Smaller bodies are sent as they are
+MINIMUM_SIZE = 1024
+# Both land near a 0.2 ratio on note JSON; gzip's default level 6 gains a
+# few points for 2.5x the CPU
+GZIP_LEVEL = 3
+ZSTD_LEVEL = 3
+# Bodies above this are compressed (and sent) in _CHUNK_SIZE pieces
+_STREAM_SIZE = 1 << 20
+_CHUNK_SIZE = 256 << 10
+
+
+def available_encodings() -> tuple[str, ...]:
+    """Supported encodings, most preferred first."""
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """The encoding to use for an Accept-Encoding header, or None for identity."""
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for encoding in available_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip()
+    return content_type.startswith("text/") or content_type.endswith(("json", "ndjson"))
+
+
+class _Encoder:
+    """Streaming compressor for one response."""
+
+    def __init__(self, encoding: str) -> None:
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+            self._sync_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            # wbits 31: zlib stream with a gzip header and trailer
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._sync_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def sync(self) -> bytes:
+        """Output everything given so far, leaving the stream open."""
+        return self._compressor.flush(self._sync_mode)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+@dataclass
+class EncodingStats:
+    responses: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    # CPU time spent compressing
+    cpu_seconds: float = 0.0
+
+    def as_dict(self) -> dict:
+        ratio = self.bytes_out / self.bytes_in if self.bytes_in else None
+        return {
+            "responses": self.responses,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            # Compressed size over original size
+            "ratio": round(ratio, 4) if ratio is not None else None,
+            "cpu_ms": round(self.cpu_seconds * 1000, 1),
+        }
+
+
+class CompressionStats:
+    """Per-encoding totals, reported under "compression" in /metrics."""
+
+    def __init__(self) -> None:
+        self.encodings = {encoding: EncodingStats() for encoding in ("zstd", "gzip")}
+        # Responses sent uncompressed although the client accepted an encoding
+        self.skipped = 0
+
+    def metrics(self) -> dict:
+        return {
+            "available": list(available_encodings()),
+            "skipped": self.skipped,
+            **{name: stats.as_dict() for name, stats in self.encodings.items()},
+        }
+
+
+class CompressionMiddleware:
+    """Compress responses in the encoding negotiated from Accept-Encoding."""
+
+    def __init__(
+        self, app: ASGIApp, stats: CompressionStats, minimum_size: int = MINIMUM_SIZE
+    ) -> None:
+        self.app = app
+        self.stats = stats
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    """Holds back the response start until the first body chunk decides."""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.stats = middleware.stats.encodings[encoding]
+        self._send = send
+        self._start: Message | None = None
+        self._encoder: _Encoder | None = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._start is None:
+            await self._stream(body, more_body)
+            return
+
+        start, self._start = self._start, None
+        headers = MutableHeaders(raw=start["headers"])
+        if not _compressible(headers) or (
+            not more_body and len(body) < self.middleware.minimum_size
+        ):
+            if _compressible(headers):
+                self.middleware.stats.skipped += 1
+            self._passthrough = True
+            await self._send(start)
+            await self._send(message)
+            return
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        self.stats.responses += 1
+        self._encoder = _Encoder(self.encoding)
+
+        if not more_body and len(body) <= _STREAM_SIZE:
+            data = self._compress(body, final=True)
+            headers["Content-Length"] = str(len(data))
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": data})
+            return
+
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        await self._send(start)
+        await self._stream(body, more_body)
+
+    def _compress(self, data: bytes, final: bool = False, sync: bool = False) -> bytes:
+        started = time.thread_time()
+        out = self._encoder.compress(data)
+        if final:
+            out += self._encoder.flush()
+        elif sync:
+            out += self._encoder.sync()
+        self.stats.cpu_seconds += time.thread_time() - started
+        self.stats.bytes_in += len(data)
+        self.stats.bytes_out += len(out)
+        return out
+
+    async def _stream(self, body: bytes, more_body: bool) -> None:
+        """Compress `body` in chunks, sending output as it is produced.
+
+        A body followed by more is flushed with its last chunk, so all of it
+        reaches the client before the app produces the next one.
+        """
+        view = memoryview(body)
+        for offset in range(0, len(view), _CHUNK_SIZE):
+            chunk = bytes(view[offset : offset + _CHUNK_SIZE])
+            sync = more_body and offset + _CHUNK_SIZE >= len(view)
+            if len(chunk) == _CHUNK_SIZE:
+                out = await anyio.to_thread.run_sync(self._compress, chunk, False, sync)
+            else:
+                out = self._compress(chunk, sync=sync)
+            if out:
+                await self._send(
+                    {"type": "http.response.body", "body": out, "more_body": True}
+                )
+        if not more_body:
+            await self._send(
+                {"type": "http.response.body", "body": self._compress(b"", final=True)}
+            )
@@ -0,0 +1,29 @@
+"""Writes to fs_content.
+
+Every body write goes through `write_content`, which keeps the stored
+content hash and byte size in step with the body.
+"""
+
+import aiosqlite
+
+from basidian.hashing import content_hash
+
+
+async def write_content(
+    db: aiosqlite.Connection, node_id: str, body: str, updated_at: str
+) -> str:
+    """Insert or replace a node's body and return its content hash."""
+    digest = content_hash(body)
+    await db.execute(
+        """
+        INSERT INTO fs_content (node_id, body, content_hash, size, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (node_id) DO UPDATE SET
+            body = excluded.body,
+            content_hash = excluded.content_hash,
+            size = excluded.size,
+            updated_at = excluded.updated_at
+        """,
+        (node_id, body, digest, len(body.encode("utf-8")), updated_at),
+    )
+    return digest
@@ -1,34 +1,120 @@
-"""Database connection lifecycle and FastAPI dependency."""
+"""Database connection lifecycle and FastAPI dependencies.
 
+The database runs in WAL mode with one dedicated writer connection and a
+small pool of read-only connections. GET handlers borrow a reader, so large
+reads (full tree, sync pulls, search) run in parallel with saves instead of
+queueing behind them on a single aiosqlite worker thread. Mutating handlers
+submit units of work to the group-commit Writer that owns the writer
+connection.
+"""
+
+import asyncio
 import secrets
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import AsyncIterator
 
 import aiosqlite
 from fastapi import FastAPI, Request
 
 from .migrations import run_migrations
+from .writer import DEFAULT_WRITE_QUEUE_SIZE, Writer
 
+DEFAULT_READ_POOL_SIZE = 4
 
-async def init_db(app: FastAPI, db_path: str) -> None:
-    """Open the database connection and run migrations."""
-    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+# Wait this long for a lock instead of failing immediately with SQLITE_BUSY
+_BUSY_TIMEOUT_MS = 5000
+
+
+class ReadPool:
+    """Fixed-size pool of read-only connections."""
+
+    def __init__(self, connections: list[aiosqlite.Connection]) -> None:
+        self._connections = connections
+        self._idle: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        for conn in connections:
+            self._idle.put_nowait(conn)
+
+    @property
+    def size(self) -> int:
+        return len(self._connections)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a connection, waiting if all of them are in use."""
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+    async def close(self) -> None:
+        for conn in self._connections:
+            await conn.close()
+
+
+async def _connect_writer(db_path: str) -> aiosqlite.Connection:
     db = await aiosqlite.connect(db_path)
     db.row_factory = aiosqlite.Row
+    await db.execute(f"PRAGMA busy_timeout = {_BUSY_TIMEOUT_MS}")
+    await db.execute("PRAGMA journal_mode = WAL")
+    # In WAL mode NORMAL is durable against application crashes and only
+    # risks the last transactions on power loss, in exchange for far fewer fsyncs
+    await db.execute("PRAGMA synchronous = NORMAL")
     await db.execute("PRAGMA foreign_keys = ON")
+    return db
+
+
+async def _connect_reader(db_path: str) -> aiosqlite.Connection:
+    db = await aiosqlite.connect(db_path)
+    db.row_factory = aiosqlite.Row
+    await db.execute(f"PRAGMA busy_timeout = {_BUSY_TIMEOUT_MS}")
+    await db.execute("PRAGMA query_only = ON")
+    return db
+
+
+async def init_db(
+    app: FastAPI,
+    db_path: str,
+    read_pool_size: int = DEFAULT_READ_POOL_SIZE,
+    write_queue_size: int = DEFAULT_WRITE_QUEUE_SIZE,
+) -> None:
+    """Open the writer connection, run migrations, then open the reader pool.
+
+    `app.state.db` stays available for startup work that runs before the
+    writer task takes ownership of the connection.
+    """
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    db = await _connect_writer(db_path)
     await run_migrations(db)
     app.state.db = db
+    app.state.writer = Writer(db, queue_size=write_queue_size)
+
+    readers = [await _connect_reader(db_path) for _ in range(max(1, read_pool_size))]
+    app.state.read_pool = ReadPool(readers)
 
 
 async def close_db(app: FastAPI) -> None:
-    """Close the database connection."""
+    """Drain the writer, then close the reader pool and the writer connection."""
+    writer: Writer = app.state.writer
+    await writer.stop()
+    pool: ReadPool = app.state.read_pool
+    await pool.close()
     db: aiosqlite.Connection = app.state.db
     await db.close()
 
 
-async def get_db(request: Request) -> aiosqlite.Connection:
-    """FastAPI dependency that provides the database connection."""
-    return request.app.state.db
+async def get_read_db(request: Request) -> AsyncIterator[aiosqlite.Connection]:
+    """FastAPI dependency that lends a read-only connection for the request."""
+    pool: ReadPool = request.app.state.read_pool
+    async with pool.acquire() as db:
+        yield db
+
+
+async def get_writer(request: Request) -> Writer:
+    """FastAPI dependency that provides the group-commit writer."""
+    return request.app.state.writer
 
 
 def generate_id() -> str:
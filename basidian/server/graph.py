@@ -0,0 +1,243 @@
+"""Whole-vault link graph, derived from the metadata index.
+
+`LinkGraph` snapshots the index's resolved links into compressed sparse
+rows: node i's outgoing targets are `out_targets[out_offsets[i]:out_offsets[i + 1]]`
+(and likewise for incoming links), with nodes numbered in ID order. That
+keeps a 100k-note graph to a few flat integer arrays, and traversals are
+index arithmetic rather than dict and set lookups.
+
+`GraphCache` rebuilds the graph only when the index generation changes, and
+memoizes query results for the current generation. Rebuilds and memoized
+queries (PageRank among them) run in a worker thread, one at a time, on a
+copy of the index's paths and links taken on the event loop, so saves and
+other requests carry on meanwhile.
+"""
+
+import asyncio
+from array import array
+from collections.abc import Callable, Iterable
+
+from .metadata import MetadataIndex, link_key, resolve_link
+
+PAGERANK_DAMPING = 0.85
+_PAGERANK_ITERATIONS = 50
+_PAGERANK_TOLERANCE = 1e-6
+
+
+def _csr(n: int, edges: Iterable[tuple[int, int]]) -> tuple[array, array]:
+    """Offsets and targets arrays for `edges`, sorted by (source, target)."""
+    by_source: list[list[int]] = [[] for _ in range(n)]
+    for source, target in edges:
+        by_source[source].append(target)
+    offsets = array("I", [0])
+    targets = array("I")
+    for row in by_source:
+        row.sort()
+        targets.extend(row)
+        offsets.append(len(targets))
+    return offsets, targets
+
+
+class LinkGraph:
+    """Resolved links between indexed notes, plus unresolved link targets."""
+
+    def __init__(self, paths: dict[str, str], links: dict[str, frozenset[str]]) -> None:
+        """Build from node ID → path and node ID → link targets."""
+        path_keys: dict[str, set[str]] = {}
+        for node_id, path in paths.items():
+            path_keys.setdefault(link_key(path), set()).add(node_id)
+
+        self.ids = sorted(paths)
+        self.paths = [paths[node_id] for node_id in self.ids]
+        self.position = {node_id: i for i, node_id in enumerate(self.ids)}
+
+        edges: set[tuple[int, int]] = set()
+        # link key → sources, and the first spelling seen for display
+        unresolved: dict[str, set[int]] = {}
+        spelling: dict[str, str] = {}
+        for source, node_id in enumerate(self.ids):
+            for target in links.get(node_id, ()):
+                target_id = resolve_link(paths, path_keys, target)
+                if target_id is None:
+                    key = link_key(target)
+                    unresolved.setdefault(key, set()).add(source)
+                    spelling.setdefault(key, target)
+                elif target_id != node_id:
+                    edges.add((source, self.position[target_id]))
+
+        n = len(self.ids)
+        self.out_offsets, self.out_targets = _csr(n, edges)
+        self.in_offsets, self.in_targets = _csr(n, ((t, s) for s, t in edges))
+        self.unresolved = [
+            (spelling[key], array("I", sorted(sources)))
+            for key, sources in unresolved.items()
+        ]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.out_targets)
+
+    def out_links(self, i: int) -> array:
+        return self.out_targets[self.out_offsets[i] : self.out_offsets[i + 1]]
+
+    def in_links(self, i: int) -> array:
+        return self.in_targets[self.in_offsets[i] : self.in_offsets[i + 1]]
+
+    def out_degree(self, i: int) -> int:
+        return self.out_offsets[i + 1] - self.out_offsets[i]
+
+    def in_degree(self, i: int) -> int:
+        return self.in_offsets[i + 1] - self.in_offsets[i]
+
+    def neighborhood(
+        self, i: int, depth: int, direction: str, limit: int
+    ) -> tuple[dict[int, int], list[tuple[int, int]], bool]:
+        """Breadth-first k-hop neighborhood of node `i`.
+
+        Returns node → hop distance, the links among those nodes, and whether
+        `limit` cut the expansion short.
+        """
+        steps: list[Callable[[int], array]] = []
+        if direction in ("out", "both"):
+            steps.append(self.out_links)
+        if direction in ("in", "both"):
+            steps.append(self.in_links)
+
+        distance = {i: 0}
+        frontier = [i]
+        truncated = False
+        for hop in range(1, depth + 1):
+            following = []
+            for node in frontier:
+                neighbors = [
+                    n for step in steps for n in step(node) if n not in distance
+                ]
+                room = limit - len(distance)
+                if len(neighbors) > room:
+                    neighbors, truncated = neighbors[:room], True
+                for neighbor in neighbors:
+                    if neighbor not in distance:
+                        distance[neighbor] = hop
+                        following.append(neighbor)
+                if truncated:
+                    break
+            frontier = following
+            if not frontier or truncated:
+                break
+
+        edges = [
+            (node, target)
+            for node in distance
+            for target in self.out_links(node)
+            if target in distance
+        ]
+        return distance, edges, truncated
+
+    def orphans(self) -> list[int]:
+        """Notes with no resolved links in either direction."""
+        return [
+            i
+            for i in range(len(self.ids))
+            if not self.out_degree(i) and not self.in_degree(i)
+        ]
+
+    def degrees(self, metric: str) -> list[float]:
+        if metric == "in_degree":
+            return [float(self.in_degree(i)) for i in range(len(self.ids))]
+        if metric == "out_degree":
+            return [float(self.out_degree(i)) for i in range(len(self.ids))]
+        return [
+            float(self.in_degree(i) + self.out_degree(i)) for i in range(len(self.ids))
+        ]
+
+    def pagerank(self) -> list[float]:
+        """PageRank by power iteration; dangling notes spread their rank evenly."""
+        n = len(self.ids)
+        if not n:
+            return []
+        out_degree = [self.out_degree(i) for i in range(n)]
+        dangling = [i for i in range(n) if not out_degree[i]]
+        rank = [1.0 / n] * n
+        for _ in range(_PAGERANK_ITERATIONS):
+            spread = sum(rank[i] for i in dangling) / n
+            base = (1.0 - PAGERANK_DAMPING) / n + PAGERANK_DAMPING * spread
+            share = [
+                rank[i] / out_degree[i] if out_degree[i] else 0.0 for i in range(n)
+            ]
+            following = [
+                base + PAGERANK_DAMPING * sum(share[s] for s in self.in_links(i))
+                for i in range(n)
+            ]
+            delta = sum(abs(a - b) for a, b in zip(following, rank))
+            rank = following
+            if delta < _PAGERANK_TOLERANCE:
+                break
+        return rank
+
+
+class GraphCache:
+    """The LinkGraph for the index's current generation, plus memoized queries."""
+
+    def __init__(self, index: MetadataIndex) -> None:
+        self.index = index
+        self._generation: int | None = None
+        self._graph: LinkGraph | None = None
+        self._memo: dict[tuple, object] = {}
+        # One rebuild or memoized computation at a time
+        self._lock = asyncio.Lock()
+
+    async def graph(self) -> LinkGraph:
+        async with self._lock:
+            return await self._current()
+
+    async def _current(self) -> LinkGraph:
+        """The up-to-date graph; the caller holds the lock."""
+        if self._graph is None or self._generation != self.index.generation:
+            # Copied on the event loop, where the index is only ever changed;
+            # the metadata objects themselves are immutable
+            generation = self.index.generation
+            paths = dict(self.index.paths)
+            links = {node_id: meta.links for node_id, meta in self.index.nodes.items()}
+            self._graph = await asyncio.to_thread(LinkGraph, paths, links)
+            self._generation = generation
+            self._memo.clear()
+        return self._graph
+
+    async def memo(
+        self, key: tuple, compute: Callable[[LinkGraph], object]
+    ) -> tuple[LinkGraph, object]:
+        """The graph and `compute(graph)`, cached until the index changes."""
+        async with self._lock:
+            graph = await self._current()
+            if key not in self._memo:
+                self._memo[key] = await asyncio.to_thread(compute, graph)
+            return graph, self._memo[key]
+
+    async def rank(self, metric: str) -> tuple[LinkGraph, list[tuple[int, float]]]:
+        """(node position, score) ordered by `metric`, highest first, then by path."""
+
+        def compute(graph: LinkGraph) -> list[tuple[int, float]]:
+            scores = graph.pagerank() if metric == "pagerank" else graph.degrees(metric)
+            order = sorted(
+                range(len(graph)), key=lambda i: (-scores[i], graph.paths[i])
+            )
+            return [(i, scores[i]) for i in order]
+
+        return await self.memo(("rank", metric), compute)
+
+    async def orphans(self) -> tuple[LinkGraph, list[int]]:
+        return await self.memo(
+            ("orphans",),
+            lambda graph: sorted(graph.orphans(), key=graph.paths.__getitem__),
+        )
+
+    async def unresolved(self) -> tuple[LinkGraph, list[tuple[str, array]]]:
+        return await self.memo(
+            ("unresolved",),
+            lambda graph: sorted(
+                graph.unresolved, key=lambda entry: (-len(entry[1]), entry[0])
+            ),
+        )
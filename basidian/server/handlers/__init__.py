@@ -1,6 +1,13 @@
 from .filesystem import router as filesystem_router
+from .graph import router as graph_router
 from .history import router as history_router
 from .metadata import router as metadata_router
 from .sync import router as sync_router
 
-__all__ = ["filesystem_router", "history_router", "metadata_router", "sync_router"]
+__all__ = [
+    "filesystem_router",
+    "graph_router",
+    "history_router",
+    "metadata_router",
+    "sync_router",
+]
@@ -1,14 +1,41 @@
+import json
+from collections.abc import AsyncIterator
 from datetime import datetime, timezone
 from typing import Optional
 
 import aiosqlite
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from loguru import logger
 
-from basidian.models import FsNode, FsNodeRequest, FsNodeUpdateRequest, MoveRequest
+from basidian.hashing import EMPTY_HASH, content_hash
+from basidian.models import (
+    BatchRequest,
+    BatchResponse,
+    BatchResult,
+    BatchTarget,
+    FetchRequest,
+    FsNode,
+    FsNodeRequest,
+    FsNodeUpdateRequest,
+    MoveRequest,
+    SearchResult,
+)
+from basidian.server import search
 from basidian.server.metadata import MetadataIndex
 
-from ..db import generate_id, get_db, utcnow_iso
+from ..content import write_content
+from ..db import generate_id, get_read_db, get_writer, utcnow_iso
+from ..pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    set_next_cursor,
+)
+from ..row_json import json_array, json_object_sql, json_response, node_fields
+from ..tree_cache import TreeCache, etag_matches, get_tree_cache
+from ..writer import Writer
 from .history import create_version_if_changed
 
 INACTIVITY_THRESHOLD_MINUTES = 10
@@ -17,10 +44,8 @@ router = APIRouter()
 
 # Column lists for different query types
 _TREE_COLS = "id, parent_id, type, name, path, sort_order, created_at, updated_at"
-_FULL_COLS = (
-    "n.id, n.parent_id, n.type, n.name, n.path, n.sort_order, n.created_at, n.updated_at, "
-    "c.body AS content"
-)
+_NODE_COLS = "n.id, n.parent_id, n.type, n.name, n.path, n.sort_order, n.created_at, n.updated_at"
+_FULL_COLS = f"{_NODE_COLS}, c.body AS content"
 
 
 def _build_path(parent_path: str, name: str) -> str:
@@ -30,6 +55,15 @@ def _build_path(parent_path: str, name: str) -> str:
     return f"{parent_path}/{name}"
 
 
+def _subtree_bounds(path: str) -> tuple[str, str]:
+    """Half-open [lower, upper) range of `path` values strictly below `path`.
+
+    '0' is the character right after '/', so `path >= lower AND path < upper`
+    matches exactly the descendants and is a range scan on idx_fs_nodes_path.
+    """
+    return f"{path}/", f"{path}0"
+
+
 async def _get_parent_path(db: aiosqlite.Connection, parent_id: str | None) -> str:
     """Get the path of a parent node, or '/' for root."""
     if parent_id is None:
@@ -72,14 +106,62 @@ def _enrich_parent_paths(nodes: list[FsNode]) -> list[FsNode]:
     return nodes
 
 
-@router.get("/api/fs/tree")
+# Tree rows as FsNode JSON objects, content left out
+_TREE_JSON = json_object_sql(node_fields())
+
+
+@router.get("/api/fs/tree", response_model=list[FsNode])
 async def get_tree(
+    request: Request,
     parent_path: Optional[str] = None,
-    db: aiosqlite.Connection = Depends(get_db),
-) -> list[FsNode]:
-    """Get filesystem tree structure. Returns nodes without content."""
-    logger.info("GetTree: Fetching filesystem tree")
-
+    recursive: bool = False,
+    depth: Optional[int] = Query(default=None, ge=1),
+    limit: Optional[int] = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    tree_cache: TreeCache = Depends(get_tree_cache),
+) -> Response:
+    """Get filesystem tree structure. Returns nodes without content.
+
+    Without options: the whole tree, or the children of `parent_path`. The
+    serialized result is cached until the next write to the tree, and
+    responses carry a strong ETag: a matching If-None-Match gets a 304
+    without a database read.
+
+    With `depth` (levels below `parent_path`, default 1), `recursive`
+    (every level), `limit` or `cursor`: the nodes below `parent_path`
+    (or the root) in path order, paged by `cursor`.
+    """
+    if recursive or depth is not None or limit is not None or cursor:
+        async with request.app.state.read_pool.acquire() as db:
+            nodes, next_cursor = await _scan_tree(
+                db,
+                (parent_path or "").rstrip("/"),
+                depth if depth is not None else (None if recursive else 1),
+                limit or DEFAULT_PAGE_SIZE,
+                decode_cursor(cursor, 1),
+            )
+        response = json_response(json_array(nodes))
+        set_next_cursor(response, next_cursor)
+        return response
+
+    key = parent_path or ""
+    revision = tree_cache.revision
+    entry = tree_cache.get(key)
+    if entry is None:
+        async with request.app.state.read_pool.acquire() as db:
+            nodes = await _load_tree(db, parent_path)
+        logger.info(f"GetTree: Serialized {len(nodes)} nodes (revision {revision})")
+        entry = tree_cache.put(key, revision, json_array(nodes).encode())
+
+    etag, body = entry
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        tree_cache.stats.not_modified += 1
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(body, media_type="application/json", headers={"ETag": etag})
+
+
+async def _load_tree(db: aiosqlite.Connection, parent_path: str | None) -> list[str]:
+    """FsNode JSON without content: the whole tree, or the children of `parent_path`."""
     if parent_path:
         # Find the parent node to get its ID
         async with db.execute(
@@ -91,7 +173,7 @@ async def get_tree(
         if parent_row:
             async with db.execute(
                 f"""
-                SELECT {_TREE_COLS}
+                SELECT {_TREE_JSON}
                 FROM fs_nodes
                 WHERE parent_id = ? AND deleted_at IS NULL
                 ORDER BY type DESC, sort_order ASC, name ASC
@@ -103,23 +185,75 @@ async def get_tree(
             rows = []
     else:
         async with db.execute(f"""
-            SELECT {_TREE_COLS}
+            SELECT {_TREE_JSON}
             FROM fs_nodes
             WHERE deleted_at IS NULL
             ORDER BY type DESC, sort_order ASC, name ASC
         """) as cursor:
             rows = await cursor.fetchall()
 
-    nodes = [_row_to_node(row) for row in rows]
-    _enrich_parent_paths(nodes)
-    logger.info(f"GetTree: Found {len(nodes)} nodes")
-    return nodes
+    return [row[0] for row in rows]
+
+
+async def _scan_tree(
+    db: aiosqlite.Connection,
+    parent_path: str,
+    depth: int | None,
+    limit: int,
+    after: list | None,
+) -> tuple[list[str], str | None]:
+    """One page of the nodes up to `depth` levels below `parent_path`.
+
+    `parent_path` is '' for the root. Returns the nodes' FsNode JSON in path
+    order and the cursor for the next page.
+    """
+    parent_id = None
+    if parent_path:
+        async with db.execute(
+            "SELECT id FROM fs_nodes WHERE path = ? AND deleted_at IS NULL",
+            (parent_path,),
+        ) as cur:
+            parent_row = await cur.fetchone()
+        if parent_row is None:
+            return [], None
+        parent_id = parent_row["id"]
+
+    if depth == 1:
+        # Direct children: idx_fs_nodes_parent_path walks them in path order
+        where, params = "parent_id IS ?", [parent_id]
+    else:
+        # Descendants: a range scan on idx_fs_nodes_path, skipping rows too deep
+        where, params = "path >= ? AND path < ?", list(_subtree_bounds(parent_path))
+        if depth is not None:
+            where += " AND length(path) - length(replace(path, '/', '')) <= ?"
+            params.append(parent_path.count("/") + depth)
+    if after:
+        where += " AND path > ?"
+        params.append(after[0])
+
+    async with db.execute(
+        f"""
+        SELECT path, {_TREE_JSON} AS json
+        FROM fs_nodes
+        WHERE {where} AND deleted_at IS NULL
+        ORDER BY path
+        LIMIT ?
+        """,
+        (*params, limit + 1),
+    ) as cur:
+        rows = await cur.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["path"])
+    return [row["json"] for row in rows], next_cursor
 
 
 @router.get("/api/fs/node")
 async def get_node(
     path: str = Query(...),
-    db: aiosqlite.Connection = Depends(get_db),
+    db: aiosqlite.Connection = Depends(get_read_db),
 ) -> FsNode:
     """Get a single node by path, including content for files."""
     async with db.execute(
@@ -144,7 +278,7 @@ async def get_node(
 @router.get("/api/fs/node/{node_id}")
 async def get_node_by_id(
     node_id: str,
-    db: aiosqlite.Connection = Depends(get_db),
+    db: aiosqlite.Connection = Depends(get_read_db),
 ) -> FsNode:
     """Get a single node by ID, including content for files."""
     async with db.execute(
@@ -166,17 +300,135 @@ async def get_node_by_id(
     return node
 
 
+# Bodies loaded per query while streaming /api/fs/nodes/fetch
+_FETCH_CHUNK = 200
+_FETCHED_FIELDS = {
+    "id": "n.id",
+    "path": "n.path",
+    "content_hash": "c.content_hash",
+    "updated_at": "c.updated_at",
+}
+_FETCHED_JSON = json_object_sql({**_FETCHED_FIELDS, "content": "c.body"})
+_FETCHED_HASH_JSON = json_object_sql(_FETCHED_FIELDS)
+
+
+@router.post("/api/fs/nodes/fetch")
+async def fetch_nodes(req: FetchRequest, request: Request) -> Response:
+    """Stream the bodies of files named by ID or path, as NDJSON.
+
+    Each line is a FetchedContent, in path order. Files whose content hash
+    matches the client's entry in `known_hashes` (by ID or path) are left
+    out, as are folders and names that match no live file. With `content`
+    false the lines carry no body, which is all a client needs to tell
+    which of its copies differ.
+    """
+    async with request.app.state.read_pool.acquire() as db:
+        changed = await _changed_files(db, req)
+    logger.info(
+        f"FetchNodes: {len(changed)} of {len(req.ids) + len(req.paths)} requested"
+    )
+
+    if not req.content:
+        return Response(
+            "".join(f"{line}\n" for _, line in changed),
+            media_type="application/x-ndjson",
+        )
+    changed_ids = [node_id for node_id, _ in changed]
+
+    async def lines() -> AsyncIterator[str]:
+        for start in range(0, len(changed_ids), _FETCH_CHUNK):
+            # A connection per chunk, so a slow reader does not hold one
+            async with request.app.state.read_pool.acquire() as db:
+                async with db.execute(
+                    f"""
+                    SELECT {_FETCHED_JSON}
+                    FROM fs_nodes n
+                    JOIN fs_content c ON c.node_id = n.id
+                    WHERE n.id IN (SELECT value FROM json_each(?))
+                    ORDER BY n.path
+                    """,
+                    (json.dumps(changed_ids[start : start + _FETCH_CHUNK]),),
+                ) as cursor:
+                    rows = await cursor.fetchall()
+            yield "".join(f"{row[0]}\n" for row in rows)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+async def _changed_files(
+    db: aiosqlite.Connection, req: FetchRequest
+) -> list[tuple[str, str]]:
+    """(ID, bodiless FetchedContent JSON), in path order, of requested files
+    whose hash differs from the client's."""
+    # Driven by the requested keys: primary key and path index lookups
+    async with db.execute(
+        f"""
+        SELECT n.id, n.path, c.content_hash, {_FETCHED_HASH_JSON} AS line
+        FROM (
+            SELECT value AS id FROM json_each(?)
+            UNION
+            SELECT id FROM fs_nodes
+            WHERE path IN (SELECT value FROM json_each(?)) AND deleted_at IS NULL
+        ) wanted
+        JOIN fs_nodes n ON n.id = wanted.id
+        JOIN fs_content c ON c.node_id = n.id
+        WHERE n.type = 'file' AND n.deleted_at IS NULL
+        ORDER BY n.path
+        """,
+        (json.dumps(req.ids), json.dumps(req.paths)),
+    ) as cursor:
+        rows = await cursor.fetchall()
+
+    known = req.known_hashes
+    return [
+        (row["id"], row["line"])
+        for row in rows
+        if known.get(row["id"], known.get(row["path"])) != row["content_hash"]
+    ]
+
+
 def _get_index(request: Request) -> MetadataIndex:
     return request.app.state.metadata_index
 
 
-@router.post("/api/fs/node", status_code=201)
-async def create_node(
-    req: FsNodeRequest,
-    request: Request,
-    db: aiosqlite.Connection = Depends(get_db),
+class _IndexChanges:
+    """Metadata index updates to apply, in order, once a unit has committed."""
+
+    def __init__(self) -> None:
+        self._steps: list[tuple[str, tuple]] = []
+
+    def update(
+        self, node_id: str, name: str, path: str, body: str, body_hash: str | None
+    ) -> None:
+        self._steps.append(("update_node", (node_id, name, path, body, body_hash)))
+
+    def remove(self, node_ids: list[str]) -> None:
+        self._steps.extend(("remove_node", (node_id,)) for node_id in node_ids)
+
+    def move(self, moved: list[tuple[str, str, str, str]]) -> None:
+        self._steps.extend(("on_move", entry) for entry in moved)
+
+    def write(
+        self,
+        node_ids: list[str],
+        updated_at: str,
+        created_at: str | None = None,
+        name: str | None = None,
+    ) -> None:
+        self._steps.extend(
+            ("on_write", (node_id, updated_at, created_at, name))
+            for node_id in node_ids
+        )
+
+    def apply(self, index: MetadataIndex) -> None:
+        for method, args in self._steps:
+            getattr(index, method)(*args)
+
+
+async def _create(
+    db: aiosqlite.Connection, req: FsNodeRequest, changes: _IndexChanges
 ) -> FsNode:
-    """Create a new file or folder."""
+    """Create a file or folder within the caller's unit of work."""
     if req.type not in ("folder", "file"):
         raise HTTPException(status_code=400, detail="Type must be 'folder' or 'file'")
 
@@ -185,6 +437,9 @@ async def create_node(
         raise HTTPException(status_code=400, detail="Name is required")
 
     parent_path = req.parent_path if req.parent_path else "/"
+    # Build the full path
+    node_path = _build_path(parent_path, name)
+    content = req.content if req.type == "file" else ""
 
     # Resolve parent_id from parent_path
     parent_id = None
@@ -198,12 +453,10 @@ async def create_node(
                 raise HTTPException(status_code=400, detail="Parent folder not found")
             parent_id = parent_row["id"]
 
-    # Build the full path
-    node_path = _build_path(parent_path, name)
-
     # Check if path already exists
     async with db.execute(
-        "SELECT 1 FROM fs_nodes WHERE path = ? AND deleted_at IS NULL", (node_path,)
+        "SELECT 1 FROM fs_nodes WHERE path = ? AND deleted_at IS NULL",
+        (node_path,),
     ) as cursor:
         if await cursor.fetchone() is not None:
             raise HTTPException(status_code=409, detail="Path already exists")
@@ -221,21 +474,12 @@ async def create_node(
     )
 
     # Insert content row for files
-    content = ""
-    if req.type == "file":
-        content = req.content
-        await db.execute(
-            "INSERT INTO fs_content (node_id, body, updated_at) VALUES (?, ?, ?)",
-            (node_id, content, now),
-        )
-
-    await db.commit()
-
-    # Update metadata index for new files
     if req.type == "file":
-        _get_index(request).update_node(node_id, name, node_path, content)
+        digest = await write_content(db, node_id, content, now)
+        await search.reindex(db, [node_id])
+        changes.update(node_id, name, node_path, content, digest)
+        changes.write([node_id], now, created_at=now)
 
-    logger.info(f"CreateNode: Created {req.type} at {node_path}")
     return FsNode(
         id=node_id,
         parent_id=parent_id,
@@ -250,14 +494,13 @@ async def create_node(
     )
 
 
-@router.put("/api/fs/node/{node_id}")
-async def update_node(
+async def _update(
+    db: aiosqlite.Connection,
     node_id: str,
     req: FsNodeUpdateRequest,
-    request: Request,
-    db: aiosqlite.Connection = Depends(get_db),
+    changes: _IndexChanges,
 ) -> FsNode:
-    """Update an existing node."""
+    """Update a node's name, sort order or content within the caller's unit."""
     # Get current node metadata
     async with db.execute(
         "SELECT type, name, sort_order, updated_at FROM fs_nodes WHERE id = ?",
@@ -278,15 +521,18 @@ async def update_node(
 
     # Handle content update (files only)
     content_changing = False
+    new_hash = None
     if req.content is not None and node_row["type"] == "file":
-        # Get current content from fs_content
+        # Compare hashes; the old body is only loaded to snapshot it
         async with db.execute(
-            "SELECT body, updated_at FROM fs_content WHERE node_id = ?", (node_id,)
+            "SELECT content_hash, updated_at FROM fs_content WHERE node_id = ?",
+            (node_id,),
         ) as cursor:
             content_row = await cursor.fetchone()
 
-        old_body = content_row["body"] if content_row else ""
-        content_changing = req.content != old_body
+        old_hash = content_row["content_hash"] if content_row else EMPTY_HASH
+        new_hash = content_hash(req.content)
+        content_changing = new_hash != old_hash
 
         if content_changing and content_row and content_row["updated_at"]:
             # Auto-snapshot on inactivity gap
@@ -296,23 +542,22 @@ async def update_node(
                 ).replace(tzinfo=timezone.utc)
                 gap = now_dt - last_updated
                 if gap.total_seconds() >= INACTIVITY_THRESHOLD_MINUTES * 60:
+                    async with db.execute(
+                        "SELECT body FROM fs_content WHERE node_id = ?", (node_id,)
+                    ) as cursor:
+                        old_body = (await cursor.fetchone())["body"]
                     await create_version_if_changed(
-                        db, node_id, old_body, content_row["updated_at"]
+                        db,
+                        node_id,
+                        old_body,
+                        content_row["updated_at"],
+                        body_hash=old_hash,
                     )
             except (ValueError, TypeError):
                 pass
 
-        if content_row:
-            await db.execute(
-                "UPDATE fs_content SET body = ?, updated_at = ? WHERE node_id = ?",
-                (req.content, now_iso, node_id),
-            )
-        else:
-            # Content row missing (shouldn't happen, but handle gracefully)
-            await db.execute(
-                "INSERT INTO fs_content (node_id, body, updated_at) VALUES (?, ?, ?)",
-                (node_id, req.content, now_iso),
-            )
+        # Also recreates the content row if it is missing (shouldn't happen)
+        await write_content(db, node_id, req.content, now_iso)
 
     # Update tree node metadata (always update updated_at to keep recent files in sync)
     await db.execute(
@@ -323,20 +568,10 @@ async def update_node(
         """,
         (new_name, new_sort_order, now_iso, node_id),
     )
-    await db.commit()
-
-    # Update metadata index if content changed
-    if content_changing and req.content is not None:
-        async with db.execute(
-            "SELECT name, path FROM fs_nodes WHERE id = ?", (node_id,)
-        ) as cursor:
-            node_info = await cursor.fetchone()
-        if node_info:
-            _get_index(request).update_node(
-                node_id, node_info["name"], node_info["path"], req.content
-            )
+    if content_changing or new_name != node_row["name"]:
+        await search.reindex(db, [node_id])
 
-    # Fetch and return updated node
+    # Fetch updated node
     async with db.execute(
         f"""
         SELECT {_FULL_COLS}
@@ -350,16 +585,17 @@ async def update_node(
 
     node = _row_to_node(row, include_content=True)
     node.parent_path = _compute_parent_path(node.path)
+    # Update metadata index if content changed
+    if content_changing:
+        changes.update(node_id, node.name, node.path, req.content, new_hash)
+    changes.write([node_id], now_iso, name=new_name)
     return node
 
 
-@router.delete("/api/fs/node/{node_id}", status_code=204)
-async def delete_node(
-    node_id: str,
-    request: Request,
-    db: aiosqlite.Connection = Depends(get_db),
-) -> None:
-    """Soft-delete a node. Sets deleted_at on the node and all descendants."""
+async def _delete(
+    db: aiosqlite.Connection, node_id: str, changes: _IndexChanges
+) -> str:
+    """Soft-delete a node and its descendants; returns the node's path."""
     async with db.execute(
         "SELECT path, type FROM fs_nodes WHERE id = ? AND deleted_at IS NULL",
         (node_id,),
@@ -369,53 +605,33 @@ async def delete_node(
     if row is None:
         raise HTTPException(status_code=404, detail="Node not found")
 
-    node_path = row["path"]
     now = utcnow_iso()
-    index = _get_index(request)
+    lower, upper = _subtree_bounds(row["path"])
 
-    # Soft-delete the node and all descendants
-    await db.execute(
-        """
-        WITH RECURSIVE descendants AS (
-            SELECT id FROM fs_nodes WHERE id = ?
-            UNION ALL
-            SELECT n.id FROM fs_nodes n JOIN descendants d ON n.parent_id = d.id
-        )
-        UPDATE fs_nodes SET deleted_at = ?, updated_at = ?
-        WHERE id IN (SELECT id FROM descendants) AND deleted_at IS NULL
-        """,
-        (node_id, now, now),
-    )
-    await db.commit()
-
-    # Collect all affected IDs for index cleanup
+    # Soft-delete the node and all descendants with one range scan on the
+    # path index; RETURNING gives the affected set for index cleanup
     async with db.execute(
         """
-        WITH RECURSIVE descendants AS (
-            SELECT id FROM fs_nodes WHERE id = ?
-            UNION ALL
-            SELECT n.id FROM fs_nodes n JOIN descendants d ON n.parent_id = d.id
-        )
-        SELECT id FROM descendants
+        UPDATE fs_nodes SET deleted_at = ?, updated_at = ?
+        WHERE (id = ? OR (path >= ? AND path < ?)) AND deleted_at IS NULL
+        RETURNING id
         """,
-        (node_id,),
+        (now, now, node_id, lower, upper),
     ) as cursor:
         all_ids = [r["id"] for r in await cursor.fetchall()]
+    await search.reindex(db, all_ids)
 
-    for nid in all_ids:
-        index.remove_node(nid)
+    changes.remove(all_ids)
+    return row["path"]
 
-    logger.info(f"DeleteNode: Soft-deleted {node_path}")
 
+async def _move(
+    db: aiosqlite.Connection, node_id: str, req: MoveRequest, changes: _IndexChanges
+) -> tuple[FsNode, str, int]:
+    """Move or rename a node within the caller's unit of work.
 
-@router.post("/api/fs/move/{node_id}")
-async def move_node(
-    node_id: str,
-    req: MoveRequest,
-    request: Request,
-    db: aiosqlite.Connection = Depends(get_db),
-) -> FsNode:
-    """Move or rename a node."""
+    Returns the moved node, its old path and how many nodes changed path.
+    """
     # Get current node info
     async with db.execute(
         "SELECT id, parent_id, path, name, type FROM fs_nodes WHERE id = ? AND deleted_at IS NULL",
@@ -453,11 +669,14 @@ async def move_node(
                 new_parent_id = parent_row["id"]
 
     new_path = _build_path(new_parent_path, new_name)
+    if node_type == "folder" and new_path.startswith(old_path + "/"):
+        raise HTTPException(status_code=400, detail="Cannot move a folder into itself")
 
     # Check if new path already exists
     if new_path != old_path:
         async with db.execute(
-            "SELECT 1 FROM fs_nodes WHERE path = ? AND deleted_at IS NULL", (new_path,)
+            "SELECT 1 FROM fs_nodes WHERE path = ? AND deleted_at IS NULL",
+            (new_path,),
         ) as cursor:
             if await cursor.fetchone() is not None:
                 raise HTTPException(
@@ -475,37 +694,33 @@ async def move_node(
         """,
         (new_parent_id, new_name, new_path, now, node_id),
     )
+    if new_name != old_name:
+        await search.reindex(db, [node_id])
+
+    # (id, old path, new path, name) of every node whose path changed
+    moved = [(node_id, old_path, new_path, new_name)]
 
-    # If it's a folder and path changed, update all descendant paths
+    # If it's a folder and path changed, rewrite the whole subtree's path
+    # prefix in one statement over the path index range
     if node_type == "folder" and new_path != old_path:
-        # Use recursive CTE to find all descendants and update paths
+        lower, upper = _subtree_bounds(old_path)
         async with db.execute(
             """
-            WITH RECURSIVE descendants AS (
-                SELECT id, path, parent_id FROM fs_nodes WHERE parent_id = ?
-                UNION ALL
-                SELECT n.id, n.path, n.parent_id
-                FROM fs_nodes n
-                JOIN descendants d ON n.parent_id = d.id
-            )
-            SELECT id, path FROM descendants
+            UPDATE fs_nodes SET path = ? || substr(path, ?), updated_at = ?
+            WHERE path >= ? AND path < ?
+            RETURNING id, name, path, deleted_at
             """,
-            (node_id,),
+            (new_path, len(old_path) + 1, now, lower, upper),
         ) as cursor:
-            children = await cursor.fetchall()
-
-        for child in children:
-            child_new_path = new_path + child["path"][len(old_path) :]
-            await db.execute(
-                "UPDATE fs_nodes SET path = ?, updated_at = ? WHERE id = ?",
-                (child_new_path, now, child["id"]),
-            )
-
-    await db.commit()
-
-    # Update metadata index for path changes
-    index = _get_index(request)
-    index.on_move(node_id, old_path, new_path, new_name)
+            for child in await cursor.fetchall():
+                # Deleted descendants keep their place under the folder but
+                # are not in the metadata index
+                if child["deleted_at"] is not None:
+                    continue
+                suffix = child["path"][len(new_path) :]
+                moved.append(
+                    (child["id"], old_path + suffix, child["path"], child["name"])
+                )
 
     # Fetch updated node
     async with db.execute(
@@ -521,51 +736,235 @@ async def move_node(
 
     node = _row_to_node(row, include_content=True)
     node.parent_path = new_parent_path
-    logger.info(f"MoveNode: Moved {old_path} to {new_path}")
+    # Update metadata index for path changes
+    changes.move(moved)
+    changes.write([entry[0] for entry in moved], now)
+    return node, old_path, len(moved)
+
+
+@router.post("/api/fs/node", status_code=201)
+async def create_node(
+    req: FsNodeRequest,
+    request: Request,
+    writer: Writer = Depends(get_writer),
+    tree_cache: TreeCache = Depends(get_tree_cache),
+) -> FsNode:
+    """Create a new file or folder."""
+    changes = _IndexChanges()
+    node = await writer.run(lambda db: _create(db, req, changes))
+    tree_cache.bump()
+    changes.apply(_get_index(request))
+
+    logger.info(f"CreateNode: Created {req.type} at {node.path}")
     return node
 
 
+@router.put("/api/fs/node/{node_id}")
+async def update_node(
+    node_id: str,
+    req: FsNodeUpdateRequest,
+    request: Request,
+    writer: Writer = Depends(get_writer),
+    tree_cache: TreeCache = Depends(get_tree_cache),
+) -> FsNode:
+    """Update an existing node."""
+    changes = _IndexChanges()
+    node = await writer.run(lambda db: _update(db, node_id, req, changes))
+    tree_cache.bump()
+    changes.apply(_get_index(request))
+    return node
+
+
+@router.delete("/api/fs/node/{node_id}", status_code=204)
+async def delete_node(
+    node_id: str,
+    request: Request,
+    writer: Writer = Depends(get_writer),
+    tree_cache: TreeCache = Depends(get_tree_cache),
+) -> None:
+    """Soft-delete a node. Sets deleted_at on the node and all descendants."""
+    changes = _IndexChanges()
+    node_path = await writer.run(lambda db: _delete(db, node_id, changes))
+    tree_cache.bump()
+    changes.apply(_get_index(request))
+
+    logger.info(f"DeleteNode: Soft-deleted {node_path}")
+
+
+@router.post("/api/fs/move/{node_id}")
+async def move_node(
+    node_id: str,
+    req: MoveRequest,
+    request: Request,
+    writer: Writer = Depends(get_writer),
+    tree_cache: TreeCache = Depends(get_tree_cache),
+) -> FsNode:
+    """Move or rename a node."""
+    changes = _IndexChanges()
+    node, old_path, count = await writer.run(
+        lambda db: _move(db, node_id, req, changes)
+    )
+    tree_cache.bump()
+    changes.apply(_get_index(request))
+
+    logger.info(f"MoveNode: Moved {old_path} to {node.path} ({count} nodes)")
+    return node
+
+
+async def _batch_target(db: aiosqlite.Connection, op: BatchTarget) -> str:
+    """ID of the live node an operation names by `id` or `path`."""
+    if op.id is not None:
+        return op.id
+    if op.path is None:
+        raise HTTPException(status_code=400, detail="Operation needs an id or a path")
+    async with db.execute(
+        "SELECT id FROM fs_nodes WHERE path = ? AND deleted_at IS NULL", (op.path,)
+    ) as cursor:
+        row = await cursor.fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Node not found")
+    return row["id"]
+
+
+@router.post("/api/fs/batch")
+async def batch(
+    req: BatchRequest,
+    request: Request,
+    writer: Writer = Depends(get_writer),
+    tree_cache: TreeCache = Depends(get_tree_cache),
+) -> BatchResponse:
+    """Apply create, update, move and delete operations in one transaction.
+
+    Operations run in order, so later ones see the effects of earlier ones:
+    a create can use a folder created earlier in the batch as its parent,
+    and update, move and delete can name a node by `path` instead of `id`.
+    If any operation fails, none is applied; the error detail gives the
+    failing operation's `index`.
+    """
+    changes = _IndexChanges()
+
+    async def work(db: aiosqlite.Connection) -> list[BatchResult]:
+        results = []
+        for i, op in enumerate(req.ops):
+            try:
+                if op.op == "create":
+                    node = await _create(db, op, changes)
+                    results.append(BatchResult(op=op.op, id=node.id, node=node))
+                    continue
+                node_id = await _batch_target(db, op)
+                if op.op == "update":
+                    node = await _update(db, node_id, op, changes)
+                elif op.op == "move":
+                    node, _, _ = await _move(db, node_id, op, changes)
+                else:
+                    await _delete(db, node_id, changes)
+                    node = None
+                results.append(BatchResult(op=op.op, id=node_id, node=node))
+            except HTTPException as e:
+                raise HTTPException(
+                    status_code=e.status_code,
+                    detail={"index": i, "op": op.op, "detail": e.detail},
+                )
+        return results
+
+    results = await writer.run(work)
+    if results:
+        tree_cache.bump()
+    changes.apply(_get_index(request))
+
+    logger.info(f"Batch: Applied {len(results)} operations")
+    return BatchResponse(results=results)
+
+
 @router.get("/api/fs/recent")
 async def get_recent_files(
+    response: Response,
     limit: int = Query(default=10, ge=1, le=50),
-    db: aiosqlite.Connection = Depends(get_db),
+    cursor: Optional[str] = None,
+    db: aiosqlite.Connection = Depends(get_read_db),
 ) -> list[FsNode]:
-    """Get recently updated files (without content)."""
+    """Get recently updated files (without content), paged by `cursor`."""
+    after = decode_cursor(cursor, 2)
+    keyset = "AND (updated_at, id) < (?, ?)" if after else ""
     async with db.execute(
         f"""
         SELECT {_TREE_COLS}
         FROM fs_nodes
         WHERE type = 'file' AND updated_at IS NOT NULL AND deleted_at IS NULL
-        ORDER BY updated_at DESC
+        {keyset}
+        ORDER BY updated_at DESC, id DESC
         LIMIT ?
         """,
-        (limit,),
-    ) as cursor:
-        rows = await cursor.fetchall()
+        (*(after or ()), limit + 1),
+    ) as cur:
+        rows = await cur.fetchall()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        set_next_cursor(response, encode_cursor(rows[-1]["updated_at"], rows[-1]["id"]))
 
     nodes = [_row_to_node(row) for row in rows]
     return _enrich_parent_paths(nodes)
 
 
-@router.get("/api/fs/search")
+@router.get("/api/fs/search", response_model=list[SearchResult])
 async def search_files(
     q: str = Query(..., min_length=1),
-    db: aiosqlite.Connection = Depends(get_db),
-) -> list[FsNode]:
-    """Search for files containing the query."""
-    search_pattern = f"%{q}%"
-
-    async with db.execute(
-        f"""
-        SELECT {_FULL_COLS}
-        FROM fs_nodes n
-        LEFT JOIN fs_content c ON c.node_id = n.id
-        WHERE n.type = 'file' AND n.deleted_at IS NULL AND (n.name LIKE ? OR c.body LIKE ?)
-        ORDER BY n.updated_at DESC
-        """,
-        (search_pattern, search_pattern),
-    ) as cursor:
-        rows = await cursor.fetchall()
-
-    nodes = [_row_to_node(row, include_content=True) for row in rows]
-    return _enrich_parent_paths(nodes)
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(
+        default=None, description="Comma-separated subset of result fields"
+    ),
+    db: aiosqlite.Connection = Depends(get_read_db),
+) -> Response:
+    """Full-text search over file names and content, best matches first.
+
+    Supports "quoted phrases" and prefix* terms. Each result carries a
+    highlighted snippet and its BM25 score (lower is better). Results are
+    paged by `limit`/`cursor`; `fields=path,name,snippet` trims each result
+    to those keys and skips loading file bodies.
+    """
+    selected = _parse_fields(fields)
+    after = decode_cursor(cursor, 2)
+    match = search.build_match_query(q)
+    if match is None:
+        return json_response("[]")
+
+    columns = _FULL_COLS if selected is None or "content" in selected else _NODE_COLS
+    # Hits as SearchResult JSON (or the `fields` subset of it), built by SQLite
+    result = {
+        **node_fields(content="content" if columns == _FULL_COLS else "NULL"),
+        "snippet": "snippet",
+        "score": "score",
+    }
+    if selected is not None:
+        result = {key: expr for key, expr in result.items() if key in selected}
+    rows = await search.find(
+        db,
+        match,
+        columns,
+        limit + 1,
+        tuple(after) if after else None,
+        select=f"id, score, {json_object_sql(result)} AS json",
+    )
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["score"], rows[-1]["id"])
+
+    results = json_response(json_array([row["json"] for row in rows]))
+    set_next_cursor(results, next_cursor)
+    return results
+
+
+def _parse_fields(fields: str | None) -> set[str] | None:
+    """Validate a `fields=` list against the SearchResult model."""
+    if not fields:
+        return None
+    selected = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = selected - set(SearchResult.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return selected
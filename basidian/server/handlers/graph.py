@@ -0,0 +1,139 @@
+"""Link graph endpoints — neighborhoods, orphans, unresolved links, rankings.
+
+Answered from the in-memory LinkGraph, which is rebuilt from the metadata
+index (in a worker thread) at most once per index generation; orphan,
+unresolved and ranking results are memoized until the next change.
+"""
+
+from bisect import bisect_right
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from basidian.server.graph import GraphCache, LinkGraph
+
+from ..pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    TOTAL_COUNT_HEADER,
+    decode_cursor,
+    encode_cursor,
+    set_next_cursor,
+)
+from .metadata import _get_index
+
+router = APIRouter()
+
+MAX_DEPTH = 3
+DEFAULT_NEIGHBORHOOD_SIZE = 500
+MAX_NEIGHBORHOOD_SIZE = 5000
+
+
+def _get_graph(request: Request) -> GraphCache:
+    """Get the graph cache from app state, or 503 while the index is building."""
+    _get_index(request)
+    return request.app.state.link_graph
+
+
+def _node(graph: LinkGraph, i: int) -> dict:
+    path = graph.paths[i]
+    return {"id": graph.ids[i], "path": path, "name": path.rsplit("/", 1)[-1]}
+
+
+@router.get("/api/graph/neighborhood/{node_id}")
+async def get_neighborhood(
+    node_id: str,
+    request: Request,
+    depth: int = Query(default=1, ge=1, le=MAX_DEPTH),
+    direction: Literal["both", "out", "in"] = "both",
+    limit: int = Query(
+        default=DEFAULT_NEIGHBORHOOD_SIZE, ge=1, le=MAX_NEIGHBORHOOD_SIZE
+    ),
+) -> dict:
+    """Notes within `depth` links of a note, and the links among them.
+
+    Expansion stops at `limit` notes, flagged by `truncated`.
+    """
+    graph = await _get_graph(request).graph()
+    i = graph.position.get(node_id)
+    if i is None:
+        raise HTTPException(status_code=404, detail="Node not found")
+
+    distance, edges, truncated = graph.neighborhood(i, depth, direction, limit)
+    return {
+        "center": node_id,
+        "nodes": [{**_node(graph, n), "depth": d} for n, d in distance.items()],
+        "edges": [{"source": graph.ids[s], "target": graph.ids[t]} for s, t in edges],
+        "truncated": truncated,
+    }
+
+
+@router.get("/api/graph/orphans")
+async def get_orphans(
+    request: Request,
+    response: Response,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> list[dict]:
+    """Notes with no resolved links in or out, by path, paged by `cursor`."""
+    graph, orphans = await _get_graph(request).orphans()
+    response.headers[TOTAL_COUNT_HEADER] = str(len(orphans))
+
+    after = decode_cursor(cursor, 1)
+    start = 0
+    if after:
+        if not isinstance(after[0], str):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        start = bisect_right(orphans, after[0], key=graph.paths.__getitem__)
+    page = orphans[start : start + limit]
+    if start + limit < len(orphans):
+        set_next_cursor(response, encode_cursor(graph.paths[page[-1]]))
+    return [_node(graph, i) for i in page]
+
+
+@router.get("/api/graph/unresolved")
+async def get_unresolved(
+    request: Request,
+    response: Response,
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> list[dict]:
+    """Link targets that match no note, most-linked first, paged by `cursor`."""
+    graph, unresolved = await _get_graph(request).unresolved()
+    response.headers[TOTAL_COUNT_HEADER] = str(len(unresolved))
+
+    after = decode_cursor(cursor, 2)
+    start = 0
+    if after:
+        if not (isinstance(after[0], int) and isinstance(after[1], str)):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        start = bisect_right(
+            unresolved,
+            (-after[0], after[1]),
+            key=lambda entry: (-len(entry[1]), entry[0]),
+        )
+    page = unresolved[start : start + limit]
+    if start + limit < len(unresolved):
+        target, sources = page[-1]
+        set_next_cursor(response, encode_cursor(len(sources), target))
+    return [
+        {
+            "target": target,
+            "count": len(sources),
+            "sources": [graph.ids[s] for s in sources],
+        }
+        for target, sources in page
+    ]
+
+
+@router.get("/api/graph/rank")
+async def get_rank(
+    request: Request,
+    metric: Literal["degree", "in_degree", "out_degree", "pagerank"] = "degree",
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+) -> list[dict]:
+    """The `limit` most connected notes by degree or PageRank centrality."""
+    graph, ranked = await _get_graph(request).rank(metric)
+    return [
+        {**_node(graph, i), "score": round(score, 8)} for i, score in ranked[:limit]
+    ]
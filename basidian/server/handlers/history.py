@@ -1,19 +1,35 @@
 """File version history endpoints."""
 
-import difflib
-from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 import aiosqlite
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from loguru import logger
 
+from basidian.hashing import EMPTY_HASH, content_hash
 from basidian.models import FileVersion, FileVersionSummary
-
-from ..db import generate_id, get_db, utcnow_iso
+from basidian.server import search, version_store
+
+from ..content import write_content
+from ..db import generate_id, get_read_db, get_writer, utcnow_iso
+from ..metadata import MetadataIndex
+from ..pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    set_next_cursor,
+)
+from ..tree_cache import TreeCache, get_tree_cache
+from ..writer import Writer
 
 router = APIRouter()
 
 
+def _get_index(request: Request) -> MetadataIndex:
+    return request.app.state.metadata_index
+
+
 async def _get_node_content(db: aiosqlite.Connection, node_id: str) -> str | None:
     """Get current content of a node from fs_content, or None if not found."""
     async with db.execute(
@@ -23,95 +39,109 @@ async def _get_node_content(db: aiosqlite.Connection, node_id: str) -> str | Non
     return row["body"] if row else None
 
 
-async def _get_latest_version_body(
-    db: aiosqlite.Connection, node_id: str
-) -> str | None:
-    """Get body of the most recent version, or None if no versions exist."""
-    async with db.execute(
-        "SELECT body FROM fs_versions WHERE node_id = ? ORDER BY created_at DESC LIMIT 1",
-        (node_id,),
-    ) as cursor:
-        row = await cursor.fetchone()
-    return row["body"] if row else None
-
-
 async def create_version_if_changed(
-    db: aiosqlite.Connection, node_id: str, body: str, timestamp: str | None = None
+    db: aiosqlite.Connection,
+    node_id: str,
+    body: str,
+    timestamp: str | None = None,
+    body_hash: str | None = None,
 ) -> bool:
     """Create a version snapshot if body differs from the latest version.
 
+    Pass `body_hash` when the caller already knows it (e.g. from fs_content).
     Returns True if a version was created.
     """
-    latest = await _get_latest_version_body(db, node_id)
-    if latest == body:
+    latest = await version_store.latest_hash(db, node_id)
+    if latest == (body_hash or content_hash(body)):
         return False
 
-    version_id = generate_id()
     now = timestamp or utcnow_iso()
-    await db.execute(
-        "INSERT INTO fs_versions (id, node_id, body, created_at) VALUES (?, ?, ?, ?)",
-        (version_id, node_id, body, now),
-    )
+    await version_store.insert_version(db, generate_id(), node_id, body, now)
     return True
 
 
-def _compute_diff_summary(old_body: str, new_body: str) -> tuple[int, int]:
-    """Compute lines added/removed between two bodies."""
-    old_lines = old_body.splitlines(keepends=True)
-    new_lines = new_body.splitlines(keepends=True)
-    added = 0
-    removed = 0
-    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(
-        None, old_lines, new_lines
-    ).get_opcodes():
-        if tag == "replace":
-            removed += i2 - i1
-            added += j2 - j1
-        elif tag == "delete":
-            removed += i2 - i1
-        elif tag == "insert":
-            added += j2 - j1
-    return added, removed
+async def _head_diff(
+    db: aiosqlite.Connection, node_id: str, head: aiosqlite.Row
+) -> tuple[int, int]:
+    """Lines added/removed from the newest version to the current content."""
+    async with db.execute(
+        "SELECT body, content_hash FROM fs_content WHERE node_id = ?", (node_id,)
+    ) as cursor:
+        current = await cursor.fetchone()
+    current_hash = current["content_hash"] if current else EMPTY_HASH
+    if current_hash == head["content_hash"]:
+        return 0, 0
+    version = await version_store.read_version(db, node_id, head["id"])
+    head_body = version[0] if version else ""
+    return version_store.diff_stats(head_body, current["body"] if current else "")
 
 
 @router.get("/api/fs/node/{node_id}/versions")
 async def list_versions(
     node_id: str,
-    db: aiosqlite.Connection = Depends(get_db),
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: aiosqlite.Connection = Depends(get_read_db),
 ) -> list[FileVersionSummary]:
-    """List all versions for a file, most recent first."""
+    """List versions for a file, most recent first.
+
+    Each entry's lines added/removed compare it with the next newer version
+    (or the current content). They come from the stats stored on that newer
+    version at insert time, so only the head entry may need a diff.
+    """
+    # Cursor: (created_at, id) of the last entry plus that entry's stored
+    # stats, which are the displayed stats of the next page's first entry
+    after = decode_cursor(cursor, 4)
+    keyset = "AND (created_at, id) < (?, ?)" if after else ""
     async with db.execute(
-        "SELECT id, node_id, body, created_at FROM fs_versions WHERE node_id = ? ORDER BY created_at DESC",
-        (node_id,),
-    ) as cursor:
-        rows = list(await cursor.fetchall())
+        f"""
+        SELECT id, created_at, content_hash, size, lines_added, lines_removed
+        FROM fs_versions
+        WHERE node_id = ? {keyset}
+        ORDER BY created_at DESC, id DESC
+        LIMIT ?
+        """,
+        (node_id, *(after[:2] if after else ()), limit + 1),
+    ) as cur:
+        rows = list(await cur.fetchall())
 
     if not rows:
         return []
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
-    # Get current content to diff against the most recent version
-    current_body = await _get_node_content(db, node_id)
+    if after is None:
+        newer_stats = await _head_diff(db, node_id, rows[0])
+    else:
+        newer_stats = (after[2], after[3])
 
     summaries: list[FileVersionSummary] = []
-    for i, row in enumerate(rows):
-        # Compare each version against the one before it (newer content)
-        if i == 0:
-            # Most recent version: diff against current file content
-            newer = current_body or ""
-        else:
-            newer = rows[i - 1]["body"]
-
-        added, removed = _compute_diff_summary(row["body"], newer)
+    for row in rows:
+        added, removed = newer_stats
         summaries.append(
             FileVersionSummary(
                 id=row["id"],
-                node_id=row["node_id"],
+                node_id=node_id,
                 created_at=row["created_at"],
                 lines_added=added,
                 lines_removed=removed,
+                size=row["size"],
             )
         )
-
+        newer_stats = (row["lines_added"], row["lines_removed"])
+
+    if has_more:
+        last = rows[-1]
+        set_next_cursor(
+            response,
+            encode_cursor(
+                last["created_at"],
+                last["id"],
+                last["lines_added"],
+                last["lines_removed"],
+            ),
+        )
     return summaries
 
 
@@ -119,43 +149,51 @@ async def list_versions(
 async def get_version(
     node_id: str,
     version_id: str,
-    db: aiosqlite.Connection = Depends(get_db),
+    db: aiosqlite.Connection = Depends(get_read_db),
 ) -> FileVersion:
     """Get a specific version's full content."""
-    async with db.execute(
-        "SELECT id, node_id, body, created_at FROM fs_versions WHERE id = ? AND node_id = ?",
-        (version_id, node_id),
-    ) as cursor:
-        row = await cursor.fetchone()
-
-    if row is None:
+    version = await version_store.read_version(db, node_id, version_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Version not found")
 
+    body, created_at = version
     return FileVersion(
-        id=row["id"],
-        node_id=row["node_id"],
-        body=row["body"],
-        created_at=row["created_at"],
+        id=version_id,
+        node_id=node_id,
+        body=body,
+        created_at=created_at,
     )
 
 
 @router.post("/api/fs/node/{node_id}/snapshot", status_code=201)
 async def snapshot(
     node_id: str,
-    db: aiosqlite.Connection = Depends(get_db),
+    writer: Writer = Depends(get_writer),
 ) -> dict:
     """Create a version snapshot of the current file content.
 
     Called by the frontend on file switch and app close.
     Only creates a version if content has changed since the last version.
     """
-    body = await _get_node_content(db, node_id)
-    if body is None:
-        raise HTTPException(status_code=404, detail="Node not found")
 
-    created = await create_version_if_changed(db, node_id, body)
+    async def work(db: aiosqlite.Connection) -> bool:
+        async with db.execute(
+            "SELECT content_hash FROM fs_content WHERE node_id = ?", (node_id,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Node not found")
+        # Compare hashes first so an unchanged file never loads its body
+        if row["content_hash"] == await version_store.latest_hash(db, node_id):
+            return False
+        body = await _get_node_content(db, node_id)
+        await version_store.insert_version(
+            db, generate_id(), node_id, body, utcnow_iso()
+        )
+        return True
+
+    created = await writer.run(work)
     if created:
-        await db.commit()
         logger.info(f"Snapshot: Created version for node {node_id}")
 
     return {"created": created}
@@ -165,7 +203,9 @@ async def snapshot(
 async def restore_version(
     node_id: str,
     version_id: str,
-    db: aiosqlite.Connection = Depends(get_db),
+    request: Request,
+    writer: Writer = Depends(get_writer),
+    tree_cache: TreeCache = Depends(get_tree_cache),
 ) -> FileVersion:
     """Restore a file to a previous version.
 
@@ -173,122 +213,47 @@ async def restore_version(
     2. Replaces file content with the version's body
     3. Returns the restored version
     """
-    # Get the version to restore
-    async with db.execute(
-        "SELECT body FROM fs_versions WHERE id = ? AND node_id = ?",
-        (version_id, node_id),
-    ) as cursor:
-        version_row = await cursor.fetchone()
-
-    if version_row is None:
-        raise HTTPException(status_code=404, detail="Version not found")
-
-    # Snapshot current content before restoring
-    current_body = await _get_node_content(db, node_id)
-    if current_body is None:
-        raise HTTPException(status_code=404, detail="Node not found")
-
-    await create_version_if_changed(db, node_id, current_body)
-
-    # Update the file content
-    now = utcnow_iso()
-    await db.execute(
-        "UPDATE fs_content SET body = ?, updated_at = ? WHERE node_id = ?",
-        (version_row["body"], now, node_id),
-    )
-
-    # Also update fs_nodes.updated_at to keep recent files in sync
-    await db.execute(
-        "UPDATE fs_nodes SET updated_at = ? WHERE id = ?",
-        (now, node_id),
-    )
-
-    # Create a version of the restored content too
-    restore_version_id = generate_id()
-    await db.execute(
-        "INSERT INTO fs_versions (id, node_id, body, created_at) VALUES (?, ?, ?, ?)",
-        (restore_version_id, node_id, version_row["body"], now),
-    )
 
-    await db.commit()
-    logger.info(f"Restore: Restored node {node_id} to version {version_id}")
+    async def work(db: aiosqlite.Connection) -> FileVersion:
+        # Get the version to restore
+        version = await version_store.read_version(db, node_id, version_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="Version not found")
+        restored_body = version[0]
 
-    return FileVersion(
-        id=restore_version_id,
-        node_id=node_id,
-        body=version_row["body"],
-        created_at=now,
-    )
+        # Snapshot current content before restoring
+        current_body = await _get_node_content(db, node_id)
+        if current_body is None:
+            raise HTTPException(status_code=404, detail="Node not found")
 
+        await create_version_if_changed(db, node_id, current_body)
 
-async def cleanup_versions(db: aiosqlite.Connection) -> int:
-    """Clean up old versions per retention policy.
+        # Update the file content
+        now = utcnow_iso()
+        await write_content(db, node_id, restored_body, now)
 
-    - Keep all versions from the last 7 days
-    - Keep one per day for 7-30 days
-    - Keep one per week for older than 30 days
-    - Delete the rest
+        # Also update fs_nodes.updated_at to keep recent files in sync
+        await db.execute(
+            "UPDATE fs_nodes SET updated_at = ? WHERE id = ?",
+            (now, node_id),
+        )
+        await search.reindex(db, [node_id])
 
-    Returns the number of deleted versions.
-    """
-    now = datetime.now(timezone.utc)
-    seven_days_ago = (now - timedelta(days=7)).replace(tzinfo=None).isoformat()
-    thirty_days_ago = (now - timedelta(days=30)).replace(tzinfo=None).isoformat()
+        # Create a version of the restored content too
+        restore_version_id = generate_id()
+        await version_store.insert_version(
+            db, restore_version_id, node_id, restored_body, now
+        )
 
-    # Get all versions older than 7 days, grouped by node
-    async with db.execute(
-        "SELECT id, node_id, created_at FROM fs_versions WHERE created_at < ? ORDER BY node_id, created_at DESC",
-        (seven_days_ago,),
-    ) as cursor:
-        old_versions = await cursor.fetchall()
-
-    if not old_versions:
-        return 0
-
-    ids_to_delete: list[str] = []
-
-    # Group by node_id
-    by_node: dict[str, list] = {}
-    for row in old_versions:
-        by_node.setdefault(row["node_id"], []).append(row)
-
-    for versions in by_node.values():
-        # Split into 7-30 day range and 30+ day range
-        mid_range = []  # 7-30 days
-        old_range = []  # 30+ days
-
-        for v in versions:
-            if v["created_at"] >= thirty_days_ago:
-                mid_range.append(v)
-            else:
-                old_range.append(v)
-
-        # Mid range: keep one per day
-        seen_days: set[str] = set()
-        for v in mid_range:
-            day = v["created_at"][:10]  # YYYY-MM-DD
-            if day in seen_days:
-                ids_to_delete.append(v["id"])
-            else:
-                seen_days.add(day)
-
-        # Old range: keep one per week (ISO week)
-        seen_weeks: set[str] = set()
-        for v in old_range:
-            dt = datetime.fromisoformat(v["created_at"])
-            week = f"{dt.isocalendar()[0]}-W{dt.isocalendar()[1]:02d}"
-            if week in seen_weeks:
-                ids_to_delete.append(v["id"])
-            else:
-                seen_weeks.add(week)
-
-    if ids_to_delete:
-        placeholders = ",".join("?" * len(ids_to_delete))
-        await db.execute(
-            f"DELETE FROM fs_versions WHERE id IN ({placeholders})",
-            ids_to_delete,
+        return FileVersion(
+            id=restore_version_id,
+            node_id=node_id,
+            body=restored_body,
+            created_at=now,
         )
-        await db.commit()
 
-    logger.info(f"Cleanup: Deleted {len(ids_to_delete)} old versions")
-    return len(ids_to_delete)
+    restored = await writer.run(work)
+    tree_cache.bump()
+    _get_index(request).on_write(node_id, restored.created_at)
+    logger.info(f"Restore: Restored node {node_id} to version {version_id}")
+    return restored
@@ -1,22 +1,53 @@
 """Metadata API endpoints — tags, links, backlinks, daily dates.
 
-All data served from the in-memory MetadataIndex, not from SQLite.
+All data served from the in-memory MetadataIndex, not from SQLite (list
+endpoints read only the page of nodes they return). Until the startup
+build finishes these endpoints answer 503; /health reports its progress.
 """
 
+import json
+from collections.abc import Collection
+from typing import Literal, Optional
+
 import aiosqlite
-from fastapi import APIRouter, Depends, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
 from basidian.models import FsNode
 from basidian.server.metadata import MetadataIndex
-
-from ..db import get_db
+from basidian.server.properties import PropertyQueryError, parse_condition
+from basidian.server.tag_query import TagQueryError, parse_tag_query
+
+from ..db import get_read_db
+from ..pagination import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    TOTAL_COUNT_HEADER,
+    decode_cursor,
+    encode_cursor,
+    set_next_cursor,
+)
+from ..row_json import json_array, json_object_sql, json_response, node_fields
 
 router = APIRouter()
 
 
+# Listed nodes as FsNode JSON objects, content left out
+_NODE_JSON = json_object_sql(node_fields())
+
+# Seconds a client should wait before retrying while the index builds
+_RETRY_AFTER_SECONDS = 1
+
+
 def _get_index(request: Request) -> MetadataIndex:
-    """Get the metadata index from app state."""
-    return request.app.state.metadata_index
+    """Get the metadata index from app state, or 503 while it is building."""
+    index: MetadataIndex = request.app.state.metadata_index
+    if not index.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Metadata index is still building",
+            headers={"Retry-After": str(_RETRY_AFTER_SECONDS)},
+        )
+    return index
 
 
 @router.get("/api/fs/tags")
@@ -28,68 +59,141 @@ async def list_tags(
     return index.get_tags_with_counts()
 
 
-@router.get("/api/fs/tags/{tag}")
+@router.get("/api/fs/tags/{tag}", response_model=list[FsNode])
 async def get_nodes_by_tag(
     tag: str,
     request: Request,
-    db: aiosqlite.Connection = Depends(get_db),
-) -> list[FsNode]:
-    """Get nodes with a given tag (without content)."""
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: aiosqlite.Connection = Depends(get_read_db),
+) -> Response:
+    """Get nodes with a given tag (without content), by name, paged by `cursor`."""
     index = _get_index(request)
     node_ids = index.get_nodes_for_tag(tag)
-    if not node_ids:
-        return []
-
-    placeholders = ",".join("?" * len(node_ids))
-    async with db.execute(
-        f"""
-        SELECT id, parent_id, type, name, path, sort_order, created_at, updated_at
-        FROM fs_nodes
-        WHERE id IN ({placeholders})
-        ORDER BY name ASC
-        """,
-        list(node_ids),
-    ) as cursor:
-        rows = await cursor.fetchall()
+    return await _page_nodes(db, index, node_ids, "name", "asc", limit, cursor)
 
-    return [
-        FsNode(
-            id=row["id"],
-            parent_id=row["parent_id"],
-            parent_path=_compute_parent_path(row["path"]),
-            type=row["type"],
-            name=row["name"],
-            path=row["path"],
-            sort_order=row["sort_order"],
-            created_at=row["created_at"],
-            updated_at=row["updated_at"],
+
+@router.get("/api/fs/query/tags", response_model=list[FsNode])
+async def query_tags(
+    request: Request,
+    q: str = Query(
+        ..., description="e.g. project AND (urgent OR blocked) NOT archived"
+    ),
+    sort: Literal["name", "path", "created_at", "updated_at"] = "name",
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: aiosqlite.Connection = Depends(get_read_db),
+) -> Response:
+    """Get nodes matching a boolean tag expression (AND, OR, NOT, parentheses).
+
+    The expression is evaluated in memory; the total number of matches is
+    returned in the X-Total-Count header and pages follow `cursor`.
+    """
+    index = _get_index(request)
+    try:
+        expr = parse_tag_query(q)
+    except TagQueryError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid tag query: {e}")
+    node_ids = index.query_tags(expr)
+    return await _page_nodes(
+        db, index, node_ids, sort, order, limit, cursor, total=len(node_ids)
+    )
+
+
+@router.get("/api/fs/query/properties", response_model=list[FsNode])
+async def query_properties(
+    request: Request,
+    where: list[str] = Query(..., description="e.g. status=done, due<2026-11-01"),
+    sort: Literal["name", "path", "created_at", "updated_at"] = "name",
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = Query(default=DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: aiosqlite.Connection = Depends(get_read_db),
+) -> Response:
+    """Get nodes whose frontmatter satisfies every `where` condition.
+
+    Conditions are `key<op>value` with op one of = != < <= > >=; ranges
+    compare numbers or dates. Answered from the in-memory property indexes;
+    the total number of matches is returned in the X-Total-Count header.
+    """
+    index = _get_index(request)
+    try:
+        conditions = [parse_condition(condition) for condition in where]
+        node_ids = index.query_properties(conditions)
+    except PropertyQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await _page_nodes(
+        db, index, node_ids, sort, order, limit, cursor, total=len(node_ids)
+    )
+
+
+async def _page_nodes(
+    db: aiosqlite.Connection,
+    index: MetadataIndex,
+    node_ids: Collection[str],
+    sort: str,
+    order: str,
+    limit: int,
+    cursor: str | None,
+    total: int | None = None,
+) -> Response:
+    """One page of `node_ids` (without content), ordered by `sort` then ID.
+
+    The page is picked from the index's sort orders (see node_order) and only
+    its rows are read, as FsNode JSON built by SQLite. The cursor names the
+    sort and order it continues; `total` goes in the X-Total-Count header.
+    """
+    after = decode_cursor(cursor, 4)
+    if after is not None:
+        if after[:2] != [sort, order] or not all(
+            isinstance(part, str) for part in after[2:]
+        ):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = (after[2], after[3])
+
+    response = json_response("[]")
+    if node_ids:
+        page = index.order.page(node_ids, sort, order == "desc", after, limit + 1)
+        async with db.execute(
+            f"""
+            SELECT id, {_NODE_JSON} AS json
+            FROM fs_nodes
+            WHERE id IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps(page[:limit]),),
+        ) as cur:
+            rows = {row["id"]: row["json"] for row in await cur.fetchall()}
+
+        response = json_response(
+            json_array([rows[node_id] for node_id in page[:limit] if node_id in rows])
         )
-        for row in rows
-    ]
+        if len(page) > limit:
+            last = page[limit - 1]
+            set_next_cursor(
+                response,
+                encode_cursor(sort, order, index.order.key(sort, last), last),
+            )
+
+    if total is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
+    return response
 
 
 @router.get("/api/fs/backlinks")
 async def get_backlinks(
     request: Request,
     path: str = Query(...),
-    db: aiosqlite.Connection = Depends(get_db),
 ) -> list[dict]:
     """Get nodes that link to a given path."""
     index = _get_index(request)
-    source_ids = index.get_backlinks(path)
-    if not source_ids:
-        return []
-
-    placeholders = ",".join("?" * len(source_ids))
-    async with db.execute(
-        f"SELECT id, name, path FROM fs_nodes WHERE id IN ({placeholders})",
-        list(source_ids),
-    ) as cursor:
-        rows = await cursor.fetchall()
-
     return [
-        {"source_id": row["id"], "source_name": row["name"], "source_path": row["path"]}
-        for row in rows
+        {
+            "source_id": source_id,
+            "source_name": _name_of(index.paths[source_id]),
+            "source_path": index.paths[source_id],
+        }
+        for source_id in sorted(index.get_backlinks(path))
     ]
 
 
@@ -97,35 +201,19 @@ async def get_backlinks(
 async def get_links(
     node_id: str,
     request: Request,
-    db: aiosqlite.Connection = Depends(get_db),
 ) -> list[dict]:
-    """Get outgoing links from a node."""
+    """Get outgoing links from a node, resolved to the notes they point at."""
     index = _get_index(request)
-    target_paths = index.get_links(node_id)
-    if not target_paths:
-        return []
-
     results = []
-    for target_path in target_paths:
-        # Try to resolve the target path to a node
-        # Check both with and without leading slash
-        resolved = None
-        for path_variant in [target_path, f"/{target_path}", target_path.lstrip("/")]:
-            async with db.execute(
-                "SELECT id, name FROM fs_nodes WHERE path = ?", (path_variant,)
-            ) as cursor:
-                row = await cursor.fetchone()
-                if row:
-                    resolved = {"target_id": row["id"], "target_name": row["name"]}
-                    break
-
+    for target_path in sorted(index.get_links(node_id)):
+        target_id = index.resolve_link(target_path)
         results.append(
             {
                 "target_path": target_path,
-                **(resolved or {"target_id": None, "target_name": None}),
+                "target_id": target_id,
+                "target_name": _name_of(index.paths[target_id]) if target_id else None,
             }
         )
-
     return results
 
 
@@ -138,8 +226,5 @@ async def get_daily_dates(
     return index.daily_dates
 
 
-def _compute_parent_path(path: str) -> str:
-    """Derive parent_path from the node's path."""
-    if "/" not in path.lstrip("/"):
-        return "/"
-    return path.rsplit("/", 1)[0]
+def _name_of(path: str) -> str:
+    return path.rsplit("/", 1)[-1]
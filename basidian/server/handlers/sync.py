@@ -1,15 +1,21 @@
 """Sync API endpoints for client-server data synchronization."""
 
+import json
 from typing import Optional
 
 import aiosqlite
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Request, Response
 from loguru import logger
 from pydantic import BaseModel
 
+from basidian.server import search
 from basidian.server.metadata import MetadataIndex
 
-from ..db import get_db, utcnow_iso
+from ..content import write_content
+from ..db import get_read_db, get_writer, utcnow_iso
+from ..row_json import json_array, json_object_sql, json_response
+from ..tree_cache import TreeCache, get_tree_cache
+from ..writer import Writer
 
 router = APIRouter()
 
@@ -55,11 +61,33 @@ class SyncPushResponse(BaseModel):
     server_time: str
 
 
-@router.get("/api/sync/changes")
+# Rows as SyncNodeRow / SyncContentRow JSON objects, built by SQLite
+_NODE_JSON = json_object_sql(
+    {
+        column: column
+        for column in (
+            "id",
+            "parent_id",
+            "type",
+            "name",
+            "path",
+            "sort_order",
+            "created_at",
+            "updated_at",
+            "deleted_at",
+        )
+    }
+)
+_CONTENT_JSON = json_object_sql(
+    {column: column for column in ("node_id", "body", "updated_at")}
+)
+
+
+@router.get("/api/sync/changes", response_model=SyncChangesResponse)
 async def get_changes(
     since: Optional[str] = None,
-    db: aiosqlite.Connection = Depends(get_db),
-) -> SyncChangesResponse:
+    db: aiosqlite.Connection = Depends(get_read_db),
+) -> Response:
     """Return all rows changed since the given timestamp.
 
     If `since` is omitted, returns everything (full sync).
@@ -70,9 +98,8 @@ async def get_changes(
     if since:
         logger.info(f"Sync pull: changes since {since}")
         async with db.execute(
-            """
-            SELECT id, parent_id, type, name, path, sort_order,
-                   created_at, updated_at, deleted_at
+            f"""
+            SELECT {_NODE_JSON}
             FROM fs_nodes
             WHERE updated_at > ? OR (deleted_at IS NOT NULL AND deleted_at > ?)
             """,
@@ -81,52 +108,24 @@ async def get_changes(
             node_rows = await cursor.fetchall()
 
         async with db.execute(
-            "SELECT node_id, body, updated_at FROM fs_content WHERE updated_at > ?",
+            f"SELECT {_CONTENT_JSON} FROM fs_content WHERE updated_at > ?",
             (since,),
         ) as cursor:
             content_rows = await cursor.fetchall()
     else:
         logger.info("Sync pull: full sync (no since parameter)")
-        async with db.execute(
-            """
-            SELECT id, parent_id, type, name, path, sort_order,
-                   created_at, updated_at, deleted_at
-            FROM fs_nodes
-            """
-        ) as cursor:
+        async with db.execute(f"SELECT {_NODE_JSON} FROM fs_nodes") as cursor:
             node_rows = await cursor.fetchall()
 
-        async with db.execute(
-            "SELECT node_id, body, updated_at FROM fs_content"
-        ) as cursor:
+        async with db.execute(f"SELECT {_CONTENT_JSON} FROM fs_content") as cursor:
             content_rows = await cursor.fetchall()
 
-    nodes = [
-        SyncNodeRow(
-            id=r["id"],
-            parent_id=r["parent_id"],
-            type=r["type"],
-            name=r["name"],
-            path=r["path"],
-            sort_order=r["sort_order"],
-            created_at=r["created_at"],
-            updated_at=r["updated_at"],
-            deleted_at=r["deleted_at"],
-        )
-        for r in node_rows
-    ]
-
-    content = [
-        SyncContentRow(
-            node_id=r["node_id"],
-            body=r["body"],
-            updated_at=r["updated_at"],
-        )
-        for r in content_rows
-    ]
-
-    logger.info(f"Sync pull: {len(nodes)} nodes, {len(content)} content rows")
-    return SyncChangesResponse(nodes=nodes, content=content, server_time=server_time)
+    logger.info(f"Sync pull: {len(node_rows)} nodes, {len(content_rows)} content rows")
+    nodes = json_array([row[0] for row in node_rows])
+    content = json_array([row[0] for row in content_rows])
+    return json_response(
+        f'{{"nodes":{nodes},"content":{content},"server_time":{json.dumps(server_time)}}}'
+    )
 
 
 def _get_index(request: Request) -> MetadataIndex:
@@ -137,119 +136,187 @@ def _get_index(request: Request) -> MetadataIndex:
 async def push_changes(
     req: SyncPushRequest,
     request: Request,
-    db: aiosqlite.Connection = Depends(get_db),
+    writer: Writer = Depends(get_writer),
+    tree_cache: TreeCache = Depends(get_tree_cache),
 ) -> SyncPushResponse:
     """Accept changed rows from a client. Last-write-wins by updated_at."""
     server_time = utcnow_iso()
-    results: list[SyncPushResult] = []
-    index = _get_index(request)
 
-    for node in req.nodes:
-        # Check if this node exists on the server
-        async with db.execute(
-            "SELECT updated_at, deleted_at FROM fs_nodes WHERE id = ?", (node.id,)
-        ) as cursor:
-            existing = await cursor.fetchone()
+    async def work(
+        db: aiosqlite.Connection,
+    ) -> tuple[
+        list[SyncPushResult],
+        list[str],
+        list[tuple[str, str, str, str]],
+        list[tuple[str, str, str, str, str]],
+        list[tuple[str, str, str, str]],
+    ]:
+        results: list[SyncPushResult] = []
+        removed_ids: list[str] = []
+        # (id, old path, new path, name) of live nodes the client moved
+        moved: list[tuple[str, str, str, str]] = []
+        # (id, updated_at, created_at, name) of live nodes whose rows were written
+        written: list[tuple[str, str, str, str]] = []
+        # (content row, hash of its body) for bodies that were written
+        reindexed: list[tuple[SyncContentRow, str]] = []
+
+        for node in req.nodes:
+            # Check if this node exists on the server
+            async with db.execute(
+                "SELECT updated_at, deleted_at, path FROM fs_nodes WHERE id = ?",
+                (node.id,),
+            ) as cursor:
+                existing = await cursor.fetchone()
+
+            if existing is None:
+                # New node — insert
+                await db.execute(
+                    """
+                    INSERT INTO fs_nodes
+                        (id, parent_id, type, name, path, sort_order, created_at, updated_at, deleted_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        node.id,
+                        node.parent_id,
+                        node.type,
+                        node.name,
+                        node.path,
+                        node.sort_order,
+                        node.created_at,
+                        node.updated_at,
+                        node.deleted_at,
+                    ),
+                )
+                results.append(SyncPushResult(id=node.id, accepted=True))
+                if not node.deleted_at:
+                    written.append(
+                        (node.id, node.updated_at, node.created_at, node.name)
+                    )
+            elif node.updated_at > existing["updated_at"]:
+                # Client is newer — update
+                await db.execute(
+                    """
+                    UPDATE fs_nodes
+                    SET parent_id = ?, type = ?, name = ?, path = ?, sort_order = ?,
+                        created_at = ?, updated_at = ?, deleted_at = ?
+                    WHERE id = ?
+                    """,
+                    (
+                        node.parent_id,
+                        node.type,
+                        node.name,
+                        node.path,
+                        node.sort_order,
+                        node.created_at,
+                        node.updated_at,
+                        node.deleted_at,
+                        node.id,
+                    ),
+                )
+                results.append(SyncPushResult(id=node.id, accepted=True))
+
+                if node.deleted_at:
+                    removed_ids.append(node.id)
+                else:
+                    written.append(
+                        (node.id, node.updated_at, node.created_at, node.name)
+                    )
+                    if node.path != existing["path"]:
+                        moved.append((node.id, existing["path"], node.path, node.name))
+            else:
+                # Server is newer — reject
+                results.append(
+                    SyncPushResult(
+                        id=node.id,
+                        accepted=False,
+                        reason="newer_on_server",
+                        server_updated_at=existing["updated_at"],
+                    )
+                )
 
-        if existing is None:
-            # New node — insert
-            await db.execute(
-                """
-                INSERT INTO fs_nodes
-                    (id, parent_id, type, name, path, sort_order, created_at, updated_at, deleted_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    node.id,
-                    node.parent_id,
-                    node.type,
-                    node.name,
-                    node.path,
-                    node.sort_order,
-                    node.created_at,
-                    node.updated_at,
-                    node.deleted_at,
-                ),
-            )
-            results.append(SyncPushResult(id=node.id, accepted=True))
-        elif node.updated_at > existing["updated_at"]:
-            # Client is newer — update
-            await db.execute(
-                """
-                UPDATE fs_nodes
-                SET parent_id = ?, type = ?, name = ?, path = ?, sort_order = ?,
-                    created_at = ?, updated_at = ?, deleted_at = ?
-                WHERE id = ?
-                """,
-                (
-                    node.parent_id,
-                    node.type,
-                    node.name,
-                    node.path,
-                    node.sort_order,
-                    node.created_at,
-                    node.updated_at,
-                    node.deleted_at,
-                    node.id,
-                ),
-            )
-            results.append(SyncPushResult(id=node.id, accepted=True))
-
-            # Update metadata index
-            if node.deleted_at:
-                index.remove_node(node.id)
-        else:
-            # Server is newer — reject
-            results.append(
-                SyncPushResult(
-                    id=node.id,
-                    accepted=False,
-                    reason="newer_on_server",
-                    server_updated_at=existing["updated_at"],
+        for content in req.content:
+            async with db.execute(
+                "SELECT updated_at FROM fs_content WHERE node_id = ?",
+                (content.node_id,),
+            ) as cursor:
+                existing = await cursor.fetchone()
+
+            if existing is None:
+                # New content row — insert
+                digest = await write_content(
+                    db, content.node_id, content.body, content.updated_at
+                )
+                results.append(SyncPushResult(id=content.node_id, accepted=True))
+                reindexed.append((content, digest))
+            elif content.updated_at > existing["updated_at"]:
+                # Client is newer — update
+                digest = await write_content(
+                    db, content.node_id, content.body, content.updated_at
+                )
+                results.append(SyncPushResult(id=content.node_id, accepted=True))
+                reindexed.append((content, digest))
+            else:
+                results.append(
+                    SyncPushResult(
+                        id=content.node_id,
+                        accepted=False,
+                        reason="newer_on_server",
+                        server_updated_at=existing["updated_at"],
+                    )
                 )
-            )
 
-    for content in req.content:
-        async with db.execute(
-            "SELECT updated_at FROM fs_content WHERE node_id = ?", (content.node_id,)
-        ) as cursor:
-            existing = await cursor.fetchone()
-
-        if existing is None:
-            # New content row — insert
-            await db.execute(
-                "INSERT INTO fs_content (node_id, body, updated_at) VALUES (?, ?, ?)",
-                (content.node_id, content.body, content.updated_at),
-            )
-            results.append(SyncPushResult(id=content.node_id, accepted=True))
-        elif content.updated_at > existing["updated_at"]:
-            # Client is newer — update
-            await db.execute(
-                "UPDATE fs_content SET body = ?, updated_at = ? WHERE node_id = ?",
-                (content.body, content.updated_at, content.node_id),
-            )
-            results.append(SyncPushResult(id=content.node_id, accepted=True))
-
-            # Update metadata index
+        await search.reindex(db, [r.id for r in results if r.accepted])
+
+        # Resolve names and paths for the metadata index while still in the unit
+        index_updates: list[tuple[str, str, str, str, str]] = []
+        for content, digest in reindexed:
             async with db.execute(
-                "SELECT name, path FROM fs_nodes WHERE id = ?", (content.node_id,)
+                """
+                SELECT name, path, created_at, updated_at
+                FROM fs_nodes WHERE id = ? AND deleted_at IS NULL
+                """,
+                (content.node_id,),
             ) as cursor:
                 node_info = await cursor.fetchone()
             if node_info:
-                index.update_node(
-                    content.node_id, node_info["name"], node_info["path"], content.body
+                index_updates.append(
+                    (
+                        content.node_id,
+                        node_info["name"],
+                        node_info["path"],
+                        content.body,
+                        digest,
+                    )
                 )
-        else:
-            results.append(
-                SyncPushResult(
-                    id=content.node_id,
-                    accepted=False,
-                    reason="newer_on_server",
-                    server_updated_at=existing["updated_at"],
+                written.append(
+                    (
+                        content.node_id,
+                        node_info["updated_at"],
+                        node_info["created_at"],
+                        node_info["name"],
+                    )
                 )
-            )
 
-    await db.commit()
+        return results, removed_ids, moved, index_updates, written
+
+    results, removed_ids, moved, index_updates, written = await writer.run(work)
+    # Node rows are answered first, one result each; content rows leave the tree alone
+    if any(result.accepted for result in results[: len(req.nodes)]):
+        tree_cache.bump()
+
+    # Update metadata index
+    index = _get_index(request)
+    for node_id in removed_ids:
+        index.remove_node(node_id)
+    for node_id, old_path, new_path, name in moved:
+        index.on_move(node_id, old_path, new_path, name)
+    # Bodies re-pushed unchanged are skipped by the index
+    for node_id, name, path, body, digest in index_updates:
+        index.update_node(node_id, name, path, body, digest)
+    # Row fields last: files new to the index have been added by now
+    for node_id, updated_at, created_at, name in written:
+        index.on_write(node_id, updated_at, created_at, name)
 
     accepted = sum(1 for r in results if r.accepted)
     rejected = sum(1 for r in results if not r.accepted)
@@ -0,0 +1,230 @@
+"""Persisted snapshot of the MetadataIndex for warm startup.
+
+The snapshot stores each note's parsed metadata together with the content
+hash it was parsed from. At startup only those hashes are compared against
+fs_content.content_hash: unchanged notes reuse their snapshot entry, and
+only new or edited notes have their bodies loaded and parsed. The build runs
+in the background after the server starts listening.
+
+The snapshot is written next to the database at shutdown and periodically
+while the index changes. A missing, stale-format or unreadable snapshot just
+means a full parse.
+"""
+
+import asyncio
+import json
+import os
+import pickle
+import time
+from pathlib import Path
+
+from loguru import logger
+
+from .db import ReadPool
+from .metadata import MetadataIndex, NodeMetadata, parse_nodes, parse_pool
+
+# Bump whenever parsing rules or NodeMetadata change, to discard old snapshots
+SNAPSHOT_FORMAT = 2
+
+DEFAULT_SAVE_INTERVAL_SECONDS = 300.0
+# Notes read per chunk during a build; bounds how many bodies are in memory
+DEFAULT_BUILD_CHUNK = 2000
+
+
+def snapshot_path_for(db_path: str) -> Path:
+    """Snapshot file that belongs to a database file."""
+    return Path(db_path + ".index")
+
+
+def load_snapshot(path: Path) -> dict[str, NodeMetadata]:
+    """Read a snapshot's entries, or an empty dict if it is missing or unusable."""
+    try:
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"IndexSnapshot: Ignoring unreadable snapshot {path}: {e}")
+        return {}
+    if not isinstance(payload, dict) or payload.get("format") != SNAPSHOT_FORMAT:
+        logger.info("IndexSnapshot: Snapshot format changed, doing a full parse")
+        return {}
+    return payload["entries"]
+
+
+def _write_snapshot(path: Path, entries: dict[str, NodeMetadata]) -> None:
+    # Write to a temp file and rename, so a crash never leaves half a snapshot
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(
+            {"format": SNAPSHOT_FORMAT, "entries": entries},
+            f,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    os.replace(tmp, path)
+
+
+async def save_snapshot(path: Path, index: MetadataIndex) -> None:
+    """Persist the index's per-node entries without blocking the event loop.
+
+    Entries are immutable and replaced on update, so a shallow copy taken
+    here is a consistent view even while saves keep mutating the index.
+    """
+    entries = dict(index.nodes)
+    start = time.perf_counter()
+    await asyncio.to_thread(_write_snapshot, path, entries)
+    duration_ms = (time.perf_counter() - start) * 1000
+    logger.info(
+        f"IndexSnapshot: Saved {len(entries)} entries to {path} ({duration_ms:.0f}ms)"
+    )
+
+
+async def build_from_snapshot(
+    read_pool: ReadPool,
+    index: MetadataIndex,
+    path: Path,
+    workers: int = 1,
+    chunk_size: int = DEFAULT_BUILD_CHUNK,
+) -> bool:
+    """Build the index in chunks, reusing snapshot entries whose hash matches.
+
+    Nodes are read `chunk_size` at a time through the read pool, and only the
+    bodies of changed notes in the current chunk are held in memory. Changed
+    notes are parsed across `workers` processes. The index serves partial
+    results (with `ready` False) and accepts live updates meanwhile.
+
+    Returns True if the snapshot already matched the finished index exactly.
+    """
+    start = time.perf_counter()
+    known = await asyncio.to_thread(load_snapshot, path)
+
+    async with read_pool.acquire() as db:
+        async with db.execute(
+            "SELECT COUNT(*) FROM fs_nodes WHERE type = 'file' AND deleted_at IS NULL"
+        ) as cursor:
+            total = (await cursor.fetchone())[0]
+    index.begin_build(total)
+    generation = index.generation
+
+    reused = 0
+    parsed_count = 0
+    after = ""
+    pool = parse_pool(workers)
+    try:
+        while True:
+            async with read_pool.acquire() as db:
+                async with db.execute(
+                    """
+                    SELECT n.id, n.name, n.path, n.created_at, n.updated_at,
+                           c.content_hash
+                    FROM fs_nodes n
+                    JOIN fs_content c ON c.node_id = n.id
+                    WHERE n.type = 'file' AND n.deleted_at IS NULL AND n.id > ?
+                    ORDER BY n.id
+                    LIMIT ?
+                    """,
+                    (after, chunk_size),
+                ) as cursor:
+                    rows = await cursor.fetchall()
+                if not rows:
+                    break
+                stale = [
+                    row["id"]
+                    for row in rows
+                    if row["id"] not in known
+                    or known[row["id"]].content_hash != row["content_hash"]
+                ]
+                bodies: list[tuple[str, str]] = []
+                if stale:
+                    async with db.execute(
+                        "SELECT node_id, body FROM fs_content "
+                        "WHERE node_id IN (SELECT value FROM json_each(?))",
+                        (json.dumps(stale),),
+                    ) as cursor:
+                        bodies = [
+                            (r["node_id"], r["body"]) for r in await cursor.fetchall()
+                        ]
+
+            parsed = await asyncio.to_thread(parse_nodes, bodies, pool)
+            index.add_built(
+                (
+                    (
+                        row["id"],
+                        row["name"],
+                        row["path"],
+                        parsed.get(row["id"]) or known[row["id"]],
+                    )
+                    for row in rows
+                ),
+                {row["id"]: (row["created_at"], row["updated_at"]) for row in rows},
+            )
+            reused += len(rows) - len(stale)
+            parsed_count += len(stale)
+            after = rows[-1]["id"]
+            if len(rows) < chunk_size:
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # Live updates during the build changed the index past what any snapshot holds
+    live_changes = index.generation != generation
+    index.finish_build()
+    duration_ms = (time.perf_counter() - start) * 1000
+    logger.info(
+        f"IndexSnapshot: Reused {reused} entries, "
+        f"parsed {parsed_count} ({duration_ms:.0f}ms)"
+    )
+    return not parsed_count and not live_changes and len(known) == reused
+
+
+class SnapshotSaver:
+    """Periodically saves the index snapshot when it has changed."""
+
+    def __init__(
+        self,
+        index: MetadataIndex,
+        path: Path,
+        interval_seconds: float = DEFAULT_SAVE_INTERVAL_SECONDS,
+    ) -> None:
+        self.index = index
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self._saved_generation: int | None = None
+        self._stopping = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def mark_saved(self) -> None:
+        """Record that the snapshot on disk matches the index as it is now."""
+        self._saved_generation = self.index.generation
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop(), name="basidian-index-snapshot")
+
+    async def stop(self) -> None:
+        """Stop the periodic task, then write a final snapshot if needed."""
+        if self._task is not None:
+            # Not cancelled: a save in progress must finish before the last one
+            self._stopping.set()
+            await self._task
+            self._task = None
+        await self.save_if_changed()
+
+    async def save_if_changed(self) -> None:
+        generation = self.index.generation
+        if generation == self._saved_generation:
+            return
+        try:
+            await save_snapshot(self.path, self.index)
+        except Exception as e:
+            logger.error(f"IndexSnapshot: Save failed: {e}")
+            return
+        self._saved_generation = generation
+
+    async def _loop(self) -> None:
+        while not self._stopping.is_set():
+            await self.save_if_changed()
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
@@ -1,3 +1,4 @@
+import asyncio
 import json
 import sys
 import tempfile
@@ -11,10 +12,22 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
 
-from .db import close_db, init_db
-from .handlers import filesystem_router, history_router, metadata_router, sync_router
-from .handlers.history import cleanup_versions
-from .metadata import MetadataIndex
+from .compression import CompressionMiddleware, CompressionStats
+from .db import DEFAULT_READ_POOL_SIZE, close_db, init_db
+from .graph import GraphCache
+from .handlers import (
+    filesystem_router,
+    graph_router,
+    history_router,
+    metadata_router,
+    sync_router,
+)
+from .index_snapshot import SnapshotSaver, build_from_snapshot, snapshot_path_for
+from .metadata import DEFAULT_INDEX_WORKERS, MetadataIndex
+from .pagination import NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER
+from .properties import PropertyIndex
+from .retention import RetentionPolicy, RetentionScheduler
+from .tree_cache import TreeCache
 
 # Configure loguru - stderr output
 logger.remove()
@@ -48,47 +61,78 @@ def json_sink(message):
 logger.add(json_sink, level="DEBUG")
 
 
-def create_app(db_path: str = "data/basidian.db") -> FastAPI:
-    """Create the FastAPI application."""
+def create_app(
+    db_path: str = "data/basidian.db",
+    read_pool_size: int = DEFAULT_READ_POOL_SIZE,
+    retention: RetentionPolicy | None = None,
+    index_workers: int = DEFAULT_INDEX_WORKERS,
+    property_keys: frozenset[str] | None = None,
+) -> FastAPI:
+    """Create the FastAPI application.
+
+    `property_keys` limits which frontmatter keys get query indexes
+    (None indexes all of them).
+    """
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
-        await init_db(app, db_path)
-        logger.info(f"Database initialized: {db_path}")
-        await cleanup_versions(app.state.db)
-
-        # Build in-memory metadata index
-        index = MetadataIndex()
-        db = app.state.db
-        async with db.execute(
-            "SELECT n.id, n.name, n.path, c.body "
-            "FROM fs_nodes n JOIN fs_content c ON c.node_id = n.id "
-            "WHERE n.type = 'file'"
-        ) as cursor:
-            nodes = [
-                {
-                    "id": row["id"],
-                    "name": row["name"],
-                    "path": row["path"],
-                    "body": row["body"],
-                }
-                for row in await cursor.fetchall()
-            ]
-        index.build(nodes)
+        await init_db(app, db_path, read_pool_size)
+        logger.info(f"Database initialized: {db_path} (WAL, {read_pool_size} readers)")
+
+        # The metadata index builds in the background once the server is up,
+        # reparsing only notes changed since the last snapshot
+        index = MetadataIndex(properties=PropertyIndex(property_keys))
+        snapshot_path = snapshot_path_for(db_path)
+        snapshot_saver = SnapshotSaver(index, snapshot_path)
         app.state.metadata_index = index
+        app.state.link_graph = GraphCache(index)
+        app.state.tree_cache = TreeCache()
+
+        async def build_index() -> None:
+            try:
+                snapshot_current = await build_from_snapshot(
+                    app.state.read_pool, index, snapshot_path, index_workers
+                )
+            except Exception:
+                logger.exception("MetadataIndex: Build failed")
+                return
+            if snapshot_current:
+                snapshot_saver.mark_saved()
+            snapshot_saver.start()
+
+        # From here on the writer task owns the writer connection
+        app.state.writer.start()
+        app.state.retention = RetentionScheduler(
+            app.state.read_pool, app.state.writer, retention
+        )
+        app.state.retention.start()
+        index_build = asyncio.create_task(build_index(), name="basidian-index-build")
 
         yield
+        index_build.cancel()
+        try:
+            await index_build
+        except asyncio.CancelledError:
+            pass
+        await app.state.retention.stop()
+        if index.ready:
+            await snapshot_saver.stop()
         await close_db(app)
         logger.info("Database connection closed")
 
     app = FastAPI(title="Basidian Backend", lifespan=lifespan)
+    app.state.compression = CompressionStats()
+
+    # Compression - innermost, so the request log includes its cost
+    app.add_middleware(CompressionMiddleware, stats=app.state.compression)
 
     # CORS - allow all origins
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
         allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        allow_headers=["Content-Type", "Authorization"],
+        allow_headers=["Content-Type", "Authorization", "If-None-Match"],
+        expose_headers=["ETag", NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER],
     )
 
     # Request logging middleware
@@ -104,11 +148,27 @@ def create_app(db_path: str = "data/basidian.db") -> FastAPI:
 
     # Health check
     @app.get("/health")
-    async def health():
-        return {"status": "ok", "service": "basidian-backend"}
+    async def health(request: Request):
+        return {
+            "status": "ok",
+            "service": "basidian-backend",
+            "index": request.app.state.metadata_index.progress(),
+        }
+
+    @app.get("/metrics")
+    async def metrics(request: Request):
+        return {
+            "writer": request.app.state.writer.metrics(),
+            "retention": request.app.state.retention.metrics(),
+            "properties": request.app.state.metadata_index.properties.stats(),
+            "parse_cache": request.app.state.metadata_index.parse_cache.stats(),
+            "tree_cache": request.app.state.tree_cache.metrics(),
+            "compression": request.app.state.compression.metrics(),
+        }
 
     # Include routers
     app.include_router(filesystem_router)
+    app.include_router(graph_router)
     app.include_router(history_router)
     app.include_router(metadata_router)
     app.include_router(sync_router)
@@ -129,7 +189,60 @@ def cli():
 @click.option(
     "--db", "db_path", default="data/basidian.db", help="SQLite database path"
 )
-def serve(http: str, db_path: str):
+@click.option(
+    "--readers",
+    default=DEFAULT_READ_POOL_SIZE,
+    show_default=True,
+    help="Number of read-only database connections",
+)
+@click.option(
+    "--index-workers",
+    default=DEFAULT_INDEX_WORKERS,
+    show_default=True,
+    help="Processes used to parse notes when building the metadata index",
+)
+@click.option(
+    "--index-properties",
+    default=None,
+    help="Comma-separated frontmatter keys to index for property queries "
+    "(default: all keys)",
+)
+@click.option(
+    "--keep-all-days",
+    default=RetentionPolicy.keep_all_days,
+    show_default=True,
+    help="Keep every file version for this many days",
+)
+@click.option(
+    "--keep-daily-days",
+    default=RetentionPolicy.keep_daily_days,
+    show_default=True,
+    help="Keep one version per day up to this age, then one per week",
+)
+@click.option(
+    "--history-budget-kb",
+    type=int,
+    default=None,
+    help="Cap stored history per file (compressed KB); oldest versions go first",
+)
+@click.option(
+    "--retention-interval",
+    type=click.IntRange(min=1),
+    default=60,
+    show_default=True,
+    help="Minutes between version retention runs",
+)
+def serve(
+    http: str,
+    db_path: str,
+    readers: int,
+    index_workers: int,
+    index_properties: str | None,
+    keep_all_days: int,
+    keep_daily_days: int,
+    history_budget_kb: int | None,
+    retention_interval: int,
+):
     """Start the Basidian backend server."""
     # Parse host:port from --http flag
     if http.startswith(":"):
@@ -142,7 +255,18 @@ def serve(http: str, db_path: str):
 
     logger.info(f"Server starting on {host}:{port}")
     logger.info(f"Logs: {LOG_FILE}")
-    app = create_app(db_path)
+    retention = RetentionPolicy(
+        keep_all_days=keep_all_days,
+        keep_daily_days=keep_daily_days,
+        max_bytes_per_note=history_budget_kb * 1024 if history_budget_kb else None,
+        interval_seconds=retention_interval * 60,
+    )
+    property_keys = (
+        frozenset(key.strip() for key in index_properties.split(",") if key.strip())
+        if index_properties
+        else None
+    )
+    app = create_app(db_path, readers, retention, index_workers, property_keys)
     uvicorn.run(app, host=host, port=port)
 
 
@@ -0,0 +1,133 @@
+"""Single-pass scanner for the Markdown structure the metadata index needs.
+
+`scan` walks a note once with one combined pattern, tracking fenced-code
+and inline-code state as it goes, and reports tags, wikilinks, ATX headings,
+task list items and the frontmatter span. Code is skipped by jumping past
+it rather than by building a stripped copy of the body, so a save allocates
+only the extracted strings.
+
+Rules, close to what Obsidian indexes:
+
+- Frontmatter is a leading `---` block; only tags and links are read from it.
+- A fence is three or more backticks or tildes at the start of a line and
+  runs to a closing fence of the same character and at least the same
+  length, or to the end of the note.
+- Inline code is a run of backticks closed by a run of the same length; an
+  unmatched run is literal text.
+- Tags and wikilinks inside either kind of code are ignored.
+"""
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+_FENCE = r"[ ]{0,3}(?P<fence>`{3,}|~{3,})"
+_HEADING = r"[ ]{0,3}(?P<heading>\#{1,6})(?=[ \t]|$)"
+_TASK = r"[ \t]*[-*+][ \t]+\[(?P<task>[ xX])\](?=[ \t]|$)"
+# Every branch starts with a literal character, which lets the regex engine
+# skip straight to candidate positions; line-level tokens include the
+# newline before them (the first line is matched by _FIRST_LINE)
+_TOKEN = re.compile(
+    "|".join(
+        (
+            rf"\n{_FENCE}",
+            rf"\n{_HEADING}",
+            rf"\n{_TASK}",
+            r"`(?P<code>`*)",
+            r"\[\[(?P<link>[^\]|]+)(?:\|[^\]]+)?\]\]",
+            r"\#(?<!\w\#)(?P<tag>[\w-]+)",
+        )
+    ),
+    re.MULTILINE,
+)
+_FIRST_LINE = re.compile(f"{_FENCE}|{_HEADING}|{_TASK}", re.MULTILINE)
+# What may appear in frontmatter; everything else there is YAML, not Markdown
+_FRONTMATTER_KINDS = ("tag", "link")
+
+
+@lru_cache(maxsize=None)
+def _fence_close(char: str, length: int) -> re.Pattern:
+    return re.compile(
+        rf"^[ ]{{0,3}}{re.escape(char)}{{{length},}}[ \t]*$", re.MULTILINE
+    )
+
+
+@lru_cache(maxsize=None)
+def _code_close(length: int) -> re.Pattern:
+    return re.compile(rf"(?<!`)`{{{length}}}(?!`)")
+
+
+@dataclass(slots=True)
+class MarkdownScan:
+    """Everything `scan` found in one note."""
+
+    tags: set[str] = field(default_factory=set)
+    links: set[str] = field(default_factory=set)
+    # (level, text) in document order
+    headings: list[tuple[int, str]] = field(default_factory=list)
+    # (done, text) in document order
+    tasks: list[tuple[bool, str]] = field(default_factory=list)
+    # Offsets of the YAML between the `---` lines, if the note has frontmatter
+    frontmatter: tuple[int, int] | None = None
+
+
+def frontmatter_span(body: str) -> tuple[int, int] | None:
+    """Offsets of the YAML in a leading `---` block, or None."""
+    if not body.startswith("---"):
+        return None
+    end = body.find("\n---", 3)
+    if end == -1:
+        return None
+    return 3, end
+
+
+def _line_end(body: str, pos: int) -> int:
+    end = body.find("\n", pos)
+    return len(body) if end == -1 else end
+
+
+def scan(body: str) -> MarkdownScan:
+    """Scan `body` once for tags (lowercased), wikilinks, headings and tasks."""
+    result = MarkdownScan(frontmatter=frontmatter_span(body))
+    # Markdown starts on the line after the closing `---`
+    body_start = _line_end(body, result.frontmatter[1] + 1) if result.frontmatter else 0
+    # Lengths of backtick runs known to have no closing run further on
+    unclosed: set[int] = set()
+
+    search = _TOKEN.search
+    match = None if body_start else _FIRST_LINE.match(body)
+    if match is None:
+        match = search(body)
+    while match is not None:
+        kind = match.lastgroup
+        pos = match.end()
+        if match.start() < body_start and kind not in _FRONTMATTER_KINDS:
+            match = search(body, pos)
+            continue
+
+        if kind == "tag":
+            result.tags.add(match["tag"].lower())
+        elif kind == "link":
+            result.links.add(match["link"])
+        elif kind == "heading":
+            text = body[pos : _line_end(body, pos)].strip().rstrip("#").rstrip()
+            result.headings.append((len(match["heading"]), text))
+        elif kind == "task":
+            text = body[pos : _line_end(body, pos)].strip()
+            result.tasks.append((match["task"] != " ", text))
+        elif kind == "fence":
+            fence = match["fence"]
+            close = _fence_close(fence[0], len(fence)).search(
+                body, _line_end(body, pos)
+            )
+            pos = _line_end(body, close.end()) if close else len(body)
+        else:
+            length = len(match["code"]) + 1
+            if length not in unclosed:
+                close = _code_close(length).search(body, pos)
+                if close is None:
+                    unclosed.add(length)
+                else:
+                    pos = close.end()
+        match = search(body, pos)
+    return result
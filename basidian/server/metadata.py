@@ -2,22 +2,40 @@
 
 Built on startup by parsing all file content. Updated incrementally on save/delete/move.
 This is the Obsidian approach: fast reads from memory, trivially rebuildable.
+
+The per-node parse results are kept alongside the aggregate maps, keyed by
+content hash, so a persisted snapshot (see index_snapshot) can restore them
+and only notes whose content changed need parsing again. Large (re)builds
+parse in a pool of worker processes.
+
+Tag and backlink postings hold interned integer node IDs (see postings), so
+the aggregate maps stay compact on large vaults. Lookups return each list's
+cached string-ID view, so only the tags actually queried pay for one.
+
+Each file's creation and modification times are kept with its path (and its
+name, where that is not the path's last part), so query results can be put in
+list order without going back to the database (see node_order).
 """
 
+import multiprocessing
+import os
 import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
+from typing import Iterable
 
 import yaml
 from loguru import logger
 
-# Match #tag but not inside code blocks
-_TAG_PATTERN = re.compile(r"(?<!\w)#([\w-]+)")
-# Match [[wikilink]] and [[wikilink|display]]
-_LINK_PATTERN = re.compile(r"\[\[([^\]|]+)(?:\|[^\]]+)?\]\]")
-# Match ```...``` code blocks (to exclude tags inside them)
-_CODE_BLOCK_PATTERN = re.compile(r"```[\s\S]*?```")
-# Match inline code `...`
-_INLINE_CODE_PATTERN = re.compile(r"`[^`]+`")
+from basidian.hashing import content_hash
+
+from .markdown import scan
+from .node_order import TIME_KEYS, NodeOrder, path_name
+from .postings import Interner, Postings, add_to, discard_from
+from .properties import Condition, PropertyIndex
+from .tag_query import And, Tag, evaluate
+
 # Daily note filename pattern: DD-MMM-YYYY.md
 _DAILY_PATTERN = re.compile(
     r"(\d{2})-(Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)-(\d{4})\.md$"
@@ -38,33 +56,10 @@ _MONTH_ABBREVS = [
 ]
 
 
-def _strip_code_blocks(content: str) -> str:
-    """Remove code blocks and inline code from content for tag extraction."""
-    result = _CODE_BLOCK_PATTERN.sub("", content)
-    result = _INLINE_CODE_PATTERN.sub("", result)
-    return result
-
-
-def _extract_tags(content: str) -> set[str]:
-    """Extract #tags from content (not inside code blocks). Normalized to lowercase."""
-    stripped = _strip_code_blocks(content)
-    return {tag.lower() for tag in _TAG_PATTERN.findall(stripped)}
-
-
-def _extract_links(content: str) -> set[str]:
-    """Extract [[wikilink]] targets from content."""
-    return set(_LINK_PATTERN.findall(content))
-
-
-def _extract_frontmatter(content: str) -> dict:
-    """Extract YAML frontmatter from content."""
-    if not content.startswith("---"):
-        return {}
-    end = content.find("\n---", 3)
-    if end == -1:
-        return {}
+def _load_frontmatter(text: str) -> dict:
+    """Parse the YAML between a note's `---` lines."""
     try:
-        return yaml.safe_load(content[3:end]) or {}
+        return yaml.safe_load(text) or {}
     except yaml.YAMLError:
         return {}
 
@@ -79,71 +74,447 @@ def _parse_daily_date(filename: str, folder: str) -> str | None:
     return f"{year}-{month_idx:02d}-{int(day):02d}"
 
 
+@dataclass(frozen=True)
+class NodeMetadata:
+    """Metadata parsed from one note's body."""
+
+    content_hash: str
+    tags: frozenset[str]
+    links: frozenset[str]
+    frontmatter: dict
+
+
+def parse_node(body: str) -> NodeMetadata:
+    """Parse tags, links and frontmatter out of a note's body."""
+    found = scan(body)
+    span = found.frontmatter
+    return NodeMetadata(
+        content_hash=content_hash(body),
+        tags=frozenset(found.tags),
+        links=frozenset(found.links),
+        frontmatter=_load_frontmatter(body[span[0] : span[1]]) if span else {},
+    )
+
+
+DEFAULT_PARSE_CACHE_SIZE = 4096
+
+
+class ParseCache:
+    """Bounded LRUs of parse results for live updates.
+
+    Saves and sync pushes often carry a body the index has parsed before
+    (re-sent unchanged, reverted, or copied between notes); those reuse the
+    cached result, keyed by content hash. An edit that leaves the
+    frontmatter alone reuses its parsed YAML, which is most of the cost of
+    parsing a note.
+    """
+
+    def __init__(self, size: int = DEFAULT_PARSE_CACHE_SIZE) -> None:
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        # content hash → NodeMetadata
+        self._entries: OrderedDict[str, NodeMetadata] = OrderedDict()
+        # frontmatter text → parsed YAML
+        self._frontmatter: OrderedDict[str, dict] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def parse(self, body: str, body_hash: str | None = None) -> NodeMetadata:
+        body_hash = body_hash or content_hash(body)
+        meta = self._get(self._entries, body_hash)
+        if meta is not None:
+            self.hits += 1
+            return meta
+        self.misses += 1
+
+        found = scan(body)
+        frontmatter: dict = {}
+        if found.frontmatter:
+            start, end = found.frontmatter
+            text = body[start:end]
+            frontmatter = self._get(self._frontmatter, text)
+            if frontmatter is None:
+                frontmatter = _load_frontmatter(text)
+                self._put(self._frontmatter, text, frontmatter)
+        meta = NodeMetadata(
+            content_hash=body_hash,
+            tags=frozenset(found.tags),
+            links=frozenset(found.links),
+            frontmatter=frontmatter,
+        )
+        self._put(self._entries, body_hash, meta)
+        return meta
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._frontmatter.clear()
+
+    def stats(self) -> dict:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+    @staticmethod
+    def _get(entries: OrderedDict, key: str):
+        value = entries.get(key)
+        if value is not None:
+            entries.move_to_end(key)
+        return value
+
+    def _put(self, entries: OrderedDict, key: str, value: object) -> None:
+        entries[key] = value
+        if len(entries) > self.size:
+            entries.popitem(last=False)
+
+
+DEFAULT_INDEX_WORKERS = os.cpu_count() or 1
+_SHARD_SIZE = 500
+# A pool runs shards side by side, so fewer notes than two shards gain nothing
+# from it. Past that, a warm pool's round trip is noise next to parsing (about
+# 0.5 ms a note); starting one costs roughly 0.25 s, once per build. See
+# benchmarks/index_build.py --chunk.
+PARALLEL_MIN_NODES = 2 * _SHARD_SIZE
+
+
+def _parse_shard(shard: list[tuple[str, str]]) -> list[tuple[str, NodeMetadata]]:
+    return [(node_id, parse_node(body)) for node_id, body in shard]
+
+
+def parse_pool(workers: int) -> ProcessPoolExecutor | None:
+    """Process pool for parse_nodes, or None to parse in-process.
+
+    Worker processes start on first use, so an unused pool is cheap.
+    """
+    if workers <= 1:
+        return None
+    # spawn, not fork: the server process runs threads (aiosqlite, uvicorn)
+    context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
+def parse_nodes(
+    bodies: list[tuple[str, str]], pool: ProcessPoolExecutor | None = None
+) -> dict[str, NodeMetadata]:
+    """Parse (node ID, body) pairs, sharded across the pool's processes.
+
+    Small inputs are parsed in-process. Blocks until done, so async callers
+    should run it in a thread.
+    """
+    if pool is None or len(bodies) < PARALLEL_MIN_NODES:
+        return dict(_parse_shard(bodies))
+
+    shards = [bodies[i : i + _SHARD_SIZE] for i in range(0, len(bodies), _SHARD_SIZE)]
+    parsed: dict[str, NodeMetadata] = {}
+    for part in pool.map(_parse_shard, shards):
+        parsed.update(part)
+    return parsed
+
+
+# Marks a frontmatter key absent on one side of a comparison
+_MISSING = object()
+
+# Times of a file a build read none for
+_NO_TIMES = ("", "")
+
+
+def link_key(target: str) -> str:
+    """Canonical form of a link target or note path, used to match one to the other.
+
+    `[[Projects/Plan]]`, `[[/projects/plan.md]]` and `[[projects/plan#Goals]]`
+    all become `/projects/plan`.
+    """
+    key = target.split("#", 1)[0].strip().casefold()
+    if not key.startswith("/"):
+        key = "/" + key
+    if key.endswith(".md"):
+        key = key[:-3]
+    return key
+
+
+def resolve_link(
+    paths: dict[str, str], path_keys: dict[str, set[str]], target: str
+) -> str | None:
+    """ID of the file a link target points at, given node paths and their link keys."""
+    candidates = path_keys.get(link_key(target))
+    if not candidates:
+        return None
+    if len(candidates) == 1:
+        return next(iter(candidates))
+    # Ambiguous only by case or extension: prefer the exact spelling
+    wanted = target.split("#", 1)[0].strip()
+    wanted = wanted if wanted.startswith("/") else "/" + wanted
+    for node_id in sorted(candidates):
+        if paths[node_id] in (wanted, wanted + ".md"):
+            return node_id
+    return min(candidates)
+
+
 @dataclass
 class MetadataIndex:
     """In-memory index of parsed metadata from all notes."""
 
-    # tag (lowercase) → set of node IDs
-    tags: dict[str, set[str]] = field(default_factory=dict)
+    # tag (lowercase) → interned IDs of the nodes carrying it
+    tags: dict[str, Postings] = field(default_factory=dict)
 
-    # source node ID → set of target paths (raw wikilink text)
-    links: dict[str, set[str]] = field(default_factory=dict)
+    # link key of a target (see link_key) → interned IDs of the source nodes
+    backlinks: dict[str, Postings] = field(default_factory=dict)
 
-    # target path → set of source node IDs
-    backlinks: dict[str, set[str]] = field(default_factory=dict)
+    # node ID → current path, for every indexed file
+    paths: dict[str, str] = field(default_factory=dict)
+
+    # link key → IDs of the files at that key (more than one only when paths
+    # differ just by case or ".md"); resolves link targets to notes
+    path_keys: dict[str, set[str]] = field(default_factory=dict)
+
+    # node ID → (created_at, updated_at), for every indexed file
+    times: dict[str, tuple[str, str]] = field(default_factory=dict)
+
+    # node ID → name, for indexed files not named after the end of their path
+    names: dict[str, str] = field(default_factory=dict)
 
     # ISO date string → node ID
     daily_dates: dict[str, str] = field(default_factory=dict)
 
-    # node ID → parsed frontmatter dict
-    frontmatter: dict[str, dict] = field(default_factory=dict)
+    # node ID → everything parsed from its body (what snapshots persist).
+    # Also serves as node → outgoing links and node → frontmatter, and as
+    # the reverse map that lets updates touch only one node's entries.
+    nodes: dict[str, NodeMetadata] = field(default_factory=dict)
+
+    # node ID → ISO date (reverse of daily_dates)
+    daily_by_node: dict[str, str] = field(default_factory=dict)
+
+    # Bumped on every change, so snapshot writers can skip unchanged indexes
+    generation: int = 0
+
+    # Progress of a background build (see begin_build); reads are partial
+    # until ready, while live updates are applied throughout
+    ready: bool = False
+    build_total: int = 0
+    build_done: int = 0
+    # Nodes updated or removed live during a build; their build entries are stale
+    _touched: set[str] = field(default_factory=set)
+    # Nodes moved live during a build: node ID → (new path, new name)
+    _moved: dict[str, tuple[str, str]] = field(default_factory=dict)
+    # Nodes written live during a build: node ID → (created_at, updated_at,
+    # name), with None for fields the writes left alone
+    _written: dict[str, tuple[str | None, str, str | None]] = field(
+        default_factory=dict
+    )
+
+    # Frontmatter key → value/range indexes (see properties)
+    properties: PropertyIndex = field(default_factory=PropertyIndex)
+
+    # node ID ↔ dense integer used in postings
+    _ids: Interner = field(default_factory=Interner)
+
+    # content hash → parse result, for live updates
+    parse_cache: ParseCache = field(default_factory=ParseCache)
 
     # Config
     daily_folder: str = "/daily"
 
-    def build(self, nodes: list[dict]) -> None:
-        """Build full index from a list of {id, name, path, body} dicts."""
+    def __post_init__(self) -> None:
+        # Files sorted by name, path and timestamps (see node_order)
+        self.order = NodeOrder(self.paths, self.names, self.times)
+
+    def build(self, nodes: list[dict], workers: int = 1) -> None:
+        """Build full index from a list of {id, name, path, body} dicts.
+
+        Dicts that also carry created_at/updated_at give the files their times.
+        """
+        bodies = [(node["id"], node["body"]) for node in nodes]
+        pool = parse_pool(workers)
+        try:
+            parsed = parse_nodes(bodies, pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.load(
+            (
+                (node["id"], node["name"], node["path"], parsed[node["id"]])
+                for node in nodes
+            ),
+            {
+                node["id"]: (node["created_at"], node["updated_at"])
+                for node in nodes
+                if "updated_at" in node
+            },
+        )
+
+    def load(
+        self,
+        entries: Iterable[tuple[str, str, str, NodeMetadata]],
+        times: dict[str, tuple[str, str]] | None = None,
+    ) -> None:
+        """Build full index from already-parsed (id, name, path, metadata) entries."""
+        self.begin_build(0)
+        self.add_built(entries, times)
+        self.finish_build()
+
+    def begin_build(self, total: int) -> None:
+        """Clear the index and start accepting entries from a build."""
         self.tags.clear()
-        self.links.clear()
         self.backlinks.clear()
+        self.paths.clear()
+        self.path_keys.clear()
+        self.times.clear()
+        self.names.clear()
+        self.order.clear()
         self.daily_dates.clear()
-        self.frontmatter.clear()
-
-        for node in nodes:
-            self._index_node(node["id"], node["name"], node["path"], node["body"])
+        self.nodes.clear()
+        self.daily_by_node.clear()
+        self.properties.clear()
+        self._ids.clear()
+        # Live changes made before now were wiped with the maps; the build
+        # reads them back from the database
+        self._touched.clear()
+        self._moved.clear()
+        self._written.clear()
+        self.ready = False
+        self.build_total = total
+        self.build_done = 0
+
+    def add_built(
+        self,
+        entries: Iterable[tuple[str, str, str, NodeMetadata]],
+        times: dict[str, tuple[str, str]] | None = None,
+    ) -> None:
+        """Add (id, name, path, metadata) entries read by an in-progress build.
+
+        Entries for nodes that changed live since the build started are
+        skipped (updated/removed) or given their new location (moved).
+        `times` maps node IDs to the (created_at, updated_at) the build read.
+        """
+        # Re-sorting once beats inserting a whole chunk into built orders
+        self.order.clear()
+        times = times or {}
+        for node_id, name, path, meta in entries:
+            self.build_done += 1
+            if node_id in self._touched:
+                continue
+            if node_id in self._moved:
+                path, name = self._moved[node_id]
+            created_at, updated_at = times.get(node_id, _NO_TIMES)
+            if node_id in self._written:
+                live_created, updated_at, live_name = self._written[node_id]
+                created_at = live_created or created_at
+                name = live_name or name
+            self._apply(node_id, name, path, meta)
+            self.times[node_id] = (created_at, updated_at)
+
+    def finish_build(self) -> None:
+        """Mark the index complete."""
+        self.ready = True
+        self.build_total = self.build_done
+        self._touched.clear()
+        self._moved.clear()
+        self._written.clear()
+        self.generation += 1
 
         logger.info(
-            f"MetadataIndex: Built index for {len(nodes)} files — "
-            f"{len(self.tags)} tags, {sum(len(v) for v in self.links.values())} links, "
+            f"MetadataIndex: Built index for {len(self.nodes)} files — "
+            f"{len(self.tags)} tags, "
+            f"{sum(len(meta.links) for meta in self.nodes.values())} links, "
             f"{len(self.daily_dates)} daily dates"
         )
 
-    def update_node(self, node_id: str, name: str, path: str, body: str) -> None:
-        """Re-index a single node after save."""
-        self._remove_node(node_id)
-        self._index_node(node_id, name, path, body)
+    def progress(self) -> dict:
+        return {
+            "ready": self.ready,
+            "indexed": self.build_done,
+            "total": self.build_total,
+        }
+
+    def update_node(
+        self,
+        node_id: str,
+        name: str,
+        path: str,
+        body: str,
+        body_hash: str | None = None,
+    ) -> None:
+        """Re-index a single node after save.
+
+        Only the postings for tags, links and properties that differ from
+        the node's previous metadata are touched, and a body the index
+        already holds for this node is a no-op. Pass `body_hash` when the
+        caller has already computed it.
+        """
+        if not self.ready:
+            self._touched.add(node_id)
+        body_hash = body_hash or content_hash(body)
+        old = self.nodes.get(node_id)
+        if (
+            old is not None
+            and old.content_hash == body_hash
+            and self.paths.get(node_id) == path
+        ):
+            return
+
+        meta = self.parse_cache.parse(body, body_hash)
+        if old is None or self._ids.get(node_id) is None:
+            self._remove_node(node_id)
+            self._apply(node_id, name, path, meta)
+        else:
+            self._replace(node_id, name, path, old, meta)
+        self.generation += 1
 
     def remove_node(self, node_id: str) -> None:
         """Remove a node from all indexes."""
+        if not self.ready:
+            self._touched.add(node_id)
         self._remove_node(node_id)
+        self.generation += 1
 
     def on_move(
         self, node_id: str, old_path: str, new_path: str, new_name: str
     ) -> None:
         """Update indexes after a node move/rename."""
+        if not self.ready:
+            self._moved[node_id] = (new_path, new_name)
+        if node_id not in self.paths:
+            # Folders, deleted nodes, and notes a build has yet to add
+            return
+        self.generation += 1
         # Update daily dates if filename changed
-        self.daily_dates = {
-            date: nid for date, nid in self.daily_dates.items() if nid != node_id
-        }
-        if new_path.startswith(self.daily_folder + "/"):
-            daily_date = _parse_daily_date(new_name, self.daily_folder)
-            if daily_date:
-                self.daily_dates[daily_date] = node_id
-
-        # Update backlinks: any link targeting old_path should now target new_path
-        if old_path in self.backlinks:
-            sources = self.backlinks.pop(old_path)
-            self.backlinks.setdefault(new_path, set()).update(sources)
+        self._unset_daily_date(node_id)
+        self._set_daily_date(node_id, new_name, new_path)
+
+        # Links resolve by path, so they follow the file's new location;
+        # backlinks are keyed by link text and need no change
+        self._unset_path(node_id)
+        self._set_path(node_id, new_path, new_name)
+
+    def on_write(
+        self,
+        node_id: str,
+        updated_at: str,
+        created_at: str | None = None,
+        name: str | None = None,
+    ) -> None:
+        """Update a file's times and name after its node row was written.
+
+        Pass created_at or name only when the write set them.
+        """
+        if not self.ready:
+            live_created, _, live_name = self._written.get(node_id, (None, "", None))
+            self._written[node_id] = (
+                created_at or live_created,
+                updated_at,
+                name or live_name,
+            )
+        if node_id not in self.paths:
+            # Folders, deleted nodes, and notes a build has yet to add
+            return
+        # Times and names are neither in snapshots nor in the graph, so this
+        # leaves the generation alone
+        sorts = TIME_KEYS if name is None else (*TIME_KEYS, "name")
+        self.order.discard(node_id, sorts)
+        old_created, _ = self.times.get(node_id, _NO_TIMES)
+        self.times[node_id] = (created_at or old_created, updated_at)
+        if name is not None:
+            self._set_name(node_id, self.paths[node_id], name)
+        self.order.add(node_id, sorts)
 
     def get_tags_with_counts(self) -> list[dict]:
         """Return all tags with usage counts, sorted by count desc."""
@@ -151,71 +522,174 @@ class MetadataIndex:
         result.sort(key=lambda x: (-x["count"], x["tag"]))
         return result
 
-    def get_nodes_for_tag(self, tag: str) -> set[str]:
+    def get_nodes_for_tag(self, tag: str) -> frozenset[str]:
         """Return node IDs that have a given tag."""
-        return self.tags.get(tag.lower(), set())
-
-    def get_backlinks(self, path: str) -> set[str]:
+        postings = self.tags.get(tag.lower())
+        return postings.view(self._ids) if postings else frozenset()
+
+    def query_tags(self, expr: object) -> frozenset[str] | set[str]:
+        """Return node IDs matching a parsed tag expression (see tag_query)."""
+        if isinstance(expr, And) and not expr.exclude:
+            if all(isinstance(op, Tag) for op in expr.include):
+                return self._intersect_tags([op.name for op in expr.include])
+        matched = evaluate(expr, self.tags, self._ids.numbers)
+        if isinstance(matched, Postings):
+            return matched.view(self._ids)
+        return self._ids.lookup(matched)
+
+    def _intersect_tags(self, tags: list[str]) -> frozenset[str]:
+        # Plain AND of tags: intersect the lists' cached string views,
+        # smallest first, which needs no decoding back to string IDs
+        lists = [self.tags.get(tag) for tag in tags]
+        if not all(lists):
+            return frozenset()
+        views = sorted((postings.view(self._ids) for postings in lists), key=len)
+        return views[0].intersection(*views[1:])
+
+    def query_properties(self, conditions: list[Condition]) -> set[str]:
+        """Return node IDs whose frontmatter satisfies every condition."""
+        return self._ids.lookup(self.properties.match(conditions))
+
+    def get_backlinks(self, path: str) -> frozenset[str]:
         """Return source node IDs that link to a given path."""
-        # Try exact path match, and also match without leading slash
-        result = set()
-        result.update(self.backlinks.get(path, set()))
-        # Wikilinks may omit the leading slash
-        stripped = path.lstrip("/")
-        result.update(self.backlinks.get(stripped, set()))
-        return result
+        postings = self.backlinks.get(link_key(path))
+        return postings.view(self._ids) if postings else frozenset()
+
+    def resolve_link(self, target: str) -> str | None:
+        """Return the ID of the file a link target points at, if any."""
+        return resolve_link(self.paths, self.path_keys, target)
 
     def get_links(self, node_id: str) -> set[str]:
         """Return target paths that a node links to."""
-        return self.links.get(node_id, set())
+        meta = self.nodes.get(node_id)
+        return set(meta.links) if meta else set()
+
+    def _apply(self, node_id: str, name: str, path: str, meta: NodeMetadata) -> None:
+        """Add a parsed node to the aggregate indexes."""
+        self.nodes[node_id] = meta
+        number = self._ids.intern(node_id)
 
-    def _index_node(self, node_id: str, name: str, path: str, body: str) -> None:
-        """Index a single node."""
         # Tags
-        for tag in _extract_tags(body):
-            self.tags.setdefault(tag, set()).add(node_id)
+        for tag in meta.tags:
+            add_to(self.tags, tag, number)
 
-        # Links + backlinks
-        link_targets = _extract_links(body)
-        if link_targets:
-            self.links[node_id] = link_targets
-            for target in link_targets:
-                self.backlinks.setdefault(target, set()).add(node_id)
+        # Backlinks (outgoing links are read from meta)
+        for target in meta.links:
+            add_to(self.backlinks, link_key(target), number)
 
-        # Frontmatter
-        fm = _extract_frontmatter(body)
-        if fm:
-            self.frontmatter[node_id] = fm
+        # Frontmatter properties
+        if meta.frontmatter:
+            self.properties.add(number, meta.frontmatter)
 
         # Daily dates
-        if path.startswith(self.daily_folder + "/"):
-            daily_date = _parse_daily_date(name, self.daily_folder)
-            if daily_date:
-                self.daily_dates[daily_date] = node_id
+        self._set_daily_date(node_id, name, path)
 
-    def _remove_node(self, node_id: str) -> None:
-        """Remove a node from all indexes."""
-        # Tags
-        empty_tags = []
-        for tag, ids in self.tags.items():
-            ids.discard(node_id)
-            if not ids:
-                empty_tags.append(tag)
-        for tag in empty_tags:
-            del self.tags[tag]
+        self._set_path(node_id, path, name)
 
-        # Links + backlinks
-        old_targets = self.links.pop(node_id, set())
-        for target in old_targets:
-            if target in self.backlinks:
-                self.backlinks[target].discard(node_id)
-                if not self.backlinks[target]:
-                    del self.backlinks[target]
+    def _replace(
+        self, node_id: str, name: str, path: str, old: NodeMetadata, new: NodeMetadata
+    ) -> None:
+        """Move an indexed node from `old` to `new` metadata, touching only differences."""
+        self.nodes[node_id] = new
+        number = self._ids.get(node_id)
+
+        if old.tags != new.tags:
+            for tag in old.tags - new.tags:
+                discard_from(self.tags, tag, number)
+            for tag in new.tags - old.tags:
+                add_to(self.tags, tag, number)
+
+        if old.links != new.links:
+            # Compare keys, not spellings: [[A]] and [[a]] share a posting
+            old_keys = {link_key(target) for target in old.links}
+            new_keys = {link_key(target) for target in new.links}
+            for key in old_keys - new_keys:
+                discard_from(self.backlinks, key, number)
+            for key in new_keys - old_keys:
+                add_to(self.backlinks, key, number)
+
+        if old.frontmatter != new.frontmatter:
+            if isinstance(old.frontmatter, dict) and isinstance(new.frontmatter, dict):
+                changed = {
+                    key
+                    for key in old.frontmatter.keys() | new.frontmatter.keys()
+                    if old.frontmatter.get(key, _MISSING)
+                    != new.frontmatter.get(key, _MISSING)
+                }
+                before = {
+                    k: old.frontmatter[k] for k in changed if k in old.frontmatter
+                }
+                after = {k: new.frontmatter[k] for k in changed if k in new.frontmatter}
+            else:
+                before, after = old.frontmatter, new.frontmatter
+            if before:
+                self.properties.remove(number, before)
+            if after:
+                self.properties.add(number, after)
+
+        if self.paths.get(node_id) != path:
+            self._unset_daily_date(node_id)
+            self._set_daily_date(node_id, name, path)
+            self._unset_path(node_id)
+            self._set_path(node_id, path, name)
 
-        # Frontmatter
-        self.frontmatter.pop(node_id, None)
+    def _remove_node(self, node_id: str) -> None:
+        """Remove a node from all indexes."""
+        meta = self.nodes.pop(node_id, None)
+        number = self._ids.get(node_id)
+
+        if meta is not None and number is not None:
+            # Tags
+            for tag in meta.tags:
+                discard_from(self.tags, tag, number)
+            # Backlinks
+            for target in meta.links:
+                discard_from(self.backlinks, link_key(target), number)
+            # Frontmatter properties
+            if meta.frontmatter:
+                self.properties.remove(number, meta.frontmatter)
+            self._ids.release(node_id)
 
         # Daily dates
-        self.daily_dates = {
-            date: nid for date, nid in self.daily_dates.items() if nid != node_id
-        }
+        self._unset_daily_date(node_id)
+
+        self._unset_path(node_id)
+        self.times.pop(node_id, None)
+
+    def _set_path(self, node_id: str, path: str, name: str) -> None:
+        self.paths[node_id] = path
+        self.path_keys.setdefault(link_key(path), set()).add(node_id)
+        self._set_name(node_id, path, name)
+        self.order.add(node_id)
+
+    def _set_name(self, node_id: str, path: str, name: str) -> None:
+        if name == path_name(path):
+            self.names.pop(node_id, None)
+        else:
+            self.names[node_id] = name
+
+    def _unset_path(self, node_id: str) -> None:
+        if node_id not in self.paths:
+            return
+        self.order.discard(node_id)
+        path = self.paths.pop(node_id)
+        self.names.pop(node_id, None)
+        key = link_key(path)
+        ids = self.path_keys.get(key)
+        if ids is not None:
+            ids.discard(node_id)
+            if not ids:
+                del self.path_keys[key]
+
+    def _set_daily_date(self, node_id: str, name: str, path: str) -> None:
+        if not path.startswith(self.daily_folder + "/"):
+            return
+        daily_date = _parse_daily_date(name, self.daily_folder)
+        if daily_date:
+            self.daily_dates[daily_date] = node_id
+            self.daily_by_node[node_id] = daily_date
+
+    def _unset_daily_date(self, node_id: str) -> None:
+        daily_date = self.daily_by_node.pop(node_id, None)
+        if daily_date is not None and self.daily_dates.get(daily_date) == node_id:
+            del self.daily_dates[daily_date]
@@ -3,6 +3,10 @@
 import aiosqlite
 from loguru import logger
 
+from basidian.hashing import content_hash
+
+from . import version_store
+
 
 async def _get_columns(db: aiosqlite.Connection, table: str) -> list[str]:
     """Get column names for a table."""
@@ -118,6 +122,10 @@ async def _create_indexes(db: aiosqlite.Connection) -> None:
         "CREATE INDEX IF NOT EXISTS idx_fs_nodes_parent_id ON fs_nodes (parent_id)"
     )
     await db.execute("CREATE INDEX IF NOT EXISTS idx_fs_nodes_type ON fs_nodes (type)")
+    # Paged folder listings: a folder's children in path order
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_fs_nodes_parent_path ON fs_nodes (parent_id, path)"
+    )
     # Two partial indexes for unique name constraint (NULL parent_id needs special handling)
     await db.execute("""
         CREATE UNIQUE INDEX IF NOT EXISTS idx_fs_nodes_unique_name
@@ -133,6 +141,32 @@ async def _create_indexes(db: aiosqlite.Connection) -> None:
     await db.execute(
         "CREATE INDEX IF NOT EXISTS idx_fs_versions_created_at ON fs_versions (created_at)"
     )
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_fs_versions_node_created "
+        "ON fs_versions (node_id, created_at)"
+    )
+
+
+async def _create_versions_table(db: aiosqlite.Connection, table: str) -> None:
+    """Create the compressed version store (see version_store).
+
+    base_id points at the keyframe a delta was encoded against; it is not a
+    foreign key because retention re-encodes dependents before deleting.
+    """
+    await db.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            id          TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(8)))),
+            node_id     TEXT NOT NULL REFERENCES fs_nodes(id) ON DELETE CASCADE,
+            kind        TEXT NOT NULL CHECK (kind IN ('full', 'delta')),
+            base_id     TEXT,
+            data        BLOB NOT NULL,
+            content_hash  TEXT NOT NULL DEFAULT '',
+            size          INTEGER NOT NULL DEFAULT 0,
+            lines_added   INTEGER NOT NULL DEFAULT 0,
+            lines_removed INTEGER NOT NULL DEFAULT 0,
+            created_at  TEXT NOT NULL
+        )
+    """)
 
 
 async def _create_tables(db: aiosqlite.Connection) -> None:
@@ -155,18 +189,13 @@ async def _create_tables(db: aiosqlite.Connection) -> None:
         CREATE TABLE IF NOT EXISTS fs_content (
             node_id     TEXT PRIMARY KEY REFERENCES fs_nodes(id) ON DELETE CASCADE,
             body        TEXT NOT NULL DEFAULT '',
+            content_hash  TEXT NOT NULL DEFAULT '',
+            size          INTEGER NOT NULL DEFAULT 0,
             updated_at  TEXT NOT NULL
         )
     """)
 
-    await db.execute("""
-        CREATE TABLE IF NOT EXISTS fs_versions (
-            id          TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(8)))),
-            node_id     TEXT NOT NULL REFERENCES fs_nodes(id) ON DELETE CASCADE,
-            body        TEXT NOT NULL,
-            created_at  TEXT NOT NULL
-        )
-    """)
+    await _create_versions_table(db, "fs_versions")
 
     await _create_indexes(db)
     await db.commit()
@@ -195,6 +224,9 @@ async def run_migrations(db: aiosqlite.Connection) -> None:
     # Incremental migrations (safe to run on any schema version)
     await _add_deleted_at_column(db)
     await _normalize_timestamps(db)
+    await _create_search_index(db)
+    await _compress_versions(db)
+    await _add_content_metadata(db)
 
 
 async def _normalize_timestamps(db: aiosqlite.Connection) -> None:
@@ -212,3 +244,170 @@ async def _normalize_timestamps(db: aiosqlite.Connection) -> None:
                 f"WHERE {col} LIKE '%Z' OR {col} LIKE '%+00:00'"
             )
     await db.commit()
+
+
+async def _create_search_index(db: aiosqlite.Connection) -> None:
+    """Create the FTS5 full-text index over file names and bodies, if missing.
+
+    fs_search_docs maps each indexed node to a stable integer rowid, since
+    FTS5 rows are keyed by integer and fs_nodes uses text IDs.
+    """
+    if await _table_exists(db, "fs_search"):
+        return
+
+    logger.info("Migration: Building FTS5 search index")
+    await db.execute("""
+        CREATE TABLE fs_search_docs (
+            doc_id      INTEGER PRIMARY KEY,
+            node_id     TEXT NOT NULL UNIQUE
+        )
+    """)
+    await db.execute("""
+        CREATE VIRTUAL TABLE fs_search USING fts5(
+            name,
+            body,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    """)
+    await db.execute("""
+        INSERT INTO fs_search_docs (node_id)
+        SELECT id FROM fs_nodes WHERE type = 'file' AND deleted_at IS NULL
+    """)
+    await db.execute("""
+        INSERT INTO fs_search (rowid, name, body)
+        SELECT d.doc_id, n.name, COALESCE(c.body, '')
+        FROM fs_search_docs d
+        JOIN fs_nodes n ON n.id = d.node_id
+        LEFT JOIN fs_content c ON c.node_id = n.id
+    """)
+    await db.commit()
+
+
+async def _compress_versions(db: aiosqlite.Connection) -> None:
+    """Convert fs_versions from plain bodies to keyframes and deltas, if needed.
+
+    Rows are streamed per node in chronological order and encoded exactly as
+    version_store.insert_version would have stored them.
+    """
+    if "body" in await _get_columns(db, "fs_versions"):
+        logger.info("Migration: Compressing fs_versions into keyframes and deltas")
+        await _create_versions_table(db, "fs_versions_new")
+
+        converted = 0
+        node_id = None
+        keyframe: tuple[str, str] | None = None  # (id, body)
+        deltas = 0
+        async with db.execute(
+            "SELECT id, node_id, body, created_at FROM fs_versions "
+            "ORDER BY node_id, created_at, id"
+        ) as cursor:
+            async for row in cursor:
+                if row["node_id"] != node_id:
+                    node_id, keyframe, deltas = row["node_id"], None, 0
+                kind, data = version_store.choose_encoding(
+                    keyframe[1] if keyframe else None, row["body"], deltas
+                )
+                if kind == "full":
+                    keyframe, deltas = (row["id"], row["body"]), 0
+                else:
+                    deltas += 1
+                await db.execute(
+                    """
+                    INSERT INTO fs_versions_new
+                        (id, node_id, kind, base_id, data, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        row["id"],
+                        row["node_id"],
+                        kind,
+                        keyframe[0] if kind == "delta" else None,
+                        data,
+                        row["created_at"],
+                    ),
+                )
+                converted += 1
+
+        await db.execute("DROP TABLE fs_versions")
+        await db.execute("ALTER TABLE fs_versions_new RENAME TO fs_versions")
+        await _create_indexes(db)
+        await db.commit()
+        logger.info(f"Migration: Compressed {converted} versions")
+
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_fs_versions_base_id ON fs_versions (base_id)"
+    )
+    await db.commit()
+
+
+async def _add_content_metadata(db: aiosqlite.Connection) -> None:
+    """Add and backfill content hash, size and diff stats columns.
+
+    An empty content_hash marks rows written before these columns existed.
+    """
+    hash_and_size = [
+        ("content_hash", "TEXT NOT NULL DEFAULT ''"),
+        ("size", "INTEGER NOT NULL DEFAULT 0"),
+    ]
+    diff_stats = [
+        ("lines_added", "INTEGER NOT NULL DEFAULT 0"),
+        ("lines_removed", "INTEGER NOT NULL DEFAULT 0"),
+    ]
+    for table, columns in [
+        ("fs_content", hash_and_size),
+        ("fs_versions", hash_and_size + diff_stats),
+    ]:
+        existing = await _get_columns(db, table)
+        for col, decl in columns:
+            if col not in existing:
+                logger.info(f"Migration: Adding {col} column to {table}")
+                await db.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl}")
+
+    async with db.execute(
+        "SELECT node_id, body FROM fs_content WHERE content_hash = ''"
+    ) as cursor:
+        rows = await cursor.fetchall()
+    if rows:
+        logger.info(f"Migration: Hashing {len(rows)} content rows")
+        await db.executemany(
+            "UPDATE fs_content SET content_hash = ?, size = ? WHERE node_id = ?",
+            [
+                (content_hash(r["body"]), len(r["body"].encode("utf-8")), r["node_id"])
+                for r in rows
+            ],
+        )
+
+    async with db.execute(
+        "SELECT DISTINCT node_id FROM fs_versions WHERE content_hash = ''"
+    ) as cursor:
+        node_ids = [r["node_id"] for r in await cursor.fetchall()]
+    if node_ids:
+        logger.info(f"Migration: Computing version metadata for {len(node_ids)} files")
+    for node_id in node_ids:
+        previous = ""
+        updates = []
+        # list_bodies is newest first; stats are relative to the older neighbour
+        for version_id, _, body in reversed(
+            await version_store.list_bodies(db, node_id)
+        ):
+            added, removed = version_store.diff_stats(previous, body)
+            updates.append(
+                (
+                    content_hash(body),
+                    len(body.encode("utf-8")),
+                    added,
+                    removed,
+                    version_id,
+                )
+            )
+            previous = body
+        await db.executemany(
+            """
+            UPDATE fs_versions
+            SET content_hash = ?, size = ?, lines_added = ?, lines_removed = ?
+            WHERE id = ?
+            """,
+            updates,
+        )
+    await db.commit()
@@ -0,0 +1,142 @@
+"""Indexed files in list order, for paging metadata query results.
+
+Tag and property queries produce sets of node IDs, which their endpoints
+page by name, path, or creation/modification time, then by ID. `NodeOrder`
+keeps the IDs of all indexed files sorted by each of those keys — built on
+first use, then maintained as paths, names and times change — so a page is a
+walk from the cursor's position that keeps the IDs in the result set. A
+result set much smaller than the vault is sorted directly instead, which is
+cheaper than walking past everything it leaves out.
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Callable, Collection, Iterable
+from heapq import nlargest, nsmallest
+from itertools import islice
+
+SORT_KEYS = ("name", "path", "created_at", "updated_at")
+TIME_KEYS = ("created_at", "updated_at")
+
+# Result sets under 1/16 of the vault are sorted directly
+_DIRECT_SORT_RATIO = 16
+
+# Once this many edits per file have been made to the built orders, they
+# are dropped and re-sorted on the next page: large moves cost one sort
+_RESORT_EDITS = 1 / 32
+
+_NO_TIMES = ("", "")
+
+
+def path_name(path: str) -> str:
+    """The last part of a path, which names the node unless it was renamed."""
+    return path.rsplit("/", 1)[-1]
+
+
+class NodeOrder:
+    """Sort orders over the files of a MetadataIndex."""
+
+    def __init__(
+        self,
+        paths: dict[str, str],
+        names: dict[str, str],
+        times: dict[str, tuple[str, str]],
+    ) -> None:
+        self._paths = paths
+        self._times = times
+        # sort key → IDs of all indexed files, ascending by (value, ID)
+        self._orders: dict[str, list[str]] = {}
+        self._edits = 0
+        self._keys: dict[str, Callable[[str], tuple[str, str]]] = {
+            "name": lambda node_id: (
+                names.get(node_id) or path_name(paths[node_id]),
+                node_id,
+            ),
+            "path": lambda node_id: (paths[node_id], node_id),
+            "created_at": lambda node_id: (
+                times.get(node_id, _NO_TIMES)[0],
+                node_id,
+            ),
+            "updated_at": lambda node_id: (
+                times.get(node_id, _NO_TIMES)[1],
+                node_id,
+            ),
+        }
+
+    def key(self, sort: str, node_id: str) -> str:
+        """Return an indexed file's value for a sort key."""
+        return self._keys[sort](node_id)[0]
+
+    def add(self, node_id: str, sorts: Iterable[str] = SORT_KEYS) -> None:
+        """Insert a file into the built orders; call once its keys are set."""
+        if not self._edit():
+            return
+        for sort in sorts:
+            order = self._orders.get(sort)
+            if order is not None:
+                insort(order, node_id, key=self._keys[sort])
+
+    def discard(self, node_id: str, sorts: Iterable[str] = SORT_KEYS) -> None:
+        """Remove a file from the built orders; call before its keys change."""
+        if not self._edit():
+            return
+        for sort in sorts:
+            order = self._orders.get(sort)
+            if not order:
+                continue
+            key = self._keys[sort]
+            i = bisect_left(order, key(node_id), key=key)
+            if i < len(order) and order[i] == node_id:
+                del order[i]
+
+    def clear(self) -> None:
+        """Drop the built orders; the next page rebuilds what it needs."""
+        self._orders.clear()
+        self._edits = 0
+
+    def _edit(self) -> bool:
+        # False when there are no built orders to edit (any more)
+        if not self._orders:
+            return False
+        self._edits += 1
+        if self._edits > len(self._paths) * _RESORT_EDITS:
+            self.clear()
+            return False
+        return True
+
+    def page(
+        self,
+        node_ids: Collection[str],
+        sort: str,
+        descending: bool,
+        after: tuple[str, str] | None,
+        count: int,
+    ) -> list[str]:
+        """Return up to `count` of `node_ids` in list order.
+
+        `after` is the (value, ID) key of the previous page's last file.
+        """
+        key = self._keys[sort]
+        if len(node_ids) * _DIRECT_SORT_RATIO < len(self._paths):
+            keyed = (key(node_id) for node_id in node_ids if node_id in self._paths)
+            if after is not None:
+                if descending:
+                    keyed = (k for k in keyed if k < after)
+                else:
+                    keyed = (k for k in keyed if k > after)
+            pick = nlargest if descending else nsmallest
+            return [node_id for _, node_id in pick(count, keyed)]
+
+        order = self._order(sort)
+        if descending:
+            end = len(order) if after is None else bisect_left(order, after, key=key)
+            walk = islice(reversed(order), len(order) - end, None)
+        else:
+            start = 0 if after is None else bisect_right(order, after, key=key)
+            walk = islice(order, start, None)
+        return list(islice(filter(node_ids.__contains__, walk), count))
+
+    def _order(self, sort: str) -> list[str]:
+        order = self._orders.get(sort)
+        if order is None:
+            order = self._orders[sort] = sorted(self._paths, key=self._keys[sort])
+        return order
@@ -0,0 +1,45 @@
+"""Keyset pagination helpers for list endpoints.
+
+List endpoints return a bounded page as a plain JSON array. When more rows
+follow, the response carries an opaque cursor in the `X-Next-Cursor` header;
+passing it back as `?cursor=` resumes right after the last row, using the
+sort key instead of an OFFSET so deep pages cost the same as the first.
+"""
+
+import base64
+import binascii
+import json
+
+from fastapi import HTTPException, Response
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Set by endpoints that know how many rows match across all pages
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+
+def encode_cursor(*key: object) -> str:
+    """Encode the sort key of the last returned row as an opaque cursor."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None, size: int) -> list | None:
+    """Decode a cursor produced by `encode_cursor` with `size` key parts."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(key, list) or len(key) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return key
+
+
+def set_next_cursor(response: Response, cursor: str | None) -> None:
+    if cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,253 @@
+"""Compact posting lists over interned node IDs.
+
+The metadata index maps each tag (and each link target) to the notes that
+carry it. Holding those as sets of 16-char ID strings costs tens of bytes
+per entry; instead node IDs are interned to dense integers and each
+posting list picks the smaller of two encodings:
+
+- a sorted `array("I")` (4 bytes per note) for sparse lists
+- a bitmap (one bit per interned ID) once a list covers enough of the ID space
+
+Set algebra runs over Python ints used as bitsets, so AND/OR/ANDNOT are
+single C-level loops over machine words instead of per-element hashing.
+
+A list's string-ID view (what a single-tag or backlink lookup returns) is
+built on first use and kept until the list next changes, so repeated
+lookups of a hot tag cost a dict probe rather than a decode.
+"""
+
+from array import array
+from bisect import bisect_left
+from functools import reduce
+from operator import and_, or_
+from typing import Iterable, Iterator
+
+# Lists shorter than this always stay arrays
+_BITMAP_MIN = 64
+
+
+def decode_bits(bits: int) -> list[int]:
+    """Positions of the set bits in `bits`, ascending."""
+    if not bits:
+        return []
+    # Reversed binary string: index i is bit i. str.find skips zeros in C.
+    digits = bin(bits)[:1:-1]
+    out = []
+    i = digits.find("1")
+    while i != -1:
+        out.append(i)
+        i = digits.find("1", i + 1)
+    return out
+
+
+class Postings:
+    """A set of interned node IDs, stored as a sorted array or a bitmap."""
+
+    __slots__ = ("_ids", "_bitmap", "_count", "_view")
+
+    def __init__(self) -> None:
+        self._ids: array | None = array("I")
+        self._bitmap: bytearray | None = None
+        self._count = 0
+        # String IDs, cached by view() until the next add or discard
+        self._view: frozenset[str] | None = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, value: int) -> bool:
+        if self._ids is not None:
+            i = bisect_left(self._ids, value)
+            return i < len(self._ids) and self._ids[i] == value
+        byte = value >> 3
+        return byte < len(self._bitmap) and bool(self._bitmap[byte] >> (value & 7) & 1)
+
+    def __iter__(self) -> Iterator[int]:
+        if self._ids is not None:
+            return iter(self._ids)
+        return iter(decode_bits(self.bits()))
+
+    @property
+    def is_bitmap(self) -> bool:
+        return self._bitmap is not None
+
+    def view(self, interner: "Interner") -> frozenset[str]:
+        """The list as string IDs. Cached, so callers must not rely on a copy."""
+        if self._view is None:
+            self._view = frozenset(interner.lookup(self))
+        return self._view
+
+    def nbytes(self) -> int:
+        """Approximate payload size in bytes."""
+        if self._ids is not None:
+            return self._ids.buffer_info()[1] * self._ids.itemsize
+        return len(self._bitmap)
+
+    def add(self, value: int) -> None:
+        if self._ids is not None:
+            i = bisect_left(self._ids, value)
+            if i < len(self._ids) and self._ids[i] == value:
+                return
+            self._ids.insert(i, value)
+            self._count += 1
+            self._view = None
+            # Switch once a bitmap up to the largest ID would be smaller
+            if self._count >= _BITMAP_MIN and self._count * 32 > self._ids[-1]:
+                self._to_bitmap()
+            return
+
+        byte, bit = value >> 3, 1 << (value & 7)
+        if byte >= len(self._bitmap):
+            self._bitmap.extend(bytes(byte + 1 - len(self._bitmap)))
+        if not self._bitmap[byte] & bit:
+            self._bitmap[byte] |= bit
+            self._count += 1
+            self._view = None
+
+    def discard(self, value: int) -> None:
+        if self._ids is not None:
+            i = bisect_left(self._ids, value)
+            if i < len(self._ids) and self._ids[i] == value:
+                del self._ids[i]
+                self._count -= 1
+                self._view = None
+            return
+
+        byte, bit = value >> 3, 1 << (value & 7)
+        if byte < len(self._bitmap) and self._bitmap[byte] & bit:
+            self._bitmap[byte] &= ~bit
+            self._count -= 1
+            self._view = None
+            # Back to an array well below the switch point, so a list
+            # hovering around it does not flip on every change
+            if self._count * 64 < len(self._bitmap) * 8:
+                self._to_array()
+
+    def keep_common(self, candidates: set[int]) -> set[int]:
+        """The IDs in `candidates` that are also in this list."""
+        if self._ids is not None:
+            return candidates.intersection(self._ids)
+        if len(candidates) > self._count:
+            return candidates.intersection(iter(self))
+        return {value for value in candidates if value in self}
+
+    def drop_common(self, candidates: set[int]) -> set[int]:
+        """The IDs in `candidates` that are not in this list."""
+        if self._ids is not None:
+            return candidates.difference(self._ids)
+        if len(candidates) > self._count:
+            return candidates.difference(iter(self))
+        return {value for value in candidates if value not in self}
+
+    def bits(self) -> int:
+        """The list as an int bitset (bit i set for ID i)."""
+        if self._bitmap is not None:
+            return int.from_bytes(self._bitmap, "little")
+        bits = 0
+        for value in self._ids:
+            bits |= 1 << value
+        return bits
+
+    def _to_bitmap(self) -> None:
+        bitmap = bytearray((self._ids[-1] >> 3) + 1)
+        for value in self._ids:
+            bitmap[value >> 3] |= 1 << (value & 7)
+        self._bitmap, self._ids = bitmap, None
+
+    def _to_array(self) -> None:
+        self._ids = array("I", decode_bits(self.bits()))
+        self._bitmap = None
+
+
+def add_to(index: dict, key: object, value: int) -> None:
+    """Add `value` to the postings under `key`, creating the list if needed."""
+    postings = index.get(key)
+    if postings is None:
+        postings = index[key] = Postings()
+    postings.add(value)
+
+
+def discard_from(index: dict, key: object, value: int) -> None:
+    """Remove `value` from the postings under `key`, dropping the list once empty."""
+    postings = index.get(key)
+    if postings is not None:
+        postings.discard(value)
+        if not postings:
+            del index[key]
+
+
+def intersect(lists: Iterable[Postings]) -> list[int]:
+    """IDs present in every list, ascending. Evaluated smallest list first."""
+    ordered = sorted(lists, key=len)
+    if not ordered or not len(ordered[0]):
+        return []
+    if ordered[0].is_bitmap:
+        # Everything is dense: AND the bitsets word by word
+        return decode_bits(reduce(and_, (p.bits() for p in ordered)))
+    # Sparse: narrow the smallest list's IDs through the others, stopping
+    # once nothing is left
+    candidates = set(ordered[0])
+    for postings in ordered[1:]:
+        candidates = postings.keep_common(candidates)
+        if not candidates:
+            return []
+    return sorted(candidates)
+
+
+def union(lists: Iterable[Postings]) -> list[int]:
+    """IDs present in any list, ascending."""
+    return decode_bits(reduce(or_, (p.bits() for p in lists), 0))
+
+
+class Interner:
+    """Maps string IDs to dense integers and back.
+
+    Released integers are reused, which keeps bitmaps no wider than the
+    number of live nodes.
+    """
+
+    __slots__ = ("_ids", "_strings", "_free")
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self._strings: list[str | None] = []
+        self._free: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def intern(self, value: str) -> int:
+        number = self._ids.get(value)
+        if number is not None:
+            return number
+        if self._free:
+            number = self._free.pop()
+            self._strings[number] = value
+        else:
+            number = len(self._strings)
+            self._strings.append(value)
+        self._ids[value] = number
+        return number
+
+    def get(self, value: str) -> int | None:
+        return self._ids.get(value)
+
+    def release(self, value: str) -> None:
+        """Forget `value`; the caller must have dropped it from all postings."""
+        number = self._ids.pop(value, None)
+        if number is not None:
+            self._strings[number] = None
+            self._free.append(number)
+
+    def numbers(self) -> set[int]:
+        """Every interned integer currently in use."""
+        return set(self._ids.values())
+
+    def lookup(self, numbers: Iterable[int]) -> set[str]:
+        """String IDs for interned integers."""
+        return set(map(self._strings.__getitem__, numbers))
+
+    def clear(self) -> None:
+        self._ids.clear()
+        self._strings.clear()
+        self._free.clear()
@@ -0,0 +1,260 @@
+"""Secondary indexes over YAML frontmatter properties.
+
+For each frontmatter key the index keeps:
+
+- equality postings: value → interned node IDs (list values index each item)
+- presence postings: every node that sets the key
+- sorted (value, node) columns for numbers and for dates, for range queries
+
+It is maintained by MetadataIndex alongside tags, from the same parsed
+frontmatter. An optional allow-list restricts which keys are indexed, which
+bounds memory on vaults with free-form frontmatter.
+
+Conditions look like `status=done`, `priority>=3` or `due<2026-11-01`. The
+value is parsed as YAML, so it is typed the same way as in a note.
+"""
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime
+
+import yaml
+
+from .postings import Postings, add_to, discard_from
+
+# key, operator, value
+_CONDITION = re.compile(r"\s*([^\s<>=!]+)\s*(<=|>=|!=|=|<|>)\s*(.*?)\s*")
+_RANGE_OPS = ("<", "<=", ">", ">=")
+
+
+class PropertyQueryError(ValueError):
+    """A condition could not be parsed or names a key that is not indexed."""
+
+
+@dataclass(frozen=True)
+class Condition:
+    key: str
+    op: str
+    value: object
+
+
+def parse_condition(text: str) -> Condition:
+    """Parse `key<op>value`, with op one of = != < <= > >=."""
+    match = _CONDITION.fullmatch(text)
+    if not match:
+        raise PropertyQueryError(f"Invalid condition {text!r}")
+    key, op, raw = match.groups()
+    try:
+        value = yaml.safe_load(raw) if raw else None
+    except yaml.YAMLError:
+        value = raw
+    if op in _RANGE_OPS and _range_kind(value) is None:
+        raise PropertyQueryError(f"{op} needs a number or a date, got {raw!r}")
+    return Condition(key, op, value)
+
+
+def _equality_key(value: object) -> tuple | None:
+    """Hashable, type-tagged form of a scalar: 1 matches 1.0, but not '1' or true."""
+    if isinstance(value, bool):
+        return ("b", value)
+    if isinstance(value, (int, float)):
+        return ("n", float(value))
+    if isinstance(value, (date, datetime)):
+        return ("d", value.isoformat())
+    if isinstance(value, str):
+        return ("s", value)
+    if value is None:
+        return ("z", None)
+    return None
+
+
+def _range_kind(value: object) -> str | None:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        # NaN has no place in a sorted column
+        return "n" if value == value else None
+    if isinstance(value, (date, datetime)):
+        return "d"
+    return None
+
+
+def _range_value(value: object) -> float | str:
+    return value.isoformat() if isinstance(value, (date, datetime)) else float(value)
+
+
+class _SortedColumn:
+    """Parallel sorted values and node IDs, for range scans."""
+
+    __slots__ = ("ids", "values")
+
+    def __init__(self) -> None:
+        self.values: list = []
+        self.ids = array("I")
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def add(self, value, number: int) -> None:
+        # Ordered by (value, node), so equal values are found by bisection too
+        start = bisect_left(self.values, value)
+        end = bisect_right(self.values, value, start)
+        i = bisect_left(self.ids, number, start, end)
+        self.values.insert(i, value)
+        self.ids.insert(i, number)
+
+    def remove(self, value, number: int) -> None:
+        start = bisect_left(self.values, value)
+        end = bisect_right(self.values, value, start)
+        i = bisect_left(self.ids, number, start, end)
+        if i < end and self.ids[i] == number:
+            del self.values[i]
+            del self.ids[i]
+
+    def span(self, op: str, value) -> tuple[int, int]:
+        """Index range of entries satisfying `entry <op> value`."""
+        if op == "<":
+            return 0, bisect_left(self.values, value)
+        if op == "<=":
+            return 0, bisect_right(self.values, value)
+        if op == ">":
+            return bisect_right(self.values, value), len(self.values)
+        return bisect_left(self.values, value), len(self.values)
+
+
+class PropertyIndex:
+    """Frontmatter equality and range indexes over interned node IDs."""
+
+    def __init__(self, keys: frozenset[str] | None = None) -> None:
+        # Keys to index; None indexes every key
+        self.keys = keys
+        self._present: dict[str, Postings] = {}
+        self._equal: dict[str, dict[tuple, Postings]] = {}
+        self._ranges: dict[tuple[str, str], _SortedColumn] = {}
+
+    def clear(self) -> None:
+        self._present.clear()
+        self._equal.clear()
+        self._ranges.clear()
+
+    def add(self, number: int, frontmatter: dict) -> None:
+        for key, value in self._entries(frontmatter):
+            add_to(self._present, key, number)
+            for item in self._items(value):
+                equality = _equality_key(item)
+                if equality is not None:
+                    add_to(self._equal.setdefault(key, {}), equality, number)
+                kind = _range_kind(item)
+                if kind is not None:
+                    column = self._ranges.get((key, kind))
+                    if column is None:
+                        column = self._ranges[(key, kind)] = _SortedColumn()
+                    column.add(_range_value(item), number)
+
+    def remove(self, number: int, frontmatter: dict) -> None:
+        for key, value in self._entries(frontmatter):
+            discard_from(self._present, key, number)
+            for item in self._items(value):
+                equality = _equality_key(item)
+                values = self._equal.get(key)
+                if equality is not None and values is not None:
+                    discard_from(values, equality, number)
+                    if not values:
+                        del self._equal[key]
+                kind = _range_kind(item)
+                column = self._ranges.get((key, kind))
+                if column is not None:
+                    column.remove(_range_value(item), number)
+                    if not column:
+                        del self._ranges[(key, kind)]
+
+    def stats(self) -> dict:
+        return {
+            "keys": len(self._present),
+            "values": sum(len(values) for values in self._equal.values()),
+            "range_entries": sum(len(column) for column in self._ranges.values()),
+        }
+
+    def match(self, conditions: list[Condition]) -> set[int]:
+        """Interned IDs satisfying every condition, most selective first."""
+        for condition in conditions:
+            if self.keys is not None and condition.key not in self.keys:
+                raise PropertyQueryError(f"Property {condition.key!r} is not indexed")
+
+        sized = sorted(
+            (self._estimate(condition), i, condition)
+            for i, condition in enumerate(conditions)
+        )
+        matched: set[int] | None = None
+        for _, _, condition in sized:
+            if condition.op == "!=":
+                continue
+            if condition.op == "=":
+                found = self._equal_postings(condition)
+                if found is None:
+                    return set()
+                matched = set(found) if matched is None else found.keep_common(matched)
+            else:
+                ids = self._range_ids(condition)
+                matched = ids if matched is None else matched & ids
+            if not matched:
+                return set()
+
+        # key!=value needs the key to be set, as in SQL
+        for condition in conditions:
+            if condition.op != "!=":
+                continue
+            present = self._present.get(condition.key)
+            if not present:
+                return set()
+            matched = set(present) if matched is None else present.keep_common(matched)
+            excluded = self._equal_postings(condition)
+            if excluded is not None:
+                matched = excluded.drop_common(matched)
+        return matched or set()
+
+    def _entries(self, frontmatter: dict):
+        if not isinstance(frontmatter, dict):
+            return
+        for key, value in frontmatter.items():
+            key = str(key)
+            if self.keys is None or key in self.keys:
+                yield key, value
+
+    @staticmethod
+    def _items(value: object) -> list:
+        if isinstance(value, (list, tuple, set)):
+            # One item per equality key: true == 1 == 1.0 in Python, but
+            # true is not a number here
+            unique = {}
+            for item in value:
+                equality = _equality_key(item)
+                if equality is not None:
+                    unique.setdefault(equality, item)
+            return list(unique.values())
+        return [value]
+
+    def _equal_postings(self, condition: Condition) -> Postings | None:
+        equality = _equality_key(condition.value)
+        return self._equal.get(condition.key, {}).get(equality)
+
+    def _range_ids(self, condition: Condition) -> set[int]:
+        kind = _range_kind(condition.value)
+        column = self._ranges.get((condition.key, kind))
+        if column is None:
+            return set()
+        start, end = column.span(condition.op, _range_value(condition.value))
+        return set(column.ids[start:end])
+
+    def _estimate(self, condition: Condition) -> float:
+        if condition.op == "=":
+            return len(self._equal_postings(condition) or ())
+        if condition.op == "!=":
+            return float("inf")
+        column = self._ranges.get((condition.key, _range_kind(condition.value)))
+        if column is None:
+            return 0
+        start, end = column.span(condition.op, _range_value(condition.value))
+        return end - start
@@ -0,0 +1,186 @@
+"""Background retention for file version history.
+
+A periodic task thins fs_versions per the configured policy:
+
+- Keep every version younger than `keep_all_days`
+- Keep the newest version per day until `keep_daily_days`
+- Keep the newest version per week (Monday to Sunday) beyond that
+- Optionally cap each note's stored history at `max_bytes_per_note`,
+  dropping its oldest versions first
+
+Survivors are chosen in SQL with window functions, once per run and on a
+read connection. The expired versions are then deleted by ID in bounded
+batches, each as its own writer unit, so saves interleave with a large
+cleanup instead of waiting behind it. Versions only ever become more
+expired as time passes and notes gain history, so a list taken at the
+start of a run stays valid while it is worked through. The newest version
+of a note is never deleted.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+import aiosqlite
+from loguru import logger
+
+from . import version_store
+from .db import ReadPool
+from .writer import Writer
+
+
+@dataclass
+class RetentionPolicy:
+    keep_all_days: int = 7
+    keep_daily_days: int = 30
+    # Approximate compressed bytes of history kept per note; None = unlimited
+    max_bytes_per_note: int | None = None
+    interval_seconds: float = 3600.0
+    batch_size: int = 200
+
+    def __post_init__(self) -> None:
+        if self.interval_seconds <= 0:
+            raise ValueError("interval_seconds must be positive")
+        if self.batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+
+@dataclass
+class RetentionStats:
+    runs: int = 0
+    batches: int = 0
+    deleted: int = 0
+    last_deleted: int = 0
+    last_run_at: str | None = None
+    last_duration_ms: float = 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "runs": self.runs,
+            "batches": self.batches,
+            "deleted": self.deleted,
+            "last_deleted": self.last_deleted,
+            "last_run_at": self.last_run_at,
+            "last_duration_ms": round(self.last_duration_ms, 3),
+        }
+
+
+# Rank versions per note (newest first) and per retention bucket; anything
+# that is not the newest of its bucket, or falls past the byte budget, goes.
+# length() of a BLOB reads only its header, so this never touches version data.
+_EXPIRED_QUERY = """
+    WITH ranked AS (
+        SELECT
+            id,
+            node_id,
+            created_at,
+            CASE
+                WHEN created_at >= :keep_all THEN id
+                WHEN created_at >= :keep_daily THEN 'd' || date(created_at)
+                ELSE 'w' || date(created_at, 'weekday 0', '-6 days')
+            END AS bucket,
+            ROW_NUMBER() OVER newest AS recency,
+            SUM(length(data)) OVER (newest ROWS UNBOUNDED PRECEDING) AS stored
+        FROM fs_versions
+        WINDOW newest AS (PARTITION BY node_id ORDER BY created_at DESC, id DESC)
+    ),
+    bucketed AS (
+        SELECT
+            id,
+            recency,
+            stored,
+            ROW_NUMBER() OVER (
+                PARTITION BY node_id, bucket ORDER BY created_at DESC, id DESC
+            ) AS rank_in_bucket
+        FROM ranked
+    )
+    SELECT id FROM bucketed
+    WHERE recency > 1
+      AND (rank_in_bucket > 1 OR (:budget IS NOT NULL AND stored > :budget))
+"""
+
+
+def _cutoff(now: datetime, days: int) -> str:
+    return (now - timedelta(days=days)).replace(tzinfo=None).isoformat()
+
+
+async def find_expired(
+    db: aiosqlite.Connection, policy: RetentionPolicy, now: datetime
+) -> list[str]:
+    """IDs of every version the policy no longer keeps."""
+    async with db.execute(
+        _EXPIRED_QUERY,
+        {
+            "keep_all": _cutoff(now, policy.keep_all_days),
+            "keep_daily": _cutoff(now, policy.keep_daily_days),
+            "budget": policy.max_bytes_per_note,
+        },
+    ) as cursor:
+        return [row["id"] for row in await cursor.fetchall()]
+
+
+class RetentionScheduler:
+    """Runs retention through the writer every `policy.interval_seconds`."""
+
+    def __init__(
+        self,
+        read_pool: ReadPool,
+        writer: Writer,
+        policy: RetentionPolicy | None = None,
+    ) -> None:
+        self.read_pool = read_pool
+        self.writer = writer
+        self.policy = policy or RetentionPolicy()
+        self.stats = RetentionStats()
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop(), name="basidian-retention")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def metrics(self) -> dict:
+        return self.stats.as_dict()
+
+    async def run_once(self) -> int:
+        """Apply the policy once. Returns the number of versions deleted."""
+        now = datetime.now(timezone.utc)
+        start = time.perf_counter()
+
+        async with self.read_pool.acquire() as db:
+            expired = await find_expired(db, self.policy, now)
+
+        deleted = 0
+        for offset in range(0, len(expired), self.policy.batch_size):
+            batch = expired[offset : offset + self.policy.batch_size]
+            await self.writer.run(
+                lambda db, batch=batch: version_store.delete_versions(db, batch)
+            )
+            self.stats.batches += 1
+            deleted += len(batch)
+
+        self.stats.runs += 1
+        self.stats.deleted += deleted
+        self.stats.last_deleted = deleted
+        self.stats.last_run_at = now.replace(tzinfo=None).isoformat()
+        self.stats.last_duration_ms = (time.perf_counter() - start) * 1000
+        if deleted:
+            logger.info(f"Retention: Deleted {deleted} old versions")
+        return deleted
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Retention: Run failed: {e}")
+            await asyncio.sleep(self.policy.interval_seconds)
@@ -0,0 +1,54 @@
+"""Response rows encoded as JSON by SQLite.
+
+The hot list endpoints can return tens of thousands of rows. Building a
+validated Pydantic model per row, then having FastAPI validate and encode it
+again through the response model, took most of those requests. Instead they
+select each row as a JSON object built by SQLite's json_object() and join
+the objects into the response body.
+
+Field names and order match the response models (FsNode, SearchResult,
+SyncNodeRow, SyncContentRow), which stay on the routes for the OpenAPI
+schema.
+"""
+
+from fastapi import Response
+
+
+def parent_path_sql(path: str = "path") -> str:
+    """SQL for a node's parent_path, as _compute_parent_path derives it.
+
+    The inner rtrim strips the last segment (every character in it is a
+    non-slash character of the path), the outer one the slash before it.
+    """
+    return f"coalesce(nullif(rtrim(rtrim({path}, replace({path}, '/', '')), '/'), ''), '/')"
+
+
+def node_fields(prefix: str = "", content: str = "NULL") -> dict[str, str]:
+    """FsNode fields as SQL expressions over fs_nodes columns."""
+    return {
+        "id": f"{prefix}id",
+        "parent_id": f"{prefix}parent_id",
+        "parent_path": parent_path_sql(f"{prefix}path"),
+        "type": f"{prefix}type",
+        "name": f"{prefix}name",
+        "path": f"{prefix}path",
+        "content": content,
+        "sort_order": f"{prefix}sort_order",
+        "created_at": f"{prefix}created_at",
+        "updated_at": f"{prefix}updated_at",
+    }
+
+
+def json_object_sql(fields: dict[str, str]) -> str:
+    """json_object() over (key → SQL expression) pairs."""
+    pairs = ", ".join(f"'{key}', {expr}" for key, expr in fields.items())
+    return f"json_object({pairs})"
+
+
+def json_array(items: list[str]) -> str:
+    """A JSON array of already-encoded items."""
+    return "[" + ",".join(items) + "]"
+
+
+def json_response(body: str) -> Response:
+    return Response(body.encode(), media_type="application/json")
@@ -0,0 +1,150 @@
+"""Full-text search over file names and bodies, backed by SQLite FTS5.
+
+The `fs_search` table is kept current by the mutating handlers, which call
+`reindex` with the IDs they touched inside their unit of work. Queries are
+ranked with BM25 (name matches weigh more than body matches) and return a
+highlighted snippet of the best-matching column.
+"""
+
+import json
+import re
+from typing import Iterable
+
+import aiosqlite
+
+# BM25 column weights: (name, body)
+_NAME_WEIGHT = 10.0
+_BODY_WEIGHT = 1.0
+
+SNIPPET_OPEN = "<mark>"
+SNIPPET_CLOSE = "</mark>"
+_SNIPPET_ELLIPSIS = "…"
+_SNIPPET_TOKENS = 12
+
+# A "quoted phrase" or a bare word, either optionally followed by * for prefix
+_QUERY_TERM = re.compile(r'"([^"]*)"(\*?)|(\S+)')
+
+
+def build_match_query(q: str) -> str | None:
+    """Translate user input into a safe FTS5 MATCH expression.
+
+    Supports quoted phrases ("exact words"), prefix terms (proj*) and implicit
+    AND between terms. Every term is quoted, so punctuation in user input can
+    never produce an FTS5 syntax error. Returns None if no terms remain.
+    """
+    terms = []
+    for match in _QUERY_TERM.finditer(q):
+        phrase, phrase_star, word = match.groups()
+        if word is not None:
+            prefix = word.endswith("*")
+            text = word.rstrip("*")
+        else:
+            prefix = bool(phrase_star)
+            text = phrase
+        text = text.strip()
+        if not text:
+            continue
+        quoted = '"' + text.replace('"', '""') + '"'
+        terms.append(quoted + "*" if prefix else quoted)
+    if not terms:
+        return None
+    return " ".join(terms)
+
+
+async def reindex(db: aiosqlite.Connection, node_ids: Iterable[str]) -> None:
+    """Bring the search index in line with the current rows for `node_ids`.
+
+    Live files are (re)indexed with their current name and body; folders,
+    deleted and missing nodes are dropped from the index. Set-based, so it
+    costs a constant number of statements regardless of how many IDs change.
+    """
+    ids = json.dumps(list(node_ids))
+    if ids == "[]":
+        return
+
+    await db.execute(
+        """
+        DELETE FROM fs_search WHERE rowid IN (
+            SELECT doc_id FROM fs_search_docs
+            WHERE node_id IN (SELECT value FROM json_each(?))
+        )
+        """,
+        (ids,),
+    )
+    await db.execute(
+        "DELETE FROM fs_search_docs WHERE node_id IN (SELECT value FROM json_each(?))",
+        (ids,),
+    )
+    await db.execute(
+        """
+        INSERT INTO fs_search_docs (node_id)
+        SELECT id FROM fs_nodes
+        WHERE id IN (SELECT value FROM json_each(?))
+          AND type = 'file' AND deleted_at IS NULL
+        """,
+        (ids,),
+    )
+    await db.execute(
+        """
+        INSERT INTO fs_search (rowid, name, body)
+        SELECT d.doc_id, n.name, COALESCE(c.body, '')
+        FROM fs_search_docs d
+        JOIN fs_nodes n ON n.id = d.node_id
+        LEFT JOIN fs_content c ON c.node_id = n.id
+        WHERE d.node_id IN (SELECT value FROM json_each(?))
+        """,
+        (ids,),
+    )
+
+
+async def find(
+    db: aiosqlite.Connection,
+    match: str,
+    columns: str,
+    limit: int,
+    after: tuple[float, str] | None = None,
+    select: str = "*",
+) -> list[aiosqlite.Row]:
+    """Return up to `limit` hits for a MATCH expression, best first.
+
+    Each hit has the given columns of `fs_nodes n` / `fs_content c` plus
+    `snippet` and `score` (BM25, lower is better); `select` picks the
+    returned expressions over those. `after` is the (score, node id) of the
+    last hit of the previous page.
+
+    Matches are ranked on rowid and score alone; node rows, bodies and
+    snippets are loaded only for the page that survives the LIMIT.
+    """
+    keyset = "WHERE (score, id) > (?, ?)" if after else ""
+    async with db.execute(
+        f"""
+        WITH page AS (
+            SELECT doc_id, id, score FROM (
+                SELECT fs_search.rowid AS doc_id,
+                       d.node_id AS id,
+                       bm25(fs_search, {_NAME_WEIGHT}, {_BODY_WEIGHT}) AS score
+                FROM fs_search
+                JOIN fs_search_docs d ON d.doc_id = fs_search.rowid
+                WHERE fs_search MATCH ?
+            )
+            {keyset}
+            ORDER BY score ASC, id ASC
+            LIMIT ?
+        )
+        SELECT {select} FROM (
+            -- snippet() needs the FTS cursor: match again, on the page's rowids
+            SELECT {columns},
+                   snippet(fs_search, -1, '{SNIPPET_OPEN}', '{SNIPPET_CLOSE}',
+                           '{_SNIPPET_ELLIPSIS}', {_SNIPPET_TOKENS}) AS snippet,
+                   page.score AS score
+            FROM page
+            JOIN fs_search ON fs_search.rowid = page.doc_id
+            JOIN fs_nodes n ON n.id = page.id
+            LEFT JOIN fs_content c ON c.node_id = n.id
+            WHERE fs_search MATCH ? AND n.deleted_at IS NULL
+        )
+        ORDER BY score ASC, id ASC
+        """,
+        (match, *(after or ()), limit, match),
+    ) as cursor:
+        return list(await cursor.fetchall())
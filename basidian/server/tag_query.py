@@ -0,0 +1,236 @@
+"""Boolean tag expressions evaluated over the metadata index's postings.
+
+Syntax, loosest binding first:
+
+    expr  := term ("OR" term)*
+    term  := unary (["AND"] unary)*     # juxtaposition means AND
+    unary := "NOT" unary | "(" expr ")" | tag
+
+so `project AND (urgent OR blocked) NOT archived` reads as
+project ∧ (urgent ∨ blocked) ∧ ¬archived. Operators are upper case; tags
+are matched case-insensitively and may keep their leading `#`.
+
+`A AND NOT B` is evaluated as a difference rather than against the set of
+all notes, and AND operands are intersected smallest first, so a selective
+tag bounds the work however common the others are.
+"""
+
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from .postings import Postings, intersect
+
+# A parenthesis, or a run of anything else up to whitespace or a parenthesis
+_TOKEN = re.compile(r"[()]|[^\s()]+")
+# Same characters as a #tag in a note body
+_TAG = re.compile(r"#?([\w-]+)")
+_MAX_TOKENS = 256
+
+
+class TagQueryError(ValueError):
+    """The expression could not be parsed."""
+
+
+@dataclass(frozen=True)
+class Tag:
+    name: str
+
+
+@dataclass(frozen=True)
+class And:
+    include: tuple
+    exclude: tuple = ()
+
+
+@dataclass(frozen=True)
+class Or:
+    options: tuple
+
+
+@dataclass(frozen=True)
+class Not:
+    operand: object
+
+
+def parse_tag_query(q: str) -> object:
+    """Parse an expression into Tag/And/Or/Not nodes."""
+    tokens = _TOKEN.findall(q)
+    if not tokens:
+        raise TagQueryError("Empty query")
+    if len(tokens) > _MAX_TOKENS:
+        raise TagQueryError(f"Query has more than {_MAX_TOKENS} tokens")
+    parser = _Parser(tokens)
+    expr = parser.expr()
+    if parser.pos < len(tokens):
+        raise TagQueryError(f"Unexpected {tokens[parser.pos]!r}")
+    return expr
+
+
+class _Parser:
+    def __init__(self, tokens: list[str]) -> None:
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise TagQueryError("Unexpected end of query")
+        self.pos += 1
+        return token
+
+    def expr(self) -> object:
+        options = [self.term()]
+        while self.peek() == "OR":
+            self.take()
+            options.append(self.term())
+        if len(options) == 1:
+            return options[0]
+        flat = []
+        for option in options:
+            flat.extend(option.options if isinstance(option, Or) else [option])
+        return Or(tuple(flat))
+
+    def term(self) -> object:
+        include, exclude = [], []
+        while True:
+            operand = self.unary()
+            # AND NOT x becomes a difference; nested ANDs flatten
+            if isinstance(operand, Not):
+                exclude.append(operand.operand)
+            elif isinstance(operand, And):
+                include.extend(operand.include)
+                exclude.extend(operand.exclude)
+            else:
+                include.append(operand)
+            if self.peek() == "AND":
+                self.take()
+            elif self.peek() in (None, "OR", ")"):
+                break
+        if not exclude and len(include) == 1:
+            return include[0]
+        if not include:
+            # Only negations: NOT a NOT b = NOT (a OR b)
+            return Not(exclude[0] if len(exclude) == 1 else Or(tuple(exclude)))
+        return And(tuple(include), tuple(exclude))
+
+    def unary(self) -> object:
+        token = self.take()
+        if token == "NOT":
+            operand = self.unary()
+            return operand.operand if isinstance(operand, Not) else Not(operand)
+        if token == "(":
+            inner = self.expr()
+            if self.take() != ")":
+                raise TagQueryError("Missing ')'")
+            return inner
+        if token in ("AND", "OR", ")"):
+            raise TagQueryError(f"Unexpected {token!r}")
+        match = _TAG.fullmatch(token)
+        if not match:
+            raise TagQueryError(f"Invalid tag {token!r}")
+        return Tag(match.group(1).lower())
+
+
+def evaluate(
+    expr: object, tags: dict[str, Postings], universe: Callable[[], set[int]]
+) -> set[int] | Postings:
+    """Interned IDs matching `expr`.
+
+    `universe` returns every indexed node; it is only called for a NOT
+    that has nothing to subtract from.
+
+    May return a Postings list directly (for a bare tag); callers must not
+    mutate the result.
+    """
+    return _Evaluator(tags, universe).run(expr)
+
+
+class _Evaluator:
+    def __init__(
+        self, tags: dict[str, Postings], universe: Callable[[], set[int]]
+    ) -> None:
+        self.tags = tags
+        self.universe = universe
+
+    def run(self, expr: object) -> set[int] | Postings:
+        if isinstance(expr, Tag):
+            return self.tags.get(expr.name) or set()
+        if isinstance(expr, Or):
+            matched: set[int] = set()
+            for option in expr.options:
+                matched.update(self.run(option))
+            return matched
+        if isinstance(expr, Not):
+            return _subtract(self.universe(), self.run(expr.operand))
+        return self.run_and(expr)
+
+    def run_and(self, expr: And) -> set[int]:
+        # Intersect the plain tags first (bitmap AND when they are all dense),
+        # or else materialize only the smallest sub-expression
+        leaves = [self.run(op) for op in expr.include if isinstance(op, Tag)]
+        rest = sorted(
+            (op for op in expr.include if not isinstance(op, Tag)), key=self.estimate
+        )
+        if leaves:
+            if not all(leaves):
+                return set()
+            matched = set(intersect(leaves))
+        else:
+            matched = set(self.run(rest.pop(0)))
+
+        # The rest only narrow the candidates: probe each candidate while
+        # they are fewer than the operand would produce, else intersect
+        for op in rest:
+            if not matched:
+                return matched
+            if len(matched) <= self.estimate(op):
+                matched = {value for value in matched if self.contains(op, value)}
+            else:
+                matched = _intersect(matched, self.run(op))
+        for op in expr.exclude:
+            if not matched:
+                return matched
+            if isinstance(op, Tag) or len(matched) > self.estimate(op):
+                matched = _subtract(matched, self.run(op))
+            else:
+                matched = {value for value in matched if not self.contains(op, value)}
+        return matched
+
+    def estimate(self, expr: object) -> float:
+        """Upper bound on how many IDs `expr` matches, without evaluating it."""
+        if isinstance(expr, Tag):
+            return len(self.tags.get(expr.name) or ())
+        if isinstance(expr, Or):
+            return sum(self.estimate(option) for option in expr.options)
+        if isinstance(expr, And):
+            return min(self.estimate(op) for op in expr.include)
+        return float("inf")
+
+    def contains(self, expr: object, value: int) -> bool:
+        """Whether `value` matches `expr`, checked without materializing it."""
+        if isinstance(expr, Tag):
+            postings = self.tags.get(expr.name)
+            return postings is not None and value in postings
+        if isinstance(expr, Or):
+            return any(self.contains(option, value) for option in expr.options)
+        if isinstance(expr, Not):
+            return not self.contains(expr.operand, value)
+        return all(self.contains(op, value) for op in expr.include) and not any(
+            self.contains(op, value) for op in expr.exclude
+        )
+
+
+def _intersect(matched: set[int], operand: set[int] | Postings) -> set[int]:
+    if isinstance(operand, Postings):
+        return operand.keep_common(matched)
+    return matched & operand
+
+
+def _subtract(matched: set[int], operand: set[int] | Postings) -> set[int]:
+    if isinstance(operand, Postings):
+        return operand.drop_common(matched)
+    return matched - operand
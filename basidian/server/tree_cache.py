@@ -0,0 +1,89 @@
+"""Serialized /api/fs/tree responses, cached per tree revision.
+
+Every write that changes fs_nodes rows (create, update, delete, move, sync
+push, restore) bumps `TreeCache.revision` once it has committed. The first
+tree request at a revision serializes the rows once; later requests are
+served from those bytes, and a client holding the same strong ETag gets a
+304 without SQLite being queried at all.
+
+The ETag is a hash of the serialized body, so it survives restarts and a
+revision that changed nothing visible still matches.
+"""
+
+import hashlib
+from dataclasses import dataclass
+
+from fastapi import Request
+
+# Distinct parent_path values cached per revision
+_MAX_ENTRIES = 64
+
+
+@dataclass
+class TreeCacheStats:
+    hits: int = 0
+    misses: int = 0
+    not_modified: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag identifying a response body."""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header covers `etag`.
+
+    Uses weak comparison, as If-None-Match requires: the compression
+    middleware sends compressed representations with a weak ETag.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+class TreeCache:
+    """Tree responses (ETag, JSON bytes) for the current revision."""
+
+    def __init__(self) -> None:
+        self.revision = 0
+        self.stats = TreeCacheStats()
+        self._entries: dict[str, tuple[str, bytes]] = {}
+
+    def bump(self) -> None:
+        """Invalidate cached trees after a committed write to fs_nodes."""
+        self.revision += 1
+        self._entries.clear()
+
+    def get(self, key: str) -> tuple[str, bytes] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        return entry
+
+    def put(self, key: str, revision: int, body: bytes) -> tuple[str, bytes]:
+        """Cache `body`, read at `revision`, unless a write has landed since."""
+        entry = (etag_for(body), body)
+        if revision == self.revision:
+            if len(self._entries) >= _MAX_ENTRIES:
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = entry
+        return entry
+
+    def metrics(self) -> dict:
+        return {"revision": self.revision, **self.stats.as_dict()}
+
+
+def get_tree_cache(request: Request) -> TreeCache:
+    return request.app.state.tree_cache
@@ -0,0 +1,333 @@
+"""Compressed storage for file versions (fs_versions).
+
+Versions are stored as zlib-compressed keyframes (full bodies) plus
+compressed line deltas against the node's current keyframe. Every delta
+points straight at its keyframe, never at another delta, so reading any
+version costs at most one keyframe and one delta to decompress.
+
+A new keyframe starts every KEYFRAME_INTERVAL versions, or earlier when a
+delta would no longer be much smaller than the full body.
+
+Each row also records the body's content hash, byte size and the lines
+added/removed relative to the previous version, computed once at insert, so
+listing history and equality checks never decode bodies.
+"""
+
+import difflib
+import json
+import zlib
+from typing import Iterable
+
+import aiosqlite
+
+from basidian.hashing import content_hash
+
+KEYFRAME_INTERVAL = 20
+# Store a keyframe instead when the delta is at least this fraction of it
+_MAX_DELTA_RATIO = 0.5
+_ZLIB_LEVEL = 6
+
+
+def encode_full(body: str) -> bytes:
+    return zlib.compress(body.encode("utf-8"), _ZLIB_LEVEL)
+
+
+def decode_full(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8")
+
+
+def encode_delta(base: str, body: str) -> bytes:
+    """Encode `body` as line operations against `base`.
+
+    The op list holds [start, end) line ranges to copy from the base and
+    strings of new text, in order.
+    """
+    base_lines = base.splitlines(keepends=True)
+    new_lines = body.splitlines(keepends=True)
+    ops: list = []
+    matcher = difflib.SequenceMatcher(None, base_lines, new_lines)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif tag in ("replace", "insert"):
+            ops.append("".join(new_lines[j1:j2]))
+    raw = json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+    return zlib.compress(raw.encode("utf-8"), _ZLIB_LEVEL)
+
+
+def apply_delta(base: str, data: bytes) -> str:
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(zlib.decompress(data)):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0] : op[1]])
+    return "".join(parts)
+
+
+def decode(kind: str, data: bytes, base_data: bytes | None) -> str:
+    """Decode a stored version given its row and its keyframe's data."""
+    if kind == "full":
+        return decode_full(data)
+    if base_data is None:
+        raise ValueError("Delta version is missing its keyframe")
+    return apply_delta(decode_full(base_data), data)
+
+
+def diff_stats(old_body: str, new_body: str) -> tuple[int, int]:
+    """Compute lines added/removed between two bodies."""
+    old_lines = old_body.splitlines(keepends=True)
+    new_lines = new_body.splitlines(keepends=True)
+    added = 0
+    removed = 0
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(
+        None, old_lines, new_lines
+    ).get_opcodes():
+        if tag == "replace":
+            removed += i2 - i1
+            added += j2 - j1
+        elif tag == "delete":
+            removed += i2 - i1
+        elif tag == "insert":
+            added += j2 - j1
+    return added, removed
+
+
+def choose_encoding(
+    keyframe_body: str | None, body: str, deltas_since_keyframe: int
+) -> tuple[str, bytes]:
+    """Pick ('full', data) or ('delta', data) for a new version."""
+    full = encode_full(body)
+    if keyframe_body is None or deltas_since_keyframe + 1 >= KEYFRAME_INTERVAL:
+        return "full", full
+    delta = encode_delta(keyframe_body, body)
+    if len(delta) >= len(full) * _MAX_DELTA_RATIO:
+        return "full", full
+    return "delta", delta
+
+
+async def _current_keyframe(
+    db: aiosqlite.Connection, node_id: str
+) -> tuple[str, bytes, int] | None:
+    """(id, data, number of deltas) of the keyframe the next version would use."""
+    async with db.execute(
+        """
+        SELECT k.id, k.data,
+               (SELECT COUNT(*) FROM fs_versions d WHERE d.base_id = k.id) AS deltas
+        FROM fs_versions k
+        WHERE k.id = (
+            SELECT COALESCE(base_id, id) FROM fs_versions
+            WHERE node_id = ? ORDER BY created_at DESC, id DESC LIMIT 1
+        )
+        """,
+        (node_id,),
+    ) as cursor:
+        row = await cursor.fetchone()
+    if row is None:
+        return None
+    return row["id"], row["data"], row["deltas"]
+
+
+async def insert_version(
+    db: aiosqlite.Connection,
+    version_id: str,
+    node_id: str,
+    body: str,
+    created_at: str,
+) -> None:
+    """Store a new version of a node's body."""
+    keyframe = await _current_keyframe(db, node_id)
+    if keyframe is None:
+        kind, data = "full", encode_full(body)
+    else:
+        _, keyframe_data, deltas = keyframe
+        kind, data = choose_encoding(decode_full(keyframe_data), body, deltas)
+    previous = await latest_body(db, node_id)
+    added, removed = diff_stats(previous or "", body)
+    await db.execute(
+        """
+        INSERT INTO fs_versions (
+            id, node_id, kind, base_id, data, content_hash, size,
+            lines_added, lines_removed, created_at
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (
+            version_id,
+            node_id,
+            kind,
+            keyframe[0] if kind == "delta" else None,
+            data,
+            content_hash(body),
+            len(body.encode("utf-8")),
+            added,
+            removed,
+            created_at,
+        ),
+    )
+
+
+async def latest_hash(db: aiosqlite.Connection, node_id: str) -> str | None:
+    """Content hash of the most recent version, or None if none exist."""
+    async with db.execute(
+        "SELECT content_hash FROM fs_versions WHERE node_id = ? "
+        "ORDER BY created_at DESC, id DESC LIMIT 1",
+        (node_id,),
+    ) as cursor:
+        row = await cursor.fetchone()
+    return row["content_hash"] if row else None
+
+
+_SELECT_WITH_BASE = """
+    SELECT v.id, v.node_id, v.kind, v.base_id, v.data, v.created_at,
+           b.data AS base_data
+    FROM fs_versions v
+    LEFT JOIN fs_versions b ON b.id = v.base_id
+"""
+
+
+async def read_version(
+    db: aiosqlite.Connection, node_id: str, version_id: str
+) -> tuple[str, str] | None:
+    """(body, created_at) of one version, or None if it does not exist."""
+    async with db.execute(
+        _SELECT_WITH_BASE + " WHERE v.id = ? AND v.node_id = ?",
+        (version_id, node_id),
+    ) as cursor:
+        row = await cursor.fetchone()
+    if row is None:
+        return None
+    return decode(row["kind"], row["data"], row["base_data"]), row["created_at"]
+
+
+async def latest_body(db: aiosqlite.Connection, node_id: str) -> str | None:
+    """Body of the most recent version, or None if no versions exist."""
+    async with db.execute(
+        _SELECT_WITH_BASE
+        + " WHERE v.node_id = ? ORDER BY v.created_at DESC, v.id DESC LIMIT 1",
+        (node_id,),
+    ) as cursor:
+        row = await cursor.fetchone()
+    if row is None:
+        return None
+    return decode(row["kind"], row["data"], row["base_data"])
+
+
+async def list_bodies(
+    db: aiosqlite.Connection, node_id: str
+) -> list[tuple[str, str, str]]:
+    """(id, created_at, body) of every version of a node, most recent first."""
+    async with db.execute(
+        _SELECT_WITH_BASE
+        + " WHERE v.node_id = ? ORDER BY v.created_at DESC, v.id DESC",
+        (node_id,),
+    ) as cursor:
+        rows = await cursor.fetchall()
+    keyframes: dict[str, str] = {}
+    result = []
+    for row in rows:
+        if row["kind"] == "full":
+            body = decode_full(row["data"])
+        else:
+            base = keyframes.get(row["base_id"])
+            if base is None:
+                base = keyframes[row["base_id"]] = decode_full(row["base_data"])
+            body = apply_delta(base, row["data"])
+        result.append((row["id"], row["created_at"], body))
+    return result
+
+
+async def detach_dependents(db: aiosqlite.Connection, doomed_ids: Iterable[str]) -> int:
+    """Re-encode surviving deltas whose keyframe is about to be deleted.
+
+    For each doomed keyframe, its oldest surviving delta becomes the new
+    keyframe and the remaining survivors are re-encoded against it. Call
+    before deleting `doomed_ids`. Returns the number of rows rewritten.
+    """
+    doomed = json.dumps(list(doomed_ids))
+    async with db.execute(
+        f"""
+        {_SELECT_WITH_BASE}
+        WHERE v.base_id IN (SELECT value FROM json_each(?))
+          AND v.id NOT IN (SELECT value FROM json_each(?))
+        ORDER BY v.base_id, v.created_at ASC
+        """,
+        (doomed, doomed),
+    ) as cursor:
+        rows = await cursor.fetchall()
+
+    new_keyframe: tuple[str, str] = ("", "")  # (id, body)
+    previous_base = None
+    for row in rows:
+        body = decode(row["kind"], row["data"], row["base_data"])
+        if row["base_id"] != previous_base:
+            # First survivor of this keyframe's group becomes its replacement
+            previous_base = row["base_id"]
+            new_keyframe = (row["id"], body)
+            kind, data = "full", encode_full(body)
+        else:
+            kind, data = choose_encoding(new_keyframe[1], body, 0)
+        await db.execute(
+            "UPDATE fs_versions SET kind = ?, base_id = ?, data = ? WHERE id = ?",
+            (kind, new_keyframe[0] if kind == "delta" else None, data, row["id"]),
+        )
+    return len(rows)
+
+
+async def delete_versions(db: aiosqlite.Connection, version_ids: list[str]) -> None:
+    """Delete versions, keeping the survivors decodable and their stats correct.
+
+    Deltas that outlive their keyframe are re-encoded first. A survivor whose
+    previous version was deleted gets its lines added/removed recomputed
+    against its new predecessor.
+    """
+    if not version_ids:
+        return
+    doomed = json.dumps(version_ids)
+    await detach_dependents(db, version_ids)
+
+    async with db.execute(
+        """
+        SELECT id, node_id FROM (
+            SELECT id, node_id,
+                   LAG(id) OVER (
+                       PARTITION BY node_id ORDER BY created_at, id
+                   ) AS previous_id
+            FROM fs_versions
+            WHERE node_id IN (
+                SELECT node_id FROM fs_versions
+                WHERE id IN (SELECT value FROM json_each(?))
+            )
+        )
+        WHERE previous_id IN (SELECT value FROM json_each(?))
+          AND id NOT IN (SELECT value FROM json_each(?))
+        """,
+        (doomed, doomed, doomed),
+    ) as cursor:
+        restat = list(await cursor.fetchall())
+
+    await db.execute(
+        "DELETE FROM fs_versions WHERE id IN (SELECT value FROM json_each(?))",
+        (doomed,),
+    )
+
+    for row in restat:
+        async with db.execute(
+            _SELECT_WITH_BASE
+            + """
+            WHERE v.node_id = ? AND (v.created_at, v.id) <= (
+                SELECT created_at, id FROM fs_versions WHERE id = ?
+            )
+            ORDER BY v.created_at DESC, v.id DESC
+            LIMIT 2
+            """,
+            (row["node_id"], row["id"]),
+        ) as cursor:
+            pair = list(await cursor.fetchall())
+        bodies = [decode(r["kind"], r["data"], r["base_data"]) for r in pair]
+        added, removed = diff_stats(bodies[1] if len(bodies) > 1 else "", bodies[0])
+        await db.execute(
+            "UPDATE fs_versions SET lines_added = ?, lines_removed = ? WHERE id = ?",
+            (added, removed, row["id"]),
+        )
@@ -0,0 +1,188 @@
+"""Serialized writer with group commit.
+
+All mutations go through a single writer task. A handler packages its reads
+and writes as a unit of work (an async function taking the writer
+connection) and awaits its result. The writer drains whatever units are
+queued, runs each inside its own savepoint, and commits them together, so a
+burst of autosaves costs one fsync and no request can ever commit another
+request's half-finished writes.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, TypeVar
+
+import aiosqlite
+from loguru import logger
+
+T = TypeVar("T")
+
+UnitOfWork = Callable[[aiosqlite.Connection], Awaitable[T]]
+
+DEFAULT_WRITE_QUEUE_SIZE = 256
+DEFAULT_MAX_GROUP_SIZE = 64
+
+
+@dataclass
+class WriterStats:
+    """Counters describing group commits since startup."""
+
+    commits: int = 0
+    units: int = 0
+    failed_units: int = 0
+    largest_group: int = 0
+    last_commit_ms: float = 0.0
+    max_commit_ms: float = 0.0
+    total_commit_ms: float = 0.0
+
+    def record_commit(self, group_size: int, duration_ms: float) -> None:
+        self.commits += 1
+        self.largest_group = max(self.largest_group, group_size)
+        self.last_commit_ms = duration_ms
+        self.max_commit_ms = max(self.max_commit_ms, duration_ms)
+        self.total_commit_ms += duration_ms
+
+    def as_dict(self, queue_depth: int) -> dict:
+        return {
+            "commits": self.commits,
+            "units": self.units,
+            "failed_units": self.failed_units,
+            "queue_depth": queue_depth,
+            "largest_group": self.largest_group,
+            "avg_units_per_commit": (
+                round(self.units / self.commits, 2) if self.commits else 0.0
+            ),
+            "last_commit_ms": round(self.last_commit_ms, 3),
+            "max_commit_ms": round(self.max_commit_ms, 3),
+            "avg_commit_ms": (
+                round(self.total_commit_ms / self.commits, 3) if self.commits else 0.0
+            ),
+        }
+
+
+@dataclass
+class _Unit:
+    work: UnitOfWork
+    future: asyncio.Future
+
+
+class Writer:
+    """Owns the writer connection and applies queued units of work."""
+
+    def __init__(
+        self,
+        db: aiosqlite.Connection,
+        queue_size: int = DEFAULT_WRITE_QUEUE_SIZE,
+        max_group_size: int = DEFAULT_MAX_GROUP_SIZE,
+    ) -> None:
+        self.db = db
+        self.max_group_size = max_group_size
+        self.stats = WriterStats()
+        # Bounded: when the writer falls behind, callers wait in run() instead
+        # of piling up unbounded work in memory
+        self._queue: asyncio.Queue[_Unit | None] = asyncio.Queue(maxsize=queue_size)
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop(), name="basidian-writer")
+
+    async def stop(self) -> None:
+        """Finish the queued units, then stop the writer task."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    async def run(self, work: UnitOfWork[T]) -> T:
+        """Run a unit of work in the next group commit and return its result.
+
+        Exceptions raised by the unit (including HTTPException) roll back only
+        that unit and are re-raised here.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_Unit(work, future))
+        return await future
+
+    def metrics(self) -> dict:
+        return self.stats.as_dict(self._queue.qsize())
+
+    async def _loop(self) -> None:
+        stopping = False
+        while not stopping:
+            unit = await self._queue.get()
+            if unit is None:
+                break
+            group = [unit]
+            while len(group) < self.max_group_size:
+                try:
+                    unit = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if unit is None:
+                    stopping = True
+                    break
+                group.append(unit)
+            try:
+                await self._commit_group(group)
+            except Exception as e:
+                # BEGIN or ROLLBACK itself failed; fail the group, keep the writer alive
+                logger.error(f"Writer: Group of {len(group)} units aborted: {e}")
+                if self.db.in_transaction:
+                    await self.db.rollback()
+                for unit in group:
+                    _settle(unit.future, exception=e)
+
+    async def _commit_group(self, group: list[_Unit]) -> None:
+        db = self.db
+        done: list[tuple[_Unit, object]] = []
+
+        await db.execute("BEGIN IMMEDIATE")
+        for unit in group:
+            if unit.future.cancelled():
+                # The request went away before its turn; skip the work
+                continue
+            await db.execute("SAVEPOINT unit")
+            try:
+                result = await unit.work(db)
+            except Exception as e:
+                await db.execute("ROLLBACK TO unit")
+                await db.execute("RELEASE unit")
+                self.stats.failed_units += 1
+                _settle(unit.future, exception=e)
+            else:
+                await db.execute("RELEASE unit")
+                done.append((unit, result))
+
+        if not done:
+            # Every unit failed or was skipped; nothing to make durable
+            await db.rollback()
+            return
+
+        start = time.perf_counter()
+        try:
+            await db.commit()
+        except Exception as e:
+            logger.error(f"Writer: Group commit of {len(done)} units failed: {e}")
+            await db.rollback()
+            for unit, _ in done:
+                _settle(unit.future, exception=e)
+            return
+        duration_ms = (time.perf_counter() - start) * 1000
+
+        self.stats.units += len(done)
+        self.stats.record_commit(len(done), duration_ms)
+        for unit, result in done:
+            _settle(unit.future, result=result)
+
+
+def _settle(
+    future: asyncio.Future, result: object = None, exception: Exception | None = None
+) -> None:
+    if future.done():
+        return
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
@@ -0,0 +1,134 @@
+"""Benchmark MetadataIndex builds across worker counts.
+
+Generates a synthetic vault (frontmatter, tags, wikilinks, code blocks) and
+times a full build with each worker count:
+
+    uv run python benchmarks/index_build.py --notes 100000 -w 1 -w 2 -w 4 -w 8
+
+With --chunk, also times parsing one build chunk of that many notes in
+process and in an already started pool, the trade-off PARALLEL_MIN_NODES
+settles (the threshold is lifted for the pool runs):
+
+    uv run python benchmarks/index_build.py -w 4 --chunk 500 --chunk 1000 --chunk 2000
+"""
+
+import random
+import time
+from datetime import date, timedelta
+
+import click
+
+from basidian.server import metadata
+from basidian.server.metadata import MetadataIndex, parse_nodes, parse_pool
+
+_WORDS = "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda mu".split()
+# Every Nth note is a daily note under /daily
+_DAILY_EVERY = 20
+
+
+def make_vault(notes: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    vault = []
+    for i in range(notes):
+        lines = [
+            "---",
+            f"title: Note {i}",
+            f"status: {rng.choice(['todo', 'doing', 'done'])}",
+            f"priority: {rng.randint(1, 5)}",
+            f"tags: [{rng.choice(_WORDS)}, {rng.choice(_WORDS)}]",
+            "---",
+            f"# Note {i}",
+            " ".join(f"#{tag}" for tag in rng.sample(_WORDS, rng.randint(1, 3))),
+        ]
+        for _ in range(rng.randint(10, 40)):
+            words = rng.choices(_WORDS, k=12)
+            if rng.random() < 0.3:
+                words.append(f"#{rng.choice(_WORDS)}-{rng.randint(0, 200)}")
+            if rng.random() < 0.2:
+                words.append(f"[[note-{rng.randrange(notes)}.md]]")
+            lines.append(" ".join(words))
+        if rng.random() < 0.1:
+            lines += ["```python", "x = 1  # not-a-tag", "```"]
+        if i % _DAILY_EVERY == 0:
+            day = date(2000, 1, 1) + timedelta(days=i // _DAILY_EVERY)
+            name = day.strftime("%d-%b-%Y.md")
+            path = f"/daily/{name}"
+        else:
+            name = f"note-{i}.md"
+            path = f"/{name}"
+        vault.append(
+            {
+                "id": f"{i:016x}",
+                "name": name,
+                "path": path,
+                "body": "\n".join(lines),
+            }
+        )
+    return vault
+
+
+@click.command()
+@click.option("--notes", default=100_000, show_default=True)
+@click.option(
+    "--workers", "-w", multiple=True, type=int, default=(1, 2, 4, 8), show_default=True
+)
+@click.option(
+    "--chunk",
+    "chunks",
+    multiple=True,
+    type=int,
+    help="Also time parsing a build chunk of this many notes.",
+)
+def main(notes: int, workers: tuple[int, ...], chunks: tuple[int, ...]):
+    """Time MetadataIndex.build on a synthetic vault."""
+    vault = make_vault(notes)
+    click.echo(f"{notes} notes, {sum(len(n['body']) for n in vault) >> 20} MiB")
+
+    baseline = None
+    for count in workers:
+        index = MetadataIndex()
+        start = time.perf_counter()
+        index.build(vault, workers=count)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        click.echo(
+            f"workers={count:<3} {elapsed:7.2f}s  speedup {baseline / elapsed:4.2f}x"
+        )
+
+    bodies = [(node["id"], node["body"]) for node in vault]
+    for count in (count for count in workers if count > 1 and chunks):
+        _time_chunks(bodies, count, chunks)
+
+
+def _best(run, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def _time_chunks(bodies: list[tuple[str, str]], workers: int, chunks) -> None:
+    pool = parse_pool(workers)
+    metadata.PARALLEL_MIN_NODES = 0
+    try:
+        start = time.perf_counter()
+        parse_nodes(bodies[: 2 * workers], pool)
+        click.echo(
+            f"workers={workers:<3} pool started in {time.perf_counter() - start:.2f}s"
+        )
+        for size in chunks:
+            chunk = bodies[:size]
+            serial = _best(lambda: parse_nodes(chunk))
+            pooled = _best(lambda: parse_nodes(chunk, pool))
+            click.echo(
+                f"  chunk {size:<6} in-process {serial:6.2f}s  "
+                f"pool {pooled:6.2f}s  speedup {serial / pooled:4.2f}x"
+            )
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark MetadataIndex memory and tag-lookup latency.
+
+Compares the interned posting lists against the plain `set[str]` maps they
+replaced, built from the same vault (the index side also holds each file's
+timestamps, which the sets never did):
+
+    uv run python benchmarks/index_memory.py --notes 100000
+"""
+
+import time
+import tracemalloc
+
+import click
+
+from basidian.server.metadata import MetadataIndex, parse_node
+from basidian.server.tag_query import parse_tag_query
+
+from index_build import make_vault
+
+
+def _traced(build):
+    tracemalloc.start()
+    try:
+        result = build()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return result, size
+
+
+def _us(fn, repeat: int) -> float:
+    # Steady state: the first call builds any cached string-ID view
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+@click.command()
+@click.option("--notes", default=100_000, show_default=True)
+@click.option("--repeat", default=200, show_default=True)
+def main(notes: int, repeat: int):
+    """Report bytes per note and tag query latency (µs)."""
+    vault = make_vault(notes)
+    entries = [
+        (node["id"], node["name"], node["path"], parse_node(node["body"]))
+        for node in vault
+    ]
+
+    def times():
+        # Distinct strings per file, like the rows a build reads
+        return {
+            node["id"]: (f"2026-01-01T00:00:00.{i:06d}", f"2026-02-01T00:00:00.{i:06d}")
+            for i, node in enumerate(vault)
+        }
+
+    index = MetadataIndex()
+    _, index_bytes = _traced(lambda: index.load(entries, times()))
+
+    # What the index used to hold: tag/backlink → set of IDs, node → links
+    def set_maps():
+        return (
+            {tag: index._ids.lookup(ids) for tag, ids in index.tags.items()},
+            {key: index._ids.lookup(ids) for key, ids in index.backlinks.items()},
+            {n: set(meta.links) for n, meta in index.nodes.items() if meta.links},
+        )
+
+    (tags, _, _), set_bytes = _traced(set_maps)
+    click.echo(
+        f"{notes} notes, {len(index.tags)} tags: "
+        f"postings {index_bytes / notes:6.0f} B/note, "
+        f"sets {set_bytes / notes:6.0f} B/note"
+    )
+
+    # Both sides return string node IDs, as the endpoints need them. Lookups
+    # are timed after the first call, which builds the list's cached view.
+    by_size = sorted(index.tags, key=lambda tag: -len(index.tags[tag]))
+    dense, rare = by_size[:3], by_size[len(by_size) // 2]
+    two = parse_tag_query(f"{dense[0]} AND {dense[1]}")
+    three = parse_tag_query(f"{dense[0]} AND {dense[1]} AND {rare}")
+    cases = {
+        f"lookup {dense[0]} ({len(tags[dense[0]])})": (
+            lambda: index.get_nodes_for_tag(dense[0]),
+            lambda: tags[dense[0]],
+        ),
+        f"lookup {rare} ({len(tags[rare])})": (
+            lambda: index.get_nodes_for_tag(rare),
+            lambda: tags[rare],
+        ),
+        f"{dense[0]} AND {dense[1]}": (
+            lambda: index.query_tags(two),
+            lambda: tags[dense[0]] & tags[dense[1]],
+        ),
+        f"{dense[0]} AND {dense[1]} AND {rare}": (
+            lambda: index.query_tags(three),
+            lambda: tags[dense[0]] & tags[dense[1]] & tags[rare],
+        ),
+    }
+    for name, (new, old) in cases.items():
+        click.echo(
+            f"{name:<40} postings {_us(new, repeat):9.1f}µs  "
+            f"sets {_us(old, repeat):9.1f}µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
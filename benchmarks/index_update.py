@@ -0,0 +1,86 @@
+"""Benchmark per-save MetadataIndex updates as the vault grows.
+
+Builds a synthetic vault of each size, then times update_node (with a new
+body, the same body again, and a prose-only edit), remove_node (followed by
+re-adding the note) and on_move on random notes. Per-operation cost should
+stay flat from small to large vaults:
+
+    uv run python benchmarks/index_update.py -n 1000 -n 10000 -n 100000
+"""
+
+import random
+import time
+
+import click
+
+from basidian.server.metadata import MetadataIndex, parse_node
+
+from index_build import make_vault
+
+
+def _time_ops(index: MetadataIndex, vault: list[dict], ops: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    picks = [rng.choice(vault) for _ in range(ops)]
+    edits = [rng.choice(vault)["body"] for _ in range(ops)]
+    timings = {}
+
+    start = time.perf_counter()
+    for node, body in zip(picks, edits):
+        index.update_node(node["id"], node["name"], node["path"], body)
+    timings["update"] = time.perf_counter() - start
+
+    # Unchanged bodies, as in a re-sent save or a replayed sync push
+    start = time.perf_counter()
+    for node, body in zip(picks, edits):
+        index.update_node(node["id"], node["name"], node["path"], body)
+    timings["resave"] = time.perf_counter() - start
+
+    # New bodies whose tags, links and frontmatter are unchanged
+    start = time.perf_counter()
+    for i, (node, body) in enumerate(zip(picks, edits)):
+        prose = f"{body}\nmore words {i}"
+        index.update_node(node["id"], node["name"], node["path"], prose)
+    timings["prose edit"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for node in picks:
+        index.remove_node(node["id"])
+        index.update_node(node["id"], node["name"], node["path"], node["body"])
+    timings["remove+add"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for node in picks:
+        moved = f"/moved{node['path']}"
+        index.on_move(node["id"], node["path"], moved, node["name"])
+        index.on_move(node["id"], moved, node["path"], node["name"])
+    timings["move x2"] = time.perf_counter() - start
+
+    return {name: elapsed / ops * 1e6 for name, elapsed in timings.items()}
+
+
+@click.command()
+@click.option(
+    "--notes",
+    "-n",
+    multiple=True,
+    type=int,
+    default=(1_000, 10_000, 100_000),
+    show_default=True,
+)
+@click.option("--ops", default=2_000, show_default=True)
+def main(notes: tuple[int, ...], ops: int):
+    """Time incremental MetadataIndex updates (µs per operation)."""
+    for count in notes:
+        vault = make_vault(count)
+        index = MetadataIndex()
+        index.load(
+            (node["id"], node["name"], node["path"], parse_node(node["body"]))
+            for node in vault
+        )
+        timings = _time_ops(index, vault, ops, seed=count)
+        cells = "  ".join(f"{name} {us:8.1f}µs" for name, us in timings.items())
+        click.echo(f"notes={count:<7} {cells}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark end-to-end latency of the large list endpoints.
+
+Fills a database with a synthetic vault (one folder per 100 notes), starts
+the app in-process and times full requests, response encoding included:
+
+- the whole tree (the tree cache is invalidated before each request)
+- a 500-node subtree page
+- a full sync pull (every node and body)
+- a 500-hit search page, and a 50-hit one for a term in every note
+- a 500-node tag page, and the 50 latest notes matching a tag query
+
+    uv run python benchmarks/list_responses.py --notes 20000
+"""
+
+import asyncio
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import aiosqlite
+import click
+from fastapi.testclient import TestClient
+from index_build import make_vault
+
+from basidian.server import search
+from basidian.server.main import create_app
+from basidian.server.migrations import run_migrations
+
+_FOLDER_SIZE = 100
+
+
+async def _fill(db_path: str, notes: int) -> None:
+    now = "2026-01-01T00:00:00"
+    vault = make_vault(notes)
+    folders = [
+        (f"f{i:015x}", None, "folder", f"folder-{i}", f"/folder-{i}", now, now)
+        for i in range((notes + _FOLDER_SIZE - 1) // _FOLDER_SIZE)
+    ]
+    files = []
+    for i, node in enumerate(vault):
+        folder = folders[i // _FOLDER_SIZE]
+        name = f"note-{i}.md"
+        files.append(
+            (node["id"], folder[0], "file", name, f"{folder[4]}/{name}", now, now)
+        )
+
+    async with aiosqlite.connect(db_path) as db:
+        await run_migrations(db)
+        await db.executemany(
+            """
+            INSERT INTO fs_nodes
+                (id, parent_id, type, name, path, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            folders + files,
+        )
+        await db.executemany(
+            "INSERT INTO fs_content (node_id, body, updated_at) VALUES (?, ?, ?)",
+            [(node["id"], node["body"], now) for node in vault],
+        )
+        await search.reindex(db, [node["id"] for node in vault])
+        await db.commit()
+
+
+def _time(client: TestClient, url: str, repeat: int, before=None) -> tuple[float, int]:
+    times = []
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        response = client.get(url)
+        times.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return statistics.median(times) * 1000, len(response.content)
+
+
+@click.command()
+@click.option("--notes", default=20_000, show_default=True)
+@click.option("--repeat", default=5, show_default=True)
+def main(notes: int, repeat: int):
+    """Report median request time (ms) and response size per endpoint."""
+    db_path = str(Path(tempfile.mkdtemp()) / "bench.db")
+    asyncio.run(_fill(db_path, notes))
+
+    app = create_app(db_path)
+    with TestClient(app) as client:
+        while not client.get("/health").json()["index"]["ready"]:
+            time.sleep(0.1)
+
+        cases = [
+            ("tree", "/api/fs/tree", app.state.tree_cache.bump),
+            ("subtree page", "/api/fs/tree?recursive=true&limit=500", None),
+            ("sync pull", "/api/sync/changes", None),
+            ("search page", "/api/fs/search?q=alpha&limit=500", None),
+            ("search top 50", "/api/fs/search?q=note&limit=50", None),
+            ("tag page", "/api/fs/tags/alpha?limit=500", None),
+            (
+                "tag query 50",
+                "/api/fs/query/tags?q=alpha%20OR%20beta&sort=updated_at&order=desc&limit=50",
+                None,
+            ),
+        ]
+        click.echo(f"{notes} notes")
+        for name, url, before in cases:
+            ms, size = _time(client, url, repeat, before)
+            click.echo(f"{name:<13} {ms:8.1f} ms  {size >> 10:7} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark the single-pass Markdown scanner against the regex extractors.
+
+The baseline is the extraction the metadata index used before: strip code
+blocks and inline code with two `re.sub` copies of the body, then run the
+tag, wikilink and frontmatter regexes separately. Both parse the same
+synthetic vault plus one large note; peak allocation per large note is
+reported alongside throughput:
+
+    uv run python benchmarks/markdown_scan.py --notes 20000
+"""
+
+import re
+import time
+import tracemalloc
+
+import click
+
+from basidian.server.markdown import frontmatter_span, scan
+
+from index_build import make_vault
+
+_TAG_PATTERN = re.compile(r"(?<!\w)#([\w-]+)")
+_LINK_PATTERN = re.compile(r"\[\[([^\]|]+)(?:\|[^\]]+)?\]\]")
+_CODE_BLOCK_PATTERN = re.compile(r"```[\s\S]*?```")
+_INLINE_CODE_PATTERN = re.compile(r"`[^`]+`")
+
+
+def regex_extract(body: str) -> tuple[set[str], set[str], str]:
+    stripped = _INLINE_CODE_PATTERN.sub("", _CODE_BLOCK_PATTERN.sub("", body))
+    tags = {tag.lower() for tag in _TAG_PATTERN.findall(stripped)}
+    links = set(_LINK_PATTERN.findall(body))
+    frontmatter = ""
+    if body.startswith("---"):
+        end = body.find("\n---", 3)
+        if end != -1:
+            frontmatter = body[3:end]
+    return tags, links, frontmatter
+
+
+def scan_extract(body: str) -> tuple[set[str], set[str], str]:
+    found = scan(body)
+    span = found.frontmatter
+    return found.tags, found.links, body[span[0] : span[1]] if span else ""
+
+
+def _peak(fn, body: str) -> int:
+    tracemalloc.start()
+    try:
+        fn(body)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@click.command()
+@click.option("--notes", default=20_000, show_default=True)
+@click.option("--large-kib", default=1024, show_default=True)
+def main(notes: int, large_kib: int):
+    """Report MiB/s over a vault and peak bytes allocated for one large note."""
+    bodies = [node["body"] for node in make_vault(notes)]
+    size = sum(len(body) for body in bodies)
+    large = "\n".join(bodies)[: large_kib << 10]
+    assert frontmatter_span(large) is not None
+
+    differ = sum(regex_extract(body)[:2] != scan_extract(body)[:2] for body in bodies)
+    click.echo(f"{notes} notes, {size >> 20} MiB; results differ on {differ} notes")
+
+    for name, fn in (("regex", regex_extract), ("scan", scan_extract)):
+        start = time.perf_counter()
+        for body in bodies:
+            fn(body)
+        elapsed = time.perf_counter() - start
+        peak = _peak(fn, large)
+        click.echo(
+            f"{name:<6} {size / elapsed / (1 << 20):7.1f} MiB/s  "
+            f"peak {peak >> 10:6} KiB on a {large_kib} KiB note"
+        )
+
+
+if __name__ == "__main__":
+    main()
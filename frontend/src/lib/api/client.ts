@@ -97,8 +97,19 @@ export const api = {
 
   // File history
   async getVersions(nodeId: string): Promise<FileVersionSummary[]> {
-    const response = await fetch(`${BASE_URL}/fs/node/${nodeId}/versions`);
-    return handleResponse<FileVersionSummary[]>(response);
+    // Paged by the server; follow the cursor header to collect every version
+    const versions: FileVersionSummary[] = [];
+    let cursor: string | null = null;
+    do {
+      const params = new URLSearchParams({ limit: "500" });
+      if (cursor) params.set("cursor", cursor);
+      const response = await fetch(
+        `${BASE_URL}/fs/node/${nodeId}/versions?${params}`,
+      );
+      versions.push(...(await handleResponse<FileVersionSummary[]>(response)));
+      cursor = response.headers.get("X-Next-Cursor");
+    } while (cursor);
+    return versions;
   },
 
   async getVersion(nodeId: string, versionId: string): Promise<FileVersion> {
@@ -43,6 +43,7 @@ export interface FileVersionSummary {
   created_at: string;
   lines_added: number;
   lines_removed: number;
+  size: number;
 }
 
 export interface Theme {